@@ -106,17 +106,9 @@ class SendCodeView(APIView):
         # Send SMS using SMS service (Payamak BaseServiceNumber pattern)
         # Pattern 270325 expects only the OTP code, not the full message
         # Pattern format: "سلام. کد تایید شما {code} می باشد گروه نرم افزاری میلیونر https://www.softmiliac.co/m"
-        from zistino_apps.payments.sms_service import send_sms
-        # Send only the code, Pattern will format it
-        sms_success, sms_error = send_sms(phone_number, code)
-        
-        if not sms_success:
-            # Log error but don't fail the request (code is still generated)
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send SMS to {phone_number}: {sms_error}")
-            # In production, you might want to return an error here
-            # For now, we'll still return success but log the error
+        from zistino_apps.payments.sms_outbox import enqueue_sms
+        # Send only the code, Pattern will format it (queued; sent by a Celery worker)
+        enqueue_sms(phone_number, code, purpose='otp', expires_at=expires_at)
         
         return Response({
             'message': 'Verification code sent successfully',
@@ -563,15 +555,9 @@ class ForgotPasswordView(APIView):
             
             # Send SMS using SMS service (Payamak BaseServiceNumber pattern)
             # Pattern 270325 expects only the OTP code, not the full message
-            from zistino_apps.payments.sms_service import send_sms
-            # Send only the code, Pattern will format it
-            sms_success, sms_error = send_sms(phone_number, code)
-            
-            if not sms_success:
-                # Log error but don't fail the request (code is still generated)
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Failed to send password reset SMS to {phone_number}: {sms_error}")
+            from zistino_apps.payments.sms_outbox import enqueue_sms
+            # Send only the code, Pattern will format it (queued; sent by a Celery worker)
+            enqueue_sms(phone_number, code, purpose='password_reset', expires_at=expires_at)
             
             return Response({
                 'message': 'Password reset code sent successfully',
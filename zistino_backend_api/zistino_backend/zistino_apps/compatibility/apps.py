@@ -10,3 +10,17 @@ class CompatibilityConfig(AppConfig):
     name = 'zistino_apps.compatibility'
     verbose_name = 'Compatibility Layer'
 
+    def ready(self):
+        """Connect signals when app is ready."""
+        from zistino_apps.compatibility.legacyids.signals import connect_legacy_id_signals
+        connect_legacy_id_signals()
+        from zistino_apps.compatibility.auth_cache import connect_auth_cache_signals
+        connect_auth_cache_signals()
+        from zistino_apps.compatibility.claims import connect_claims_signals
+        connect_claims_signals()
+        from zistino_apps.compatibility.categories.registry import connect_category_registry_signals
+        connect_category_registry_signals()
+        from zistino_apps.compatibility.search.signals import connect_search_signals
+        connect_search_signals()
+        from zistino_apps.compatibility.search.autocomplete import connect_autocomplete_signals
+        connect_autocomplete_signals()
@@ -0,0 +1,174 @@
+"""
+User lookup cache for JWT authentication.
+
+Authenticated requests resolve the token's user id through two levels:
+
+    local   per-process LRU of pickled users (AUTH_USER_CACHE_SIZE entries)
+    shared  the Django cache (redis), shared by all workers
+
+Both levels are keyed by the user id and the user's auth version, a random
+token kept in the shared cache. Saving or deleting a user (profile edits,
+deactivation, password changes) replaces the version, so every worker
+misses on its next request for that user and reloads it from the database.
+Entries also expire after AUTH_USER_CACHE_TTL seconds, which bounds
+staleness after QuerySet.update() calls that bypass the signals.
+
+Lookups are counted per process and flushed to the shared cache every
+STATS_FLUSH_EVERY requests; get_auth_cache_stats() reports the hit rate.
+"""
+import logging
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+AUTH_USER_KEY = 'compat:auth_user:{user_id}:{version}'
+AUTH_VERSION_KEY = 'compat:auth_user_version:{user_id}'
+AUTH_STATS_KEY = 'compat:auth_user_stats:{field}'
+STATS_FIELDS = ('local_hits', 'shared_hits', 'misses')
+STATS_FLUSH_EVERY = 100
+
+_lock = threading.Lock()
+_local = OrderedDict()
+_pending_stats = dict.fromkeys(STATS_FIELDS, 0)
+
+
+def get_ttl():
+    return getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+
+
+def _count(field):
+    with _lock:
+        _pending_stats[field] += 1
+        if sum(_pending_stats.values()) < STATS_FLUSH_EVERY:
+            return
+        pending = dict(_pending_stats)
+        for name in STATS_FIELDS:
+            _pending_stats[name] = 0
+    try:
+        for name, value in pending.items():
+            if value:
+                key = AUTH_STATS_KEY.format(field=name)
+                cache.add(key, 0, timeout=None)
+                cache.incr(key, value)
+    except Exception:
+        logger.warning('Failed to flush auth cache statistics', exc_info=True)
+
+
+def _get_version(user_id):
+    key = AUTH_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _local_get(user_id, version):
+    with _lock:
+        entry = _local.get(user_id)
+        if entry is None:
+            return None
+        entry_version, expires_at, data = entry
+        if entry_version != version or expires_at < time.monotonic():
+            del _local[user_id]
+            return None
+        _local.move_to_end(user_id)
+        return data
+
+
+def _local_set(user_id, version, data):
+    with _lock:
+        _local[user_id] = (version, time.monotonic() + get_ttl(), data)
+        _local.move_to_end(user_id)
+        while len(_local) > getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024):
+            _local.popitem(last=False)
+
+
+def get_cached_user(user_id, loader):
+    """
+    Return the user with the given id, calling loader(user_id) on a miss.
+    Every call returns a fresh instance, so callers may modify it. Falls back
+    to the loader when the shared cache is unavailable.
+    """
+    user_id = str(user_id)
+    try:
+        version = _get_version(user_id)
+    except Exception:
+        logger.warning('Auth user cache unavailable; loading user from the database', exc_info=True)
+        return loader(user_id)
+
+    data = _local_get(user_id, version)
+    if data is not None:
+        _count('local_hits')
+        return pickle.loads(data)
+
+    key = AUTH_USER_KEY.format(user_id=user_id, version=version)
+    try:
+        data = cache.get(key)
+    except Exception:
+        data = None
+    if data is not None:
+        _count('shared_hits')
+        _local_set(user_id, version, data)
+        return pickle.loads(data)
+
+    _count('misses')
+    user = loader(user_id)
+    data = pickle.dumps(user)
+    try:
+        cache.set(key, data, timeout=get_ttl())
+    except Exception:
+        logger.warning('Failed to store user in the auth cache', exc_info=True)
+    _local_set(user_id, version, data)
+    return user
+
+
+def invalidate_cached_user(user_id):
+    """Drop the cached user in every worker. Repeated after commit so no stale row is re-cached meanwhile."""
+    def bump():
+        try:
+            cache.set(AUTH_VERSION_KEY.format(user_id=user_id), uuid.uuid4().hex, timeout=None)
+        except Exception:
+            logger.warning(f'Failed to invalidate cached user {user_id}', exc_info=True)
+        with _lock:
+            _local.pop(user_id, None)
+
+    user_id = str(user_id)
+    bump()
+    transaction.on_commit(bump)
+
+
+def get_auth_cache_stats():
+    """Hit counters of all workers (as flushed so far) and the overall hit rate."""
+    values = cache.get_many([AUTH_STATS_KEY.format(field=field) for field in STATS_FIELDS])
+    stats = {field: values.get(AUTH_STATS_KEY.format(field=field), 0) for field in STATS_FIELDS}
+    total = sum(stats.values())
+    return {
+        'localHits': stats['local_hits'],
+        'sharedHits': stats['shared_hits'],
+        'misses': stats['misses'],
+        'lookups': total,
+        'hitRate': round((stats['local_hits'] + stats['shared_hits']) / total, 4) if total else 0.0,
+    }
+
+
+def invalidate_user_on_change(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+def connect_auth_cache_signals():
+    """Invalidate cached users whenever the user model is saved or deleted."""
+    from django.contrib.auth import get_user_model
+    from django.db.models.signals import post_save, post_delete
+
+    User = get_user_model()
+    post_save.connect(invalidate_user_on_change, sender=User, dispatch_uid='auth_cache_user_post_save')
+    post_delete.connect(invalidate_user_on_change, sender=User, dispatch_uid='auth_cache_user_post_delete')
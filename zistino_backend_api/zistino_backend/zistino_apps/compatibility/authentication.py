@@ -6,12 +6,15 @@ from rest_framework import authentication, exceptions
 from django.conf import settings
 import jwt
 from zistino_apps.authentication.models import User
+from zistino_apps.compatibility.auth_cache import get_cached_user
 
 
 class JWTAuthentication(authentication.BaseAuthentication):
     """
     Custom JWT authentication that validates tokens generated by the tokens endpoint.
     Extracts user ID from JWT payload and returns the user.
+    Users are resolved through the auth user cache (see auth_cache), with
+    their groups prefetched for role claim checks (see claims).
     """
     
     def authenticate(self, request):
@@ -49,7 +52,7 @@ class JWTAuthentication(authentication.BaseAuthentication):
             
             # Get user
             try:
-                user = User.objects.get(id=user_id)
+                user = get_cached_user(user_id, lambda pk: User.objects.prefetch_related('groups').get(id=pk))
             except User.DoesNotExist:
                 raise exceptions.AuthenticationFailed('User not found')
             
@@ -13,7 +13,7 @@ from drf_spectacular.types import OpenApiTypes
 from zistino_apps.compatibility.utils import create_success_response, create_error_response
 from zistino_apps.content.models import BlogPost, BlogCategory, BlogTag
 from zistino_apps.content.serializers import BlogPostSerializer
-from django.db.models import Q
+from zistino_apps.compatibility.search.utils import is_ranked, search_queryset
 from .serializers import (
     BlogPostCreateRequestSerializer,
     BlogPostCompatibilitySerializer,
@@ -573,14 +573,12 @@ class BlogPostsSearchView(APIView):
         
         # Apply keyword search
         if keyword and keyword.strip():
-            qs = qs.filter(
-                Q(title__icontains=keyword.strip()) |
-                Q(content__icontains=keyword.strip()) |
-                Q(excerpt__icontains=keyword.strip()) |
-                Q(author_name__icontains=keyword.strip())
-            )
+            qs = search_queryset(qs, keyword.strip())
         
-        # Apply ordering
+        # Apply ordering (keyword searches default to relevance)
+        default_ordering = ['-published_at', '-created_at']
+        if is_ranked(qs):
+            default_ordering.insert(0, '-search_rank')
         order_by = validated_data.get('orderBy', [])
         if order_by and any(order_by):  # If orderBy has non-empty values
             # Parse orderBy fields (e.g., "published_at", "-published_at" for descending)
@@ -608,10 +606,10 @@ class BlogPostsSearchView(APIView):
                 qs = qs.order_by(*order_fields)
             else:
                 # If no valid fields, use default ordering
-                qs = qs.order_by('-published_at', '-created_at')
+                qs = qs.order_by(*default_ordering)
         else:
             # Default ordering
-            qs = qs.order_by('-published_at', '-created_at')
+            qs = qs.order_by(*default_ordering)
         
         # Get total count
         total_count = qs.count()
@@ -746,14 +744,12 @@ class BlogPostsClientSearchView(APIView):
         
         # Apply keyword search
         if keyword and keyword.strip():
-            qs = qs.filter(
-                Q(title__icontains=keyword.strip()) |
-                Q(content__icontains=keyword.strip()) |
-                Q(excerpt__icontains=keyword.strip()) |
-                Q(author_name__icontains=keyword.strip())
-            )
+            qs = search_queryset(qs, keyword.strip())
         
-        # Apply ordering
+        # Apply ordering (keyword searches default to relevance)
+        default_ordering = ['-published_at', '-created_at']
+        if is_ranked(qs):
+            default_ordering.insert(0, '-search_rank')
         order_by = validated_data.get('orderBy', [])
         if order_by and any(order_by):  # If orderBy has non-empty values
             # Parse orderBy fields
@@ -779,10 +775,10 @@ class BlogPostsClientSearchView(APIView):
                 qs = qs.order_by(*order_fields)
             else:
                 # If no valid fields, use default ordering
-                qs = qs.order_by('-published_at', '-created_at')
+                qs = qs.order_by(*default_ordering)
         else:
             # Default ordering
-            qs = qs.order_by('-published_at', '-created_at')
+            qs = qs.order_by(*default_ordering)
         
         # Get total count
         total_count = qs.count()
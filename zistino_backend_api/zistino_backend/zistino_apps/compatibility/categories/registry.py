@@ -0,0 +1,139 @@
+"""
+Process-local registry of product categories and their old Swagger IDs.
+
+Old clients address categories by sequential integer IDs (11, 12, 13, ...
+over active categories ordered by created_at, name) or by the MD5-based
+integer hash of the UUID (legacyids SCHEME_FULL). The registry loads all
+categories once and keeps both directions of both mappings in dicts, so
+views and serializers resolve IDs with a dict lookup instead of reading and
+hashing the categories table per call.
+
+The registry is rebuilt lazily when a Category is saved or deleted: once the
+transaction commits, the signal bumps a version number in the shared cache
+so every worker process picks up the change on its next lookup.
+"""
+import copy
+import logging
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+
+from zistino_apps.compatibility.legacyids.utils import SCHEME_FULL, compute_legacy_id
+from .serializers import get_category_integer_id_mapping
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_REGISTRY_VERSION_KEY = 'compat:category_registry_version'
+SEQUENTIAL_BASE_ID = 11
+
+
+class CategoryRegistry:
+    """Immutable snapshot of categories and their legacy integer IDs."""
+
+    def __init__(self, categories):
+        """categories: all categories ordered by created_at, name."""
+        categories = list(categories)
+        self.categories = {str(category.id): category for category in categories}
+        # {category uuid: sequential id} over active categories; treat as read-only
+        self.sequential_ids = get_category_integer_id_mapping(
+            [category for category in categories if category.is_active],
+            base_id=SEQUENTIAL_BASE_ID,
+        )
+        self.by_sequential_id = {seq_id: uuid_str for uuid_str, seq_id in self.sequential_ids.items()}
+        self.by_hash = {compute_legacy_id(uuid_str, SCHEME_FULL): uuid_str for uuid_str in self.categories}
+
+    def get(self, category_id):
+        """Return a copy of the category with the given UUID, or None."""
+        category = self.categories.get(str(category_id))
+        return copy.copy(category) if category is not None else None
+
+    def get_sequential_id(self, category_id):
+        return self.sequential_ids.get(str(category_id))
+
+    def find_by_sequential_id(self, seq_id):
+        return self.get(self.by_sequential_id.get(seq_id))
+
+    def find_by_hash(self, hash_id):
+        return self.get(self.by_hash.get(hash_id))
+
+
+_lock = threading.Lock()
+_registry = None
+_registry_version = None
+
+
+def _current_version():
+    try:
+        return cache.get(CATEGORY_REGISTRY_VERSION_KEY, 0)
+    except Exception:
+        # Cache unavailable: keep serving the local snapshot
+        logger.warning('Category registry version check failed; using local snapshot', exc_info=True)
+        return _registry_version
+
+
+def build_category_registry():
+    """Load all categories from the database into a new CategoryRegistry."""
+    from zistino_apps.products.models import Category
+
+    return CategoryRegistry(Category.objects.order_by('created_at', 'name'))
+
+
+def get_category_registry():
+    """Return the process-local CategoryRegistry, rebuilding it if a Category changed."""
+    global _registry, _registry_version
+    version = _current_version()
+    if _registry is not None and version == _registry_version:
+        return _registry
+    with _lock:
+        if _registry is None or version != _registry_version:
+            _registry = build_category_registry()
+            _registry_version = version
+        return _registry
+
+
+def invalidate_category_registry():
+    """
+    Mark the category registry stale in every process (called on Category save/delete).
+    The version is bumped after commit, so no worker keeps a snapshot built
+    from uncommitted rows under the new version.
+    """
+    def bump():
+        global _registry
+        _registry = None
+        try:
+            if cache.add(CATEGORY_REGISTRY_VERSION_KEY, 1, timeout=None):
+                return
+            cache.incr(CATEGORY_REGISTRY_VERSION_KEY)
+        except Exception:
+            logger.warning('Failed to broadcast category registry invalidation', exc_info=True)
+
+    transaction.on_commit(bump)
+
+
+def get_category_id_mapping():
+    """{category uuid: sequential id} for active categories (serializer context 'category_id_mapping')."""
+    return get_category_registry().sequential_ids
+
+
+def find_category_by_sequential_id(seq_id):
+    """Find an active category by sequential integer ID (11, 12, 13...) from client endpoints."""
+    return get_category_registry().find_by_sequential_id(seq_id)
+
+
+def find_category_by_hash(hash_id):
+    """Find a category by the integer hash of its UUID (admin endpoints)."""
+    return get_category_registry().find_by_hash(hash_id)
+
+
+def invalidate_registry_on_change(sender, **kwargs):
+    invalidate_category_registry()
+
+
+def connect_category_registry_signals():
+    """Rebuild the registry in every worker when a category is created, edited or deleted."""
+    from django.db.models.signals import post_save, post_delete
+    from zistino_apps.products.models import Category
+
+    post_save.connect(invalidate_registry_on_change, sender=Category, dispatch_uid='category_registry_post_save')
+    post_delete.connect(invalidate_registry_on_change, sender=Category, dispatch_uid='category_registry_post_delete')
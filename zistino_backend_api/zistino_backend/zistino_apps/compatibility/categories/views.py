@@ -24,6 +24,7 @@ from .serializers import (
     CategoryCompatibilitySerializer,
     CategoryClientSerializer
 )
+from .registry import get_category_id_mapping, find_category_by_hash
 
 
 @extend_schema(tags=['Categories'])
@@ -71,16 +72,9 @@ class CategoryViewSet(viewsets.ModelViewSet):
             try:
                 integer_id = int(lookup_value)
                 # Find category whose UUID hash matches the integer ID
-                import hashlib
-                categories = Category.objects.all()
-                for category in categories:
-                    # Calculate hash the same way as serializer (using MD5 for deterministic results)
-                    uuid_str = str(category.id)
-                    hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                    hash_int = int(hash_obj.hexdigest(), 16)
-                    hash_id = hash_int % 2147483647
-                    if hash_id == integer_id:
-                        return category
+                category = find_category_by_hash(integer_id)
+                if category:
+                    return category
                 # If not found, raise DoesNotExist
                 from django.http import Http404
                 raise Http404(f'No Category matches the given query with ID: {lookup_value}')
@@ -563,17 +557,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         # Filter by ID if provided
         if category_id is not None:
             # Convert integer ID to UUID lookup (same logic as get_object)
-            import hashlib
-            categories = Category.objects.all()
-            matching_category = None
-            for cat in categories:
-                uuid_str = str(cat.id)
-                hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                hash_int = int(hash_obj.hexdigest(), 16)
-                hash_id = hash_int % 2147483647
-                if hash_id == category_id:
-                    matching_category = cat
-                    break
+            matching_category = find_category_by_hash(category_id)
             if matching_category:
                 qs = qs.filter(id=matching_category.id)
             else:
@@ -675,18 +659,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
                         integer_id = int(lookup_value)
                         # Find category whose UUID hash matches the integer ID
                         # Search all categories (including inactive) since old system might have different status
-                        import hashlib
-                        categories = Category.objects.all()
-                        category = None
-                        for cat in categories:
-                            uuid_str = str(cat.id)
-                            # Use MD5 hash for deterministic results (same as serializer)
-                            hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                            hash_int = int(hash_obj.hexdigest(), 16)
-                            hash_id = hash_int % 2147483647
-                            if hash_id == integer_id:
-                                category = cat
-                                break
+                        category = find_category_by_hash(integer_id)
                         if not category:
                             from django.http import Http404
                             raise Http404(f'No Category matches the given query with ID: {lookup_value}')
@@ -899,9 +872,7 @@ class CategoriesClientByTypeView(APIView):
         
         # Create UUID -> integer ID mapping for consistent sequential IDs (11, 12, 13, ...)
         # Use global mapping (all categories) to ensure consistent IDs across all types
-        from zistino_apps.compatibility.categories.serializers import get_category_integer_id_mapping
-        all_categories_global = Category.objects.filter(is_active=True).order_by('created_at', 'name')
-        global_category_id_mapping = get_category_integer_id_mapping(all_categories_global, base_id=11)
+        global_category_id_mapping = get_category_id_mapping()
         
         # Create per-type mapping for this response
         category_id_mapping = {str(cat.id): global_category_id_mapping.get(str(cat.id)) 
@@ -1113,17 +1084,7 @@ class CategoriesClientParentsView(APIView):
             try:
                 integer_id = int(Id)
                 # Find category whose UUID hash matches the integer ID
-                import hashlib
-                categories = Category.objects.all()
-                category = None
-                for cat in categories:
-                    uuid_str = str(cat.id)
-                    hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                    hash_int = int(hash_obj.hexdigest(), 16)
-                    hash_id = hash_int % 2147483647
-                    if hash_id == integer_id:
-                        category = cat
-                        break
+                category = find_category_by_hash(integer_id)
                 if not category:
                     return create_success_response(data=[])
             except (ValueError, TypeError):
@@ -0,0 +1,180 @@
+"""
+Compiled role claims for permission checks.
+
+Every claim value of the RoleClaim table gets a bit; every Role becomes the
+bitmask of its claims. A user's roles are the Django groups named after
+roles (see the users roles endpoint) plus the roles implied by the user
+flags, as in the JWT 'roles' claim: Admin (superuser), Manager (staff) and
+Driver. The claims of a role combination are compiled once per process into
+a bitmask and a frozenset, so a claim check is a dict lookup and a bit test.
+
+The compiled ClaimSet is process-local and rebuilt lazily when a Role or
+RoleClaim is saved or deleted: once the transaction commits, the signal
+bumps a version number in the shared cache so every worker picks up the
+change on its next check.
+Users resolved by JWT authentication carry their prefetched groups (see
+auth_cache), so checks on hot endpoints run without any query.
+"""
+import logging
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CLAIMS_VERSION_KEY = 'compat:claims_version'
+
+
+class ClaimSet:
+    """Immutable snapshot of role -> claim values, as bitmasks."""
+
+    def __init__(self, role_claims):
+        self.bits = {}
+        self.role_masks = {}
+        for role_name, claim_value in role_claims:
+            bit = self.bits.get(claim_value)
+            if bit is None:
+                bit = self.bits[claim_value] = 1 << len(self.bits)
+            key = role_name.lower()
+            self.role_masks[key] = self.role_masks.get(key, 0) | bit
+        self._claims_by_bit = {bit: claim for claim, bit in self.bits.items()}
+        self._compiled = {}
+
+    def compile(self, roles):
+        """Return (mask, frozenset of claim values) for a frozenset of lower-case role names."""
+        compiled = self._compiled.get(roles)
+        if compiled is None:
+            mask = 0
+            for role in roles:
+                mask |= self.role_masks.get(role, 0)
+            claims = frozenset(claim for bit, claim in self._claims_by_bit.items() if mask & bit)
+            compiled = self._compiled[roles] = (mask, claims)
+        return compiled
+
+    def has_claims(self, roles, claim_values):
+        """True if the roles together grant every one of claim_values."""
+        mask = self.compile(roles)[0]
+        for claim_value in claim_values:
+            bit = self.bits.get(claim_value)
+            if bit is None or not mask & bit:
+                return False
+        return True
+
+
+_lock = threading.Lock()
+_claim_set = None
+_claim_set_version = None
+
+
+def _current_version():
+    try:
+        return cache.get(CLAIMS_VERSION_KEY, 0)
+    except Exception:
+        # Cache unavailable: keep serving the local snapshot
+        logger.warning('Claims version check failed; using local snapshot', exc_info=True)
+        return _claim_set_version
+
+
+def build_claim_set():
+    """Load all role claims from the database into a new ClaimSet."""
+    from zistino_apps.compatibility.roleclaims.models import RoleClaim
+
+    return ClaimSet(RoleClaim.objects.values_list('role__name', 'claim_value').order_by('id'))
+
+
+def get_claim_set():
+    """Return the process-local ClaimSet, rebuilding it if a Role or RoleClaim changed."""
+    global _claim_set, _claim_set_version
+    version = _current_version()
+    if _claim_set is not None and version == _claim_set_version:
+        return _claim_set
+    with _lock:
+        if _claim_set is None or version != _claim_set_version:
+            _claim_set = build_claim_set()
+            _claim_set_version = version
+        return _claim_set
+
+
+def invalidate_claim_set():
+    """
+    Mark the compiled claims stale in every process (called on Role/RoleClaim save/delete).
+    The version is bumped after commit, so no worker keeps a snapshot built
+    from uncommitted rows under the new version.
+    """
+    def bump():
+        global _claim_set
+        _claim_set = None
+        try:
+            if cache.add(CLAIMS_VERSION_KEY, 1, timeout=None):
+                return
+            cache.incr(CLAIMS_VERSION_KEY)
+        except Exception:
+            logger.warning('Failed to broadcast claims invalidation', exc_info=True)
+
+    transaction.on_commit(bump)
+
+
+def get_user_roles(user):
+    """Lower-case role names of a user, memoized on the instance."""
+    roles = getattr(user, '_claim_roles', None)
+    if roles is None:
+        names = [group.name for group in user.groups.all()]
+        if user.is_superuser:
+            names.append('Admin')
+        if user.is_staff:
+            names.append('Manager')
+        if getattr(user, 'is_driver', False):
+            names.append('Driver')
+        roles = user._claim_roles = frozenset(name.lower() for name in names)
+    return roles
+
+
+def get_user_claims(user):
+    """Frozenset of the claim values granted to a user through their roles."""
+    if not user or not user.is_authenticated:
+        return frozenset()
+    return get_claim_set().compile(get_user_roles(user))[1]
+
+
+def user_has_claims(user, *claim_values):
+    """True if the user's roles grant all claim_values. Active superusers have every claim."""
+    if not user or not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    return get_claim_set().has_claims(get_user_roles(user), claim_values)
+
+
+def invalidate_claims_on_change(sender, **kwargs):
+    invalidate_claim_set()
+
+
+def invalidate_user_on_groups_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Reload users whose groups (roles) changed."""
+    from zistino_apps.compatibility.auth_cache import invalidate_cached_user
+
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_cached_user(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            invalidate_cached_user(user_id)
+
+
+def connect_claims_signals():
+    """Invalidate compiled claims on Role/RoleClaim changes and cached users on group changes."""
+    from django.contrib.auth import get_user_model
+    from django.db.models.signals import post_save, post_delete, m2m_changed
+    from zistino_apps.compatibility.roles.models import Role
+    from zistino_apps.compatibility.roleclaims.models import RoleClaim
+
+    for model in (Role, RoleClaim):
+        post_save.connect(invalidate_claims_on_change, sender=model, dispatch_uid=f'claims_post_save_{model._meta.label_lower}')
+        post_delete.connect(invalidate_claims_on_change, sender=model, dispatch_uid=f'claims_post_delete_{model._meta.label_lower}')
+    m2m_changed.connect(
+        invalidate_user_on_groups_change,
+        sender=get_user_model().groups.through,
+        dispatch_uid='claims_user_groups_changed',
+    )
@@ -16,6 +16,7 @@ from zistino_apps.orders.models import Order
 from zistino_apps.deliveries.serializers import DeliverySerializer, DeliverySearchRequestSerializer
 from zistino_apps.users.permissions import IsManager
 from zistino_apps.compatibility.utils import create_success_response, create_error_response
+from zistino_apps.compatibility.legacyids.utils import resolve_legacy_id, SCHEME_HEX
 from .serializers import (
     DriverDeliveryCreateRequestSerializer,
     DriverDeliveryUpdateRequestSerializer,
@@ -63,12 +64,12 @@ class DriverDeliveryViewSet(viewsets.ModelViewSet):
         except (Delivery.DoesNotExist, ValueError, TypeError):
             # If UUID parsing fails, try to find by integer hash
             # This is for backward compatibility with integer IDs
-            import hashlib
-            for delivery in Delivery.objects.all():
-                delivery_id_str = str(delivery.id).replace('-', '')
-                delivery_id_int = int(hashlib.md5(delivery_id_str.encode()).hexdigest()[:8], 16) % 100000000
-                if str(delivery_id_int) == str(pk):
-                    return delivery
+            try:
+                delivery = resolve_legacy_id(Delivery.objects.all(), pk, SCHEME_HEX)
+            except (ValueError, TypeError):
+                delivery = None
+            if delivery:
+                return delivery
             
             # If not found, raise DoesNotExist
             raise Delivery.DoesNotExist(f'Delivery with ID "{pk}" not found.')
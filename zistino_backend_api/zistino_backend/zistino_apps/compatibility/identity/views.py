@@ -1696,15 +1696,9 @@ class IdentitySendCodeView(APIView):
         
         # Send SMS using SMS service (Payamak BaseServiceNumber pattern)
         # Pattern 270325 expects only the OTP code, not the full message
-        from zistino_apps.payments.sms_service import send_sms
-        # Send only the code, Pattern will format it
-        sms_success, sms_error = send_sms(phone_number, code)
-        
-        if not sms_success:
-            # Log error but don't fail the request (code is still generated)
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send SMS to {phone_number}: {sms_error}")
+        from zistino_apps.payments.sms_outbox import enqueue_sms
+        # Send only the code, Pattern will format it (queued; sent by a Celery worker)
+        enqueue_sms(phone_number, code, purpose='otp', expires_at=expires_at)
         
         # Old Swagger format expects a token in messages array
         # We'll generate a token for compatibility, but the actual code is sent via SMS
@@ -0,0 +1 @@
+# Legacy integer ID mapping for old Swagger compatibility
@@ -0,0 +1,33 @@
+"""
+Models for legacy integer ID mapping.
+"""
+from django.db import models
+
+
+class LegacyIdMapping(models.Model):
+    """
+    Maps an old Swagger integer ID back to the UUID of the row it was derived from.
+
+    The integer IDs returned by the compatibility layer are MD5 hashes of the
+    row UUID. Storing them here lets views resolve an integer ID with a single
+    indexed query instead of hashing every row of the table.
+    """
+    id = models.BigAutoField(primary_key=True)
+    model_label = models.CharField(max_length=100, help_text='Lower-cased model label (e.g., orders.order)')
+    scheme = models.CharField(max_length=20, help_text='Hash scheme used to derive the integer ID')
+    legacy_id = models.BigIntegerField(help_text='Integer ID exposed to old Swagger clients')
+    object_id = models.UUIDField(help_text='UUID primary key of the mapped row')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = 'compatibility'
+        db_table = 'legacy_id_mappings'
+        verbose_name = 'Legacy ID Mapping'
+        verbose_name_plural = 'Legacy ID Mappings'
+        unique_together = ('model_label', 'scheme', 'object_id')
+        indexes = [
+            models.Index(fields=['model_label', 'scheme', 'legacy_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}[{self.scheme}] {self.legacy_id} -> {self.object_id}"
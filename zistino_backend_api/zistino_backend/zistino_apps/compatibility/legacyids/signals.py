@@ -0,0 +1,32 @@
+"""
+Signals that keep LegacyIdMapping in sync with the registered models.
+"""
+from django.db.models.signals import post_save, post_delete
+
+from .utils import get_legacy_models, sync_legacy_ids, delete_legacy_ids
+
+
+def store_legacy_ids_on_create(sender, instance, created, **kwargs):
+    """Store legacy integer IDs for newly created rows (UUIDs never change afterwards)."""
+    if created:
+        sync_legacy_ids(sender, [instance.pk])
+
+
+def remove_legacy_ids_on_delete(sender, instance, **kwargs):
+    """Drop legacy integer IDs of deleted rows."""
+    delete_legacy_ids(sender, [instance.pk])
+
+
+def connect_legacy_id_signals():
+    """Connect the mapping signals for every model in LEGACY_ID_MODELS."""
+    for model, _schemes in get_legacy_models():
+        post_save.connect(
+            store_legacy_ids_on_create,
+            sender=model,
+            dispatch_uid=f'legacy_ids_post_save_{model._meta.label_lower}',
+        )
+        post_delete.connect(
+            remove_legacy_ids_on_delete,
+            sender=model,
+            dispatch_uid=f'legacy_ids_post_delete_{model._meta.label_lower}',
+        )
@@ -0,0 +1,99 @@
+"""
+Utility functions for legacy integer ID lookups.
+
+Old Swagger clients address rows by integer IDs that are derived from the row
+UUID with one of three MD5-based schemes. The mapping for every registered
+model is kept in LegacyIdMapping so lookups never have to hash a whole table.
+"""
+import hashlib
+
+from django.apps import apps
+
+from .models import LegacyIdMapping
+
+# md5(str(uuid)) % 2**31-1 - used by order/category serializers
+SCHEME_FULL = 'full'
+# md5(str(uuid))[:8] % 10**9 - used by OrderAllSerializer and localizations
+SCHEME_SHORT = 'short'
+# md5(uuid.hex)[:8] % 10**8 - used by driverdelivery and transactionwallet
+SCHEME_HEX = 'hex'
+
+# Models that expose legacy integer IDs, and the schemes each one is addressed by
+LEGACY_ID_MODELS = {
+    'orders.Order': (SCHEME_FULL, SCHEME_SHORT),
+    'orders.OrderItem': (SCHEME_FULL,),
+    'products.Category': (SCHEME_FULL,),
+    'deliveries.Delivery': (SCHEME_HEX,),
+    'payments.Transaction': (SCHEME_HEX,),
+    'configurations.Localization': (SCHEME_SHORT,),
+}
+
+
+def compute_legacy_id(object_id, scheme):
+    """Return the integer ID that old Swagger clients use for the given UUID."""
+    if scheme == SCHEME_FULL:
+        return int(hashlib.md5(str(object_id).encode('utf-8')).hexdigest(), 16) % 2147483647
+    if scheme == SCHEME_SHORT:
+        return int(hashlib.md5(str(object_id).encode()).hexdigest()[:8], 16) % (10 ** 9)
+    if scheme == SCHEME_HEX:
+        return int(hashlib.md5(str(object_id).replace('-', '').encode()).hexdigest()[:8], 16) % 100000000
+    raise ValueError(f'Unknown legacy ID scheme: {scheme}')
+
+
+def get_legacy_schemes(model):
+    """Return the schemes registered for a model class (empty tuple if not registered)."""
+    return LEGACY_ID_MODELS.get(model._meta.label, ())
+
+
+def get_legacy_models():
+    """Return (model, schemes) pairs for every registered model."""
+    return [(apps.get_model(label), schemes) for label, schemes in LEGACY_ID_MODELS.items()]
+
+
+def sync_legacy_ids(model, object_ids):
+    """
+    Store legacy ID mappings for the given primary keys of a registered model.
+
+    Existing mappings are left untouched, so this is safe to call repeatedly
+    (e.g. after bulk_create, which does not send post_save).
+    """
+    schemes = get_legacy_schemes(model)
+    if not schemes:
+        return 0
+    model_label = model._meta.label_lower
+    mappings = [
+        LegacyIdMapping(
+            model_label=model_label,
+            scheme=scheme,
+            legacy_id=compute_legacy_id(object_id, scheme),
+            object_id=object_id,
+        )
+        for object_id in object_ids
+        for scheme in schemes
+    ]
+    LegacyIdMapping.objects.bulk_create(mappings, ignore_conflicts=True)
+    return len(mappings)
+
+
+def delete_legacy_ids(model, object_ids):
+    """Remove legacy ID mappings for deleted rows."""
+    LegacyIdMapping.objects.filter(
+        model_label=model._meta.label_lower,
+        object_id__in=list(object_ids),
+    ).delete()
+
+
+def resolve_legacy_id(queryset, legacy_id, scheme):
+    """
+    Return the object in ``queryset`` addressed by an old Swagger integer ID, or None.
+
+    Resolution is a single query joining the queryset against the indexed
+    mapping table. Raises ValueError/TypeError if ``legacy_id`` is not an integer.
+    """
+    legacy_id = int(legacy_id)
+    object_ids = LegacyIdMapping.objects.filter(
+        model_label=queryset.model._meta.label_lower,
+        scheme=scheme,
+        legacy_id=legacy_id,
+    ).values('object_id')
+    return queryset.filter(pk__in=object_ids).first()
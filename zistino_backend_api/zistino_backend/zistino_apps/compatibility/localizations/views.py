@@ -15,6 +15,7 @@ from django.db.models import Q, Count
 from zistino_apps.users.permissions import IsManager
 
 from zistino_apps.compatibility.utils import create_success_response, create_error_response
+from zistino_apps.compatibility.legacyids.utils import resolve_legacy_id, SCHEME_SHORT
 from .models import Localization
 from .serializers import (
     LocalizationSerializer,
@@ -69,11 +70,10 @@ class LocalizationViewSet(viewsets.ModelViewSet):
             # If not UUID, try as integer (hash-based lookup)
             try:
                 lookup_int = int(id_value)
-                # Find localization by converting UUIDs to integers and matching
-                for loc in Localization.objects.all():
-                    loc_id_hash = int(hashlib.md5(str(loc.id).encode()).hexdigest()[:8], 16) % (10 ** 9)
-                    if loc_id_hash == lookup_int:
-                        return loc
+                # Find localization through the legacy ID mapping
+                loc = resolve_legacy_id(Localization.objects.all(), lookup_int, SCHEME_SHORT)
+                if loc:
+                    return loc
                 raise Http404('No Localization matches the given query.')
             except (ValueError, TypeError):
                 raise Http404('Invalid ID format.')
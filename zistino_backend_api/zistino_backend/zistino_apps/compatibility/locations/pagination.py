@@ -0,0 +1,97 @@
+"""
+Keyset pagination and NDJSON streaming for location listings.
+
+Locations are listed newest first on (created_at, id). A page ends with an
+opaque cursor encoding the last (created_at, id); the next page starts
+strictly after it, so paging costs the same at any depth and never skips or
+repeats rows while new samples arrive.
+"""
+import base64
+import json
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+STREAM_CHUNK_SIZE = 2000
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def encode_cursor(location):
+    raw = f"{location.created_at.isoformat()}|{location.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) for a cursor. Raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, location_id = base64.urlsafe_b64decode(padded.encode()).decode().rsplit('|', 1)
+        parsed = parse_datetime(created_at)
+        location_id = int(location_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if parsed is None:
+        raise ValueError('Invalid cursor')
+    return parsed, location_id
+
+
+def get_listing_params(request):
+    """
+    Read keyset/stream options from the query string.
+
+    Returns (mode, page_size, before) where mode is 'stream', 'page' or None
+    (legacy full list). Raises ValueError with a client-facing message.
+    """
+    params = request.query_params
+    stream = params.get('stream', '').lower() in ('1', 'true')
+
+    before = decode_cursor(params['cursor']) if params.get('cursor') else None
+
+    page_size = None
+    if params.get('pageSize'):
+        try:
+            page_size = int(params['pageSize'])
+        except ValueError:
+            raise ValueError('pageSize must be an integer.')
+        if page_size < 1:
+            raise ValueError('pageSize must be a positive integer.')
+        page_size = min(page_size, MAX_PAGE_SIZE)
+
+    if stream:
+        return 'stream', page_size, before
+    if page_size or before:
+        return 'page', page_size or DEFAULT_PAGE_SIZE, before
+    return None, None, None
+
+
+def paginate(locations, page_size, serialize):
+    """
+    Take one page from an iterable of locations ordered newest first
+    (pass a sliced queryset or an iterator, never a whole queryset).
+
+    Returns (items, pagination) where pagination holds pageSize,
+    hasNextPage and nextCursor for the response envelope.
+    """
+    page = list(islice(locations, page_size + 1))
+    has_next = len(page) > page_size
+    page = page[:page_size]
+    return [serialize(location) for location in page], {
+        'pageSize': page_size,
+        'hasNextPage': has_next,
+        'nextCursor': encode_cursor(page[-1]) if has_next else None,
+    }
+
+
+def stream_ndjson(locations, serialize, limit=None):
+    """Stream locations as NDJSON (one JSON object per line) with constant memory."""
+    if limit:
+        locations = islice(locations, limit)
+
+    def lines():
+        for location in locations:
+            yield json.dumps(serialize(location), ensure_ascii=False) + '\n'
+
+    return StreamingHttpResponse(lines(), content_type=NDJSON_CONTENT_TYPE)
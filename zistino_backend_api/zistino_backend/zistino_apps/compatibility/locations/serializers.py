@@ -57,6 +57,29 @@ class LocationSearchRequestSerializer(serializers.Serializer):
     tripId = serializers.IntegerField(required=False, allow_null=True, help_text='Filter by trip ID')
 
 
+class LocationBatchSampleSerializer(serializers.Serializer):
+    """One GPS sample of a batch upload (documentation only; samples are validated in bulk)."""
+    latitude = serializers.DecimalField(max_digits=9, decimal_places=6)
+    longitude = serializers.DecimalField(max_digits=9, decimal_places=6)
+    speed = serializers.IntegerField(required=False, default=0)
+    heading = serializers.CharField(required=False, allow_blank=True, allow_null=True, max_length=50)
+    altitude = serializers.DecimalField(required=False, default=0, max_digits=9, decimal_places=2)
+    satellites = serializers.IntegerField(required=False, default=0)
+    hdop = serializers.IntegerField(required=False, default=0)
+    gsmSignal = serializers.IntegerField(required=False, default=0, help_text='GSM signal strength')
+    odometer = serializers.IntegerField(required=False, default=0)
+    timestamp = serializers.CharField(
+        required=False,
+        help_text='Device time of the sample (ISO 8601 or epoch milliseconds). Used to drop duplicate uploads.'
+    )
+
+
+class LocationBatchRequestSerializer(serializers.Serializer):
+    """Request serializer for batch location upload."""
+    tripId = serializers.IntegerField(help_text='Trip ID')
+    locations = LocationBatchSampleSerializer(many=True)
+
+
 class LocationResponseSerializer(serializers.Serializer):
     """Response serializer for location matching old Swagger format."""
     id = serializers.IntegerField()
@@ -12,6 +12,7 @@ router.register(r'', views.LocationsViewSet, basename='locations')
 urlpatterns = [
     # Custom endpoints (must come before router URLs to avoid conflicts)
     path('all', views.LocationsAllView.as_view(), name='locations-all'),
+    path('batch', views.LocationsBatchView.as_view(), name='locations-batch'),
     path('job-id/<str:jobid>', views.LocationsGetByJobIdView.as_view(), name='locations-get-by-job-id'),
     
     # Router URLs (handles: GET/POST /api/v1/locations, GET/PUT/DELETE /api/v1/locations/{id})
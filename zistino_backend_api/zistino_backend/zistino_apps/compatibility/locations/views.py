@@ -7,7 +7,8 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.views import APIView
-from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
+from rest_framework.parsers import JSONParser
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse, OpenApiParameter
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.contrib.auth import get_user_model
@@ -15,11 +16,31 @@ import uuid
 
 from zistino_apps.users.permissions import IsManager
 from zistino_apps.compatibility.utils import create_success_response, create_error_response
-from zistino_apps.deliveries.models import Delivery, Trip
+from zistino_apps.compatibility.legacyids.utils import resolve_legacy_id, SCHEME_HEX
+from zistino_apps.deliveries.models import Delivery, Trip, TripTrack
+from zistino_apps.deliveries.ingest import extract_batch_payload, ingest_location_batch, get_max_batch_size
+from zistino_apps.deliveries.parsers import NDJSONParser
+from zistino_apps.deliveries.tracks import (
+    LocationHistory,
+    get_track_point,
+    get_trip_points,
+    iter_points_by_trip,
+    iter_points_desc,
+    iter_trip_points_desc,
+)
+from zistino_apps.deliveries.routes import PackedRoute, ROUTE_FORMATS, ROUTE_FORMAT_POINTS
 from .models import LocationUpdate
+from .pagination import (
+    MAX_PAGE_SIZE,
+    STREAM_CHUNK_SIZE,
+    get_listing_params,
+    paginate,
+    stream_ndjson,
+)
 from .serializers import (
     LocationCreateUpdateRequestSerializer,
     LocationSearchRequestSerializer,
+    LocationBatchRequestSerializer,
 )
 
 User = get_user_model()
@@ -44,6 +65,15 @@ def location_to_old_swagger_format(location):
     }
 
 
+def compacted_location_response(pk):
+    """Error for writes to a sample that was packed into a TripTrack and is read-only."""
+    return create_error_response(
+        error_message=f'Location with ID "{pk}" belongs to a compacted trip track and cannot be modified.',
+        status_code=status.HTTP_409_CONFLICT,
+        errors={'id': [f'Location with ID "{pk}" belongs to a compacted trip track and cannot be modified.']}
+    )
+
+
 @extend_schema(tags=['Locations'])
 class LocationsViewSet(viewsets.ViewSet):
     """
@@ -200,6 +230,9 @@ class LocationsViewSet(viewsets.ViewSet):
             try:
                 location = LocationUpdate.objects.get(id=pk)
             except (ValueError, LocationUpdate.DoesNotExist):
+                # Samples of compacted trips only live in their TripTrack
+                location = get_track_point(int(pk)) if str(pk).isdigit() else None
+            if location is None:
                 return create_error_response(
                     error_message=f'Location with ID "{pk}" not found.',
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -272,6 +305,8 @@ class LocationsViewSet(viewsets.ViewSet):
             try:
                 location = LocationUpdate.objects.get(id=pk)
             except (ValueError, LocationUpdate.DoesNotExist):
+                if str(pk).isdigit() and get_track_point(int(pk)) is not None:
+                    return compacted_location_response(pk)
                 return create_error_response(
                     error_message=f'Location with ID "{pk}" not found.',
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -362,6 +397,8 @@ class LocationsViewSet(viewsets.ViewSet):
             try:
                 location = LocationUpdate.objects.get(id=pk)
             except (ValueError, LocationUpdate.DoesNotExist):
+                if str(pk).isdigit() and get_track_point(int(pk)) is not None:
+                    return compacted_location_response(pk)
                 return create_error_response(
                     error_message=f'Location with ID "{pk}" not found.',
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -441,8 +478,9 @@ class LocationsViewSet(viewsets.ViewSet):
             
             validated_data = serializer.validated_data
             
-            # Start with all locations
+            # Start with all locations; compacted trips are searched in their TripTrack
             qs = LocationUpdate.objects.all().select_related('user', 'trip')
+            tracks = TripTrack.objects.all()
             
             # Filter by userId if provided
             user_id = validated_data.get('userId')
@@ -450,6 +488,7 @@ class LocationsViewSet(viewsets.ViewSet):
                 try:
                     user = User.objects.get(id=user_id)
                     qs = qs.filter(user=user)
+                    tracks = tracks.filter(user=user)
                 except User.DoesNotExist:
                     return create_error_response(
                         error_message=f'User with ID "{user_id}" not found.',
@@ -461,10 +500,13 @@ class LocationsViewSet(viewsets.ViewSet):
             trip_id = validated_data.get('tripId')
             if trip_id is not None:
                 qs = qs.filter(trip_id=trip_id)
+                tracks = tracks.filter(trip_id=trip_id)
             
             # Apply keyword search
+            keywords = []
             keyword = validated_data.get('keyword', '')
             if keyword:
+                keywords.append(keyword.lower())
                 qs = qs.filter(
                     Q(heading__icontains=keyword)
                 )
@@ -473,14 +515,19 @@ class LocationsViewSet(viewsets.ViewSet):
             advanced_search = validated_data.get('advancedSearch')
             if advanced_search and advanced_search.get('keyword'):
                 adv_keyword = advanced_search['keyword']
+                keywords.append(adv_keyword.lower())
                 qs = qs.filter(
                     Q(heading__icontains=adv_keyword)
                 )
             
+            def matches_keywords(point):
+                heading = (point.heading or '').lower()
+                return all(word in heading for word in keywords)
+            
             # Apply ordering
+            order_fields = []
             order_by = validated_data.get('orderBy', [])
             if order_by:
-                order_fields = []
                 for field in order_by:
                     if field:
                         # Map camelCase to snake_case
@@ -498,9 +545,6 @@ class LocationsViewSet(viewsets.ViewSet):
             else:
                 qs = qs.order_by('-created_at')
             
-            # Get total count
-            total_count = qs.count()
-            
             # Handle pagination (pageNumber: 0 defaults to 1, pageSize: 0 defaults to 1)
             page_number = validated_data.get('pageNumber', 0)
             page_size = validated_data.get('pageSize', 0)
@@ -513,7 +557,22 @@ class LocationsViewSet(viewsets.ViewSet):
             # Apply pagination
             start = (page_number - 1) * page_size
             end = start + page_size
-            locations = qs[start:end]
+            if not tracks.exists():
+                total_count = qs.count()
+                locations = qs[start:end]
+            else:
+                history = LocationHistory(qs, tracks, match=matches_keywords if keywords else None)
+                if order_fields:
+                    # Custom orderings are sorted in memory, nulls last like PostgreSQL
+                    sort_attrs = [{'user': 'user_id', 'trip': 'trip_id'}.get(field, field) for field in order_fields]
+                    matched = sorted(history, key=lambda point: tuple(
+                        (getattr(point, attr) is None, getattr(point, attr)) for attr in sort_attrs
+                    ))
+                    total_count = len(matched)
+                    locations = matched[start:end]
+                else:
+                    total_count = history.count()
+                    locations = history[start:end]
             
             # Convert to old Swagger format
             locations_data = [location_to_old_swagger_format(loc) for loc in locations]
@@ -551,7 +610,14 @@ class LocationsViewSet(viewsets.ViewSet):
     summary='Get locations by job ID',
     description='Get all locations associated with a specific job ID (delivery ID) matching old Swagger format. '
                 'To get delivery IDs, use GET /api/v1/driverdelivery/ or POST /api/v1/driverdelivery/search. '
-                'The delivery "id" field is what you use as the "jobid" parameter here.',
+                'The delivery "id" field is what you use as the "jobid" parameter here. '
+                'Pass pageSize (and the returned nextCursor as cursor) for keyset pagination, '
+                'or stream=true to stream locations as NDJSON.',
+    parameters=[
+        OpenApiParameter('pageSize', int, location=OpenApiParameter.QUERY, description=f'Page size for keyset pagination (max {MAX_PAGE_SIZE})'),
+        OpenApiParameter('cursor', str, location=OpenApiParameter.QUERY, description='nextCursor of the previous page'),
+        OpenApiParameter('stream', bool, location=OpenApiParameter.QUERY, description='Stream all (remaining) locations as NDJSON'),
+    ],
     responses={
         200: OpenApiResponse(
             response=dict,
@@ -591,16 +657,11 @@ class LocationsGetByJobIdView(APIView):
             try:
                 delivery = Delivery.objects.get(id=jobid)
             except (ValueError, Delivery.DoesNotExist):
-                # Try to find by integer hash
-                import hashlib
-                deliveries = Delivery.objects.all()
-                delivery = None
-                for d in deliveries:
-                    delivery_id_str = str(d.id).replace('-', '')
-                    delivery_id_int = int(hashlib.md5(delivery_id_str.encode()).hexdigest()[:8], 16) % 100000000
-                    if str(delivery_id_int) == str(jobid):
-                        delivery = d
-                        break
+                # Try to find by integer hash through the legacy ID mapping
+                try:
+                    delivery = resolve_legacy_id(Delivery.objects.all(), jobid, SCHEME_HEX)
+                except (ValueError, TypeError):
+                    delivery = None
                 
                 if not delivery:
                     return create_error_response(
@@ -613,7 +674,30 @@ class LocationsGetByJobIdView(APIView):
             driver = delivery.driver
             # Get all trips for this driver, then get locations for those trips
             trips = Trip.objects.filter(user=driver)
-            locations = LocationUpdate.objects.filter(trip__in=trips).select_related('user', 'trip').order_by('-created_at')
+
+            try:
+                mode, page_size, before = get_listing_params(request)
+            except ValueError as e:
+                return create_error_response(
+                    error_message=str(e),
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    errors={'error': [str(e)]}
+                )
+            if mode:
+                # Newest first, merged lazily from raw rows and compacted tracks
+                locations = iter_trip_points_desc(trips, before=before, chunk_size=STREAM_CHUNK_SIZE)
+                if mode == 'stream':
+                    return stream_ndjson(locations, location_to_old_swagger_format, limit=page_size)
+                locations_data, pagination = paginate(locations, page_size, location_to_old_swagger_format)
+                return create_success_response(data=locations_data, messages=[], pagination=pagination)
+
+            # Includes samples of compacted trips, decoded from their TripTrack
+            trip_points = get_trip_points(trips)
+            locations = sorted(
+                (point for points in trip_points.values() for point in points),
+                key=lambda point: (point.created_at, point.id),
+                reverse=True,
+            )
             
             # Convert to old Swagger format
             locations_data = [location_to_old_swagger_format(loc) for loc in locations]
@@ -631,7 +715,21 @@ class LocationsGetByJobIdView(APIView):
     tags=['Locations'],
     operation_id='locations_all',
     summary='Get all locations',
-    description='Get all locations matching old Swagger format.',
+    description=(
+        'Get all locations matching old Swagger format. '
+        'With routeFormat=polyline or routeFormat=arrays the locations are grouped per trip and each route is returned '
+        'as a Google encoded polyline (routePolyline + routeTimestamps) or as parallel arrays (route), '
+        'optionally simplified with Douglas-Peucker to `tolerance` meters. '
+        'Pass pageSize (and the returned nextCursor as cursor) for keyset pagination, '
+        'or stream=true to stream locations as NDJSON.'
+    ),
+    parameters=[
+        OpenApiParameter('pageSize', int, location=OpenApiParameter.QUERY, description=f'Page size for keyset pagination (max {MAX_PAGE_SIZE})'),
+        OpenApiParameter('cursor', str, location=OpenApiParameter.QUERY, description='nextCursor of the previous page'),
+        OpenApiParameter('stream', bool, location=OpenApiParameter.QUERY, description='Stream all (remaining) locations as NDJSON'),
+        OpenApiParameter('routeFormat', str, location=OpenApiParameter.QUERY, enum=list(ROUTE_FORMATS), description='Response format (default: points, the old Swagger list)'),
+        OpenApiParameter('tolerance', float, location=OpenApiParameter.QUERY, description='Simplification tolerance in meters for polyline/arrays formats (default 0 = full route)'),
+    ],
     responses={
         200: OpenApiResponse(
             response=dict,
@@ -671,8 +769,57 @@ class LocationsAllView(APIView):
 
     def get(self, request):
         """Get all locations matching old Swagger format."""
+        route_format = request.query_params.get('routeFormat') or ROUTE_FORMAT_POINTS
+        if route_format not in ROUTE_FORMATS:
+            return create_error_response(
+                error_message=f'routeFormat must be one of: {", ".join(ROUTE_FORMATS)}',
+                status_code=status.HTTP_400_BAD_REQUEST,
+                errors={'routeFormat': [f'routeFormat must be one of: {", ".join(ROUTE_FORMATS)}']}
+            )
+        try:
+            tolerance = float(request.query_params.get('tolerance') or 0)
+            if tolerance < 0:
+                raise ValueError
+        except ValueError:
+            return create_error_response(
+                error_message='tolerance must be a non-negative number of meters.',
+                status_code=status.HTTP_400_BAD_REQUEST,
+                errors={'tolerance': ['tolerance must be a non-negative number of meters.']}
+            )
+
         try:
-            locations = LocationUpdate.objects.all().select_related('user', 'trip').order_by('-created_at')
+            if route_format != ROUTE_FORMAT_POINTS:
+                # One compact route per trip instead of one dict per point
+                rows = LocationUpdate.objects.only(
+                    'trip_id', 'user_id', 'latitude', 'longitude', 'speed', 'created_at'
+                )
+                routes_data = []
+                for trip_id, trip_points in iter_points_by_trip(rows, TripTrack.objects.all()):
+                    route_data = {'tripId': trip_id, 'userId': str(trip_points[0].user_id)}
+                    route_data.update(PackedRoute(trip_points).serialize(route_format, tolerance))
+                    routes_data.append(route_data)
+                return create_success_response(data=routes_data, messages=[])
+
+            try:
+                mode, page_size, before = get_listing_params(request)
+            except ValueError as e:
+                return create_error_response(
+                    error_message=str(e),
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    errors={'error': [str(e)]}
+                )
+            # Raw rows merged with the samples of compacted trips, newest first
+            if mode:
+                chunk_size = STREAM_CHUNK_SIZE if mode == 'stream' else page_size + 1
+                locations = iter_points_desc(
+                    LocationUpdate.objects.all(), TripTrack.objects.all(), before=before, chunk_size=chunk_size
+                )
+                if mode == 'stream':
+                    return stream_ndjson(locations, location_to_old_swagger_format, limit=page_size)
+                locations_data, pagination = paginate(locations, page_size, location_to_old_swagger_format)
+                return create_success_response(data=locations_data, messages=[], pagination=pagination)
+
+            locations = iter_points_desc(LocationUpdate.objects.all(), TripTrack.objects.all())
             
             # Convert to old Swagger format
             locations_data = [location_to_old_swagger_format(loc) for loc in locations]
@@ -685,3 +832,84 @@ class LocationsAllView(APIView):
                 errors={'error': [str(e)]}
             )
 
+
+
+@extend_schema(
+    tags=['Locations'],
+    operation_id='locations_batch',
+    summary='Upload a batch of locations',
+    description=(
+        'Upload many GPS samples of one trip in a single request. '
+        'Accepts JSON {"tripId", "locations": [...]} or NDJSON (application/x-ndjson, one sample per line) '
+        'with tripId in the query string. Samples with a timestamp are stored once per trip, '
+        'so re-sending a batch after a network failure is safe. Invalid samples are reported by index '
+        'and do not reject the rest of the batch.'
+    ),
+    request=LocationBatchRequestSerializer,
+    examples=[
+        OpenApiExample(
+            'Batch upload',
+            value={
+                'tripId': 42,
+                'locations': [
+                    {'latitude': 36.312794, 'longitude': 59.590782, 'speed': 12, 'heading': '110',
+                     'altitude': 995.7, 'timestamp': '2024-03-13T07:23:45Z'},
+                    {'latitude': 36.312901, 'longitude': 59.590911, 'speed': 14, 'heading': '112',
+                     'altitude': 995.9, 'timestamp': 1710314630000},
+                ]
+            },
+            request_only=True
+        )
+    ],
+    responses={
+        200: OpenApiResponse(
+            response=dict,
+            description='Batch stored',
+            examples=[
+                OpenApiExample(
+                    'Success Response',
+                    value={
+                        "data": {"received": 2, "inserted": 2, "duplicates": 0, "rejected": 0, "errors": {}},
+                        "messages": [],
+                        "succeeded": True
+                    }
+                )
+            ]
+        )
+    }
+)
+class LocationsBatchView(APIView):
+    """POST /api/v1/locations/batch"""
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request):
+        """Store a batch of location samples for one trip."""
+        trip_id, samples = extract_batch_payload(request.data, request.query_params)
+        if not isinstance(samples, list) or not samples:
+            return create_error_response(
+                error_message='locations must be a non-empty list.',
+                status_code=status.HTTP_400_BAD_REQUEST,
+                errors={'locations': ['locations must be a non-empty list.']}
+            )
+        max_size = get_max_batch_size()
+        if len(samples) > max_size:
+            return create_error_response(
+                error_message=f'A batch may contain at most {max_size} locations.',
+                status_code=status.HTTP_400_BAD_REQUEST,
+                errors={'locations': [f'A batch may contain at most {max_size} locations.']}
+            )
+
+        # Drivers may only upload to their own trips; managers to any trip
+        trips = Trip.objects.all() if request.user.is_staff else Trip.objects.filter(user=request.user)
+        try:
+            trip = trips.get(id=int(trip_id))
+        except (TypeError, ValueError, Trip.DoesNotExist):
+            return create_error_response(
+                error_message=f'Trip with ID "{trip_id}" not found.',
+                status_code=status.HTTP_404_NOT_FOUND,
+                errors={'tripId': [f'Trip with ID "{trip_id}" not found.']}
+            )
+
+        result = ingest_location_batch(trip, trip.user, samples)
+        return create_success_response(data=result, messages=[])
@@ -0,0 +1,71 @@
+"""
+Django management command to backfill the legacy integer ID mapping table.
+
+New rows are mapped automatically on save, and migration 0019 maps the rows
+that existed when the mapping table was added; run this whenever rows were
+created with bulk_create/raw SQL.
+
+Usage:
+    python manage.py backfill_legacy_ids
+    python manage.py backfill_legacy_ids --model orders.Order
+    python manage.py backfill_legacy_ids --batch-size 5000
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from zistino_apps.compatibility.legacyids.models import LegacyIdMapping
+from zistino_apps.compatibility.legacyids.utils import LEGACY_ID_MODELS, get_legacy_models, sync_legacy_ids
+
+
+class Command(BaseCommand):
+    help = 'Backfill legacy integer ID mappings for old Swagger compatibility'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            type=str,
+            help='Only backfill one model label (e.g., orders.Order)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of rows hashed and inserted per batch',
+        )
+
+    def handle(self, *args, **options):
+        model_label = options.get('model')
+        batch_size = options.get('batch_size') or 2000
+
+        if model_label and model_label not in LEGACY_ID_MODELS:
+            raise CommandError(
+                f'Unknown model "{model_label}". Choose from: {", ".join(LEGACY_ID_MODELS)}'
+            )
+
+        for model, schemes in get_legacy_models():
+            if model_label and model._meta.label != model_label:
+                continue
+
+            # Only hash rows that are missing a mapping for at least one scheme
+            missing = Q()
+            for scheme in schemes:
+                missing |= ~Q(pk__in=LegacyIdMapping.objects.filter(
+                    model_label=model._meta.label_lower,
+                    scheme=scheme,
+                ).values('object_id'))
+            pending = model.objects.filter(missing).values_list('pk', flat=True)
+
+            self.stdout.write(f'Backfilling {model._meta.label} ({", ".join(schemes)})...')
+            created = 0
+            batch = []
+            for object_id in pending.iterator(chunk_size=batch_size):
+                batch.append(object_id)
+                if len(batch) >= batch_size:
+                    created += sync_legacy_ids(model, batch)
+                    batch = []
+            if batch:
+                created += sync_legacy_ids(model, batch)
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.label}: processed {created} mapping(s)'
+            ))
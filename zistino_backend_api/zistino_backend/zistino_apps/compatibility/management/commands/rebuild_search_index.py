@@ -0,0 +1,72 @@
+"""
+Django management command to rebuild the full-text search index.
+
+Saved and deleted rows are indexed automatically, and migration 0018 indexes
+the rows that existed when search was deployed; run this after changing the
+normalization rules and whenever rows were written with bulk_create/update()/
+raw SQL.
+
+Usage:
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --model products.Product
+    python manage.py rebuild_search_index --clear --batch-size 1000
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from zistino_apps.compatibility.search.backends import get_search_backend
+from zistino_apps.compatibility.search.documents import SEARCH_MODELS, get_search_models
+from zistino_apps.compatibility.search.utils import index_instances
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of products and blog posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            type=str,
+            help='Only rebuild one model label (e.g., products.Product)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of rows indexed per batch',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete the existing documents first (drops entries of rows deleted without signals)',
+        )
+
+    def handle(self, *args, **options):
+        model_label = options.get('model')
+        batch_size = options.get('batch_size') or 500
+
+        if model_label and model_label not in SEARCH_MODELS:
+            raise CommandError(
+                f'Unknown model "{model_label}". Choose from: {", ".join(SEARCH_MODELS)}'
+            )
+
+        backend = get_search_backend()
+        for model, _builder, select_related in get_search_models():
+            if model_label and model._meta.label != model_label:
+                continue
+
+            self.stdout.write(f'Indexing {model._meta.label}...')
+            if options.get('clear'):
+                backend.clear(model._meta.label_lower)
+
+            indexed = 0
+            batch = []
+            for instance in model.objects.select_related(*select_related).order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(instance)
+                if len(batch) >= batch_size:
+                    indexed += index_instances(model, batch)
+                    batch = []
+            if batch:
+                indexed += index_instances(model, batch)
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.label}: indexed {indexed} document(s)'
+            ))
@@ -55,7 +55,7 @@ class MapZoneUserInZoneRequestSerializer(serializers.Serializer):
 class MapZoneCreateSerializer(serializers.Serializer):
     """Request serializer for creating a zone matching old Swagger format."""
     zone = serializers.CharField(required=True, help_text='Zone name')
-    zonepath = serializers.CharField(required=False, allow_blank=True, default='', help_text='Zone path')
+    zonepath = serializers.CharField(required=False, allow_blank=True, default='', help_text='Zone path. A polygon ("lat,lng;lat,lng;..." or JSON list of [lat, lng] pairs) is used for zone matching.')
     description = serializers.CharField(required=False, allow_blank=True, default='', help_text='Zone description')
     address = serializers.CharField(required=False, allow_blank=True, default='', help_text='Zone address')
     
@@ -0,0 +1,31 @@
+# Generated manually for legacy integer ID mapping table
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compatibility', '0014_add_is_archived_to_repairrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LegacyIdMapping',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model_label', models.CharField(help_text='Lower-cased model label (e.g., orders.order)', max_length=100)),
+                ('scheme', models.CharField(help_text='Hash scheme used to derive the integer ID', max_length=20)),
+                ('legacy_id', models.BigIntegerField(help_text='Integer ID exposed to old Swagger clients')),
+                ('object_id', models.UUIDField(help_text='UUID primary key of the mapped row')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Legacy ID Mapping',
+                'verbose_name_plural': 'Legacy ID Mappings',
+                'db_table': 'legacy_id_mappings',
+                'unique_together': {('model_label', 'scheme', 'object_id')},
+                'indexes': [models.Index(fields=['model_label', 'scheme', 'legacy_id'], name='legacy_id_m_model_l_039c81_idx')],
+            },
+        ),
+    ]
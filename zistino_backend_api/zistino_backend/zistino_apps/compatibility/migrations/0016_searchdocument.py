@@ -0,0 +1,35 @@
+# Generated manually for the full-text search documents table
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compatibility', '0015_legacyidmapping'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model_label', models.CharField(help_text='Lower-cased model label (e.g., products.product)', max_length=100)),
+                ('object_id', models.CharField(help_text='Primary key of the indexed row, as a string', max_length=64)),
+                ('title', models.TextField(blank=True, help_text='Normalized terms of the title (weight A)')),
+                ('body', models.TextField(blank=True, help_text='Normalized terms of the body (weight B)')),
+                ('keywords', models.TextField(blank=True, help_text='Normalized terms of related names (weight C)')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'db_table': 'search_documents',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='search_docs_vector_gin')],
+                'unique_together': {('model_label', 'object_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,121 @@
+# Generated manually to index existing products and blog posts
+
+import re
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+# Snapshot of compatibility.search.normalization at the time of this migration
+ZWNJ = '\u200c'
+
+CHARACTER_MAP = str.maketrans({
+    'ي': 'ی',  # Arabic Yeh
+    'ى': 'ی',  # Alef Maksura
+    'ك': 'ک',  # Arabic Kaf
+    'ة': 'ه',  # Teh Marbuta
+    'ۀ': 'ه',  # Heh with Yeh above
+    'أ': 'ا',
+    'إ': 'ا',
+    'ٱ': 'ا',
+    '\u200d': ZWNJ,  # zero-width joiner
+    '\u00ad': ZWNJ,  # soft hyphen
+    **{chr(0x06F0 + digit): str(digit) for digit in range(10)},  # Persian digits
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic digits
+})
+
+# Harakat, superscript alef and tatweel
+IGNORED_CHARACTERS = re.compile('[\u064b-\u065f\u0670\u0640]')
+
+WORD_PATTERN = re.compile(f'[^\\W_]+(?:{ZWNJ}[^\\W_]+)*')
+
+
+def document_terms(text):
+    """Normalized terms of a field, space separated as stored in SearchDocument"""
+    if not text:
+        return ''
+    text = IGNORED_CHARACTERS.sub('', str(text).translate(CHARACTER_MAP)).casefold()
+    terms = []
+    for word in WORD_PATTERN.findall(text):
+        parts = word.split(ZWNJ)
+        terms.append(''.join(parts))
+        if len(parts) > 1:
+            terms.extend(parts)
+    return ' '.join(terms)
+
+
+# Snapshot of compatibility.search.documents: (title, body, keywords) per model
+def product_document(product):
+    return product.name, product.description, product.category.name if product.category_id else ''
+
+
+def blog_post_document(post):
+    return post.title, f'{post.excerpt}\n{post.content}', post.author_name
+
+
+SEARCH_MODELS = {
+    'products.Product': (product_document, ('category',)),
+    'content.BlogPost': (blog_post_document, ()),
+}
+
+
+def store_documents(SearchDocument, model_label, instances, builder, with_vector):
+    documents = []
+    for instance in instances:
+        title, body, keywords = builder(instance)
+        documents.append(SearchDocument(
+            model_label=model_label,
+            object_id=str(instance.pk),
+            title=document_terms(title),
+            body=document_terms(body),
+            keywords=document_terms(keywords),
+        ))
+    SearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['model_label', 'object_id'],
+        update_fields=['title', 'body', 'keywords', 'updated_at'],
+    )
+    if with_vector:
+        from django.contrib.postgres.search import SearchVector
+
+        # Same vector as PostgresSearchBackend: 'simple' config, weights A/B/C
+        SearchDocument.objects.filter(
+            model_label=model_label,
+            object_id__in=[document.object_id for document in documents],
+        ).update(search_vector=(
+            SearchVector('title', weight='A', config='simple')
+            + SearchVector('body', weight='B', config='simple')
+            + SearchVector('keywords', weight='C', config='simple')
+        ))
+
+
+def backfill_search_documents(apps, schema_editor):
+    """Index existing rows so keyword search works without running rebuild_search_index first"""
+    SearchDocument = apps.get_model('compatibility', 'SearchDocument')
+    with_vector = schema_editor.connection.vendor == 'postgresql'
+
+    for label, (builder, select_related) in SEARCH_MODELS.items():
+        model = apps.get_model(label)
+        model_label = label.lower()
+        batch = []
+        for instance in model.objects.select_related(*select_related).order_by('pk').iterator(chunk_size=BATCH_SIZE):
+            batch.append(instance)
+            if len(batch) >= BATCH_SIZE:
+                store_documents(SearchDocument, model_label, batch, builder, with_vector)
+                batch = []
+        if batch:
+            store_documents(SearchDocument, model_label, batch, builder, with_vector)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compatibility', '0017_productexport'),
+        ('products', '0009_add_category_to_faq'),
+        ('content', '0002_blogcategory_blogtag_blogpost'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated manually to map the integer IDs of existing rows
+
+import hashlib
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+# Snapshot of legacyids.utils.LEGACY_ID_MODELS when the mapping table was added
+LEGACY_ID_MODELS = {
+    'orders.Order': ('full', 'short'),
+    'orders.OrderItem': ('full',),
+    'products.Category': ('full',),
+    'deliveries.Delivery': ('hex',),
+    'payments.Transaction': ('hex',),
+    'configurations.Localization': ('short',),
+}
+
+
+def compute_legacy_id(object_id, scheme):
+    """Copy of legacyids.utils.compute_legacy_id"""
+    if scheme == 'full':
+        return int(hashlib.md5(str(object_id).encode('utf-8')).hexdigest(), 16) % 2147483647
+    if scheme == 'short':
+        return int(hashlib.md5(str(object_id).encode()).hexdigest()[:8], 16) % (10 ** 9)
+    return int(hashlib.md5(str(object_id).replace('-', '').encode()).hexdigest()[:8], 16) % 100000000
+
+
+def backfill_legacy_ids(apps, schema_editor):
+    """Map existing rows so integer-ID lookups work without running backfill_legacy_ids first"""
+    LegacyIdMapping = apps.get_model('compatibility', 'LegacyIdMapping')
+
+    def store(model_label, schemes, object_ids):
+        LegacyIdMapping.objects.bulk_create(
+            [
+                LegacyIdMapping(
+                    model_label=model_label,
+                    scheme=scheme,
+                    legacy_id=compute_legacy_id(object_id, scheme),
+                    object_id=object_id,
+                )
+                for object_id in object_ids
+                for scheme in schemes
+            ],
+            ignore_conflicts=True,
+        )
+
+    for label, schemes in LEGACY_ID_MODELS.items():
+        model = apps.get_model(label)
+        model_label = model._meta.label_lower
+        batch = []
+        for object_id in model.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=BATCH_SIZE):
+            batch.append(object_id)
+            if len(batch) >= BATCH_SIZE:
+                store(model_label, schemes, batch)
+                batch = []
+        if batch:
+            store(model_label, schemes, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compatibility', '0018_backfill_search_documents'),
+        ('orders', '0008_make_address_phone_fields_nullable'),
+        ('products', '0009_add_category_to_faq'),
+        ('deliveries', '0012_locationupdate_recent_idx'),
+        ('payments', '0005_clear_sent_sms_codes'),
+        ('configurations', '0002_localization_mailtemplate'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_legacy_ids, migrations.RunPython.noop),
+    ]
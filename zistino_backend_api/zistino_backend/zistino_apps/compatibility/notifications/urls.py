@@ -6,11 +6,13 @@ All endpoints are tagged with 'Notifications' to appear grouped in Swagger UI.
 
 Endpoints:
 1. POST /api/v1/notifications/send - Send notification (SMS) to user/driver
+2. GET /api/v1/notifications/broadcasts/{id} - Progress of a broadcast to all users
 """
 from django.urls import path
 from . import views
 
 urlpatterns = [
     path('send', views.NotificationSendView.as_view(), name='notifications-send'),
+    path('broadcasts/<uuid:broadcast_id>', views.NotificationBroadcastStatusView.as_view(), name='notifications-broadcast-status'),
 ]
 
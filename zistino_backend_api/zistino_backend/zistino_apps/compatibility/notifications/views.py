@@ -9,6 +9,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
+from zistino_apps.notifications.models import SmsBroadcast
 from zistino_apps.users.permissions import IsManager
 import requests
 import json
@@ -77,6 +78,34 @@ logger = logging.getLogger(__name__)
                 )
             ]
         ),
+        202: OpenApiResponse(
+            response=serializers.Serializer,
+            description='Broadcast to all users queued (sendToAll or empty phoneNumber)',
+            examples=[
+                OpenApiExample(
+                    'Broadcast queued',
+                    value={
+                        'data': {
+                            'broadcastId': '8c1f4f3e-2b7a-4d5e-9f10-3a2b1c0d9e8f',
+                            'status': 'queued',
+                            'message': 'Important announcement for all users',
+                            'totalUsers': 15230,
+                            'successful': 0,
+                            'failed': 0,
+                            'pending': 15230,
+                            'failedNumbers': [],
+                            'error': None,
+                            'createdAt': '2025-11-01T12:00:00+00:00',
+                            'startedAt': None,
+                            'finishedAt': None,
+                            'sentToAll': True
+                        },
+                        'messages': ['SMS broadcast to 15230 users queued'],
+                        'succeeded': True
+                    }
+                )
+            ]
+        ),
         400: {'description': 'Validation error'},
         500: {'description': 'SMS sending failed'}
     }
@@ -107,53 +136,23 @@ class NotificationSendView(APIView):
             
             # Determine if sending to all users
             if send_to_all or (not phone_number):
-                # Send to all active users
-                from django.contrib.auth import get_user_model
-                User = get_user_model()
-                
-                # Get all active users with phone numbers
-                active_users = User.objects.filter(
-                    is_active=True,
-                    phone_number__isnull=False
-                ).exclude(phone_number='')
+                # Broadcasts run as a background job; poll the status endpoint for progress
+                from zistino_apps.notifications.broadcasts import create_broadcast, serialize_broadcast
                 
-                total_users = active_users.count()
-                if total_users == 0:
+                broadcast = create_broadcast(message, created_by=request.user)
+                if broadcast is None:
                     return create_error_response(
                         error_message='No active users found with phone numbers',
                         status_code=status.HTTP_400_BAD_REQUEST,
                         errors={'users': ['No active users found']}
                     )
                 
-                # Send SMS to all users using MeliPayamak (for free-form messages)
-                from zistino_apps.payments.sms_service import _send_sms_melipayamak
-                successful = 0
-                failed = 0
-                failed_numbers = []
-                
-                for user in active_users:
-                    try:
-                        success, error_message = _send_sms_melipayamak(user.phone_number, message)
-                        if success:
-                            successful += 1
-                        else:
-                            failed += 1
-                            failed_numbers.append(user.phone_number)
-                    except Exception as e:
-                        failed += 1
-                        failed_numbers.append(user.phone_number)
-                
+                data = serialize_broadcast(broadcast)
+                data['sentToAll'] = True
                 return create_success_response(
-                    data={
-                        'sentToAll': True,
-                        'totalUsers': total_users,
-                        'successful': successful,
-                        'failed': failed,
-                        'message': message,
-                        'failedNumbers': failed_numbers[:10] if failed_numbers else []  # Limit to first 10 failed numbers
-                    },
-                    messages=[f'SMS sent to {successful} out of {total_users} users'],
-                    status_code=status.HTTP_200_OK
+                    data=data,
+                    messages=[f'SMS broadcast to {broadcast.total_recipients} users queued'],
+                    status_code=status.HTTP_202_ACCEPTED
                 )
             else:
                 # Send to single phone number
@@ -302,4 +301,55 @@ class NotificationSendView(APIView):
             )
 
 
+@extend_schema(
+    tags=['Notifications'],
+    operation_id='notifications_broadcast_status',
+    summary='Get broadcast status',
+    description='Progress of an SMS broadcast started with POST /notifications/send (sendToAll).',
+    responses={
+        200: OpenApiResponse(
+            response=serializers.Serializer,
+            description='Broadcast status',
+            examples=[
+                OpenApiExample(
+                    'Running broadcast',
+                    value={
+                        'data': {
+                            'broadcastId': '8c1f4f3e-2b7a-4d5e-9f10-3a2b1c0d9e8f',
+                            'status': 'running',
+                            'message': 'Important announcement for all users',
+                            'totalUsers': 15230,
+                            'successful': 6980,
+                            'failed': 20,
+                            'pending': 8230,
+                            'failedNumbers': ['09120000000'],
+                            'error': None,
+                            'createdAt': '2025-11-01T12:00:00+00:00',
+                            'startedAt': '2025-11-01T12:00:01+00:00',
+                            'finishedAt': None
+                        },
+                        'messages': [],
+                        'succeeded': True
+                    }
+                )
+            ]
+        ),
+        404: {'description': 'Broadcast not found'}
+    }
+)
+class NotificationBroadcastStatusView(APIView):
+    """GET /api/v1/notifications/broadcasts/{id} - Broadcast progress"""
+    permission_classes = [IsAuthenticated, IsManager]
 
+    def get(self, request, broadcast_id):
+        from zistino_apps.notifications.broadcasts import serialize_broadcast
+        
+        try:
+            broadcast = SmsBroadcast.objects.get(pk=broadcast_id)
+        except SmsBroadcast.DoesNotExist:
+            return create_error_response(
+                error_message='Broadcast not found',
+                status_code=status.HTTP_404_NOT_FOUND,
+                errors={'id': ['Broadcast not found']}
+            )
+        return create_success_response(data=serialize_broadcast(broadcast))
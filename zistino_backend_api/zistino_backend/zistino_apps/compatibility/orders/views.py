@@ -21,6 +21,7 @@ from zistino_apps.orders.serializers import OrderSerializer, OrderItemSerializer
 from zistino_apps.products.models import Product
 from zistino_apps.users.models import Address
 from zistino_apps.users.permissions import IsManager
+from zistino_apps.compatibility.legacyids.utils import resolve_legacy_id, SCHEME_FULL, SCHEME_SHORT
 from zistino_apps.deliveries.utils import find_zone_for_location
 from zistino_apps.users.models import Zone
 from django.contrib.auth import get_user_model
@@ -96,18 +97,9 @@ class OrdersViewSet(viewsets.ModelViewSet):
             # If not a valid UUID, try as integer ID (old Swagger format)
             try:
                 integer_id = int(lookup_value)
-                # Find order whose UUID hash matches the integer ID
-                # Use same hash calculation as OrderAllSerializer: [:8] and 10**9
-                import hashlib
-                orders = Order.objects.select_related('user').prefetch_related('order_items').all()
-                order = None
-                for ord in orders:
-                    # Calculate hash the same way as serializer
-                    uuid_str = str(ord.id)
-                    order_id_hash = int(hashlib.md5(uuid_str.encode()).hexdigest()[:8], 16) % (10 ** 9)
-                    if order_id_hash == integer_id:
-                        order = ord
-                        break
+                # Resolve through the legacy ID mapping (same hash as OrderAllSerializer: [:8] and 10**9)
+                orders = Order.objects.select_related('user').prefetch_related('order_items')
+                order = resolve_legacy_id(orders, integer_id, SCHEME_SHORT)
                 if not order:
                     from django.http import Http404
                     raise Http404(f'No Order matches the given query with ID: {lookup_value}')
@@ -906,17 +898,7 @@ class OrdersViewSet(viewsets.ModelViewSet):
                     # Try as integer (hash lookup)
                     try:
                         integer_id = int(category_id.strip())
-                        import hashlib
-                        categories = Category.objects.all()
-                        category = None
-                        for cat in categories:
-                            uuid_str = str(cat.id)
-                            hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                            hash_int = int(hash_obj.hexdigest(), 16)
-                            hash_id = hash_int % 2147483647
-                            if hash_id == integer_id:
-                                category = cat
-                                break
+                        category = resolve_legacy_id(Category.objects.all(), integer_id, SCHEME_FULL)
                         if category:
                             products = Product.objects.filter(category=category)
                             product_names = products.values_list('name', flat=True)
@@ -1218,17 +1200,7 @@ class OrdersViewSet(viewsets.ModelViewSet):
                     # Try as integer (hash lookup)
                     try:
                         integer_id = int(category_id.strip())
-                        import hashlib
-                        categories = Category.objects.all()
-                        category = None
-                        for cat in categories:
-                            uuid_str = str(cat.id)
-                            hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                            hash_int = int(hash_obj.hexdigest(), 16)
-                            hash_id = hash_int % 2147483647
-                            if hash_id == integer_id:
-                                category = cat
-                                break
+                        category = resolve_legacy_id(Category.objects.all(), integer_id, SCHEME_FULL)
                         if category:
                             products = Product.objects.filter(category=category)
                             product_names = products.values_list('name', flat=True)
@@ -1416,17 +1388,7 @@ class OrdersViewSet(viewsets.ModelViewSet):
                     # Try as integer (hash lookup)
                     try:
                         integer_id = int(category_id.strip())
-                        import hashlib
-                        categories = Category.objects.all()
-                        category = None
-                        for cat in categories:
-                            uuid_str = str(cat.id)
-                            hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                            hash_int = int(hash_obj.hexdigest(), 16)
-                            hash_id = hash_int % 2147483647
-                            if hash_id == integer_id:
-                                category = cat
-                                break
+                        category = resolve_legacy_id(Category.objects.all(), integer_id, SCHEME_FULL)
                         if category:
                             products = Product.objects.filter(category=category)
                             product_names = products.values_list('name', flat=True)
@@ -2397,17 +2359,8 @@ class OrdersViewSet(viewsets.ModelViewSet):
                     # Try as integer (hash lookup)
                     try:
                         integer_id = int(order_id)
-                        # Find order whose UUID hash matches the integer ID
-                        import hashlib
-                        orders = Order.objects.all()
-                        for ord in orders:
-                            uuid_str = str(ord.id)
-                            hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                            hash_int = int(hash_obj.hexdigest(), 16)
-                            hash_id = hash_int % 2147483647
-                            if hash_id == integer_id:
-                                order = ord
-                                break
+                        # Resolve through the legacy ID mapping (same hash as serializer)
+                        order = resolve_legacy_id(Order.objects.all(), integer_id, SCHEME_FULL)
                     except (ValueError, TypeError):
                         pass
             except Exception:
@@ -2539,16 +2492,8 @@ class OrdersViewSet(viewsets.ModelViewSet):
                 # Try as integer (hash lookup)
                 try:
                     integer_id = int(order_id)
-                    import hashlib
-                    orders = Order.objects.all()
-                    for ord in orders:
-                        uuid_str = str(ord.id)
-                        hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                        hash_int = int(hash_obj.hexdigest(), 16)
-                        hash_id = hash_int % 2147483647
-                        if hash_id == integer_id:
-                            order = ord
-                            break
+                    # Resolve through the legacy ID mapping (same hash as serializer)
+                    order = resolve_legacy_id(Order.objects.all(), integer_id, SCHEME_FULL)
                 except (ValueError, TypeError):
                     pass
         except Exception:
@@ -2787,19 +2732,8 @@ class OrdersClientRetrieveView(APIView):
             # If not a valid UUID, try as integer ID (old Swagger format)
             try:
                 integer_id = int(id)
-                # Find order whose UUID hash matches the integer ID
-                import hashlib
-                orders = Order.objects.filter(user=request.user)
-                order = None
-                for ord in orders:
-                    # Calculate hash the same way as serializer
-                    uuid_str = str(ord.id)
-                    hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                    hash_int = int(hash_obj.hexdigest(), 16)
-                    hash_id = hash_int % 2147483647
-                    if hash_id == integer_id:
-                        order = ord
-                        break
+                # Resolve through the legacy ID mapping (same hash as serializer)
+                order = resolve_legacy_id(Order.objects.filter(user=request.user), integer_id, SCHEME_FULL)
                 if not order:
                     return create_error_response(
                         error_message='Order not found',
@@ -2847,19 +2781,8 @@ class OrdersClientOrderAndProductDetailsView(APIView):
             # If not a valid UUID, try as integer ID (old Swagger format)
             try:
                 integer_id = int(id)
-                # Find order whose UUID hash matches the integer ID
-                import hashlib
-                orders = Order.objects.filter(user=request.user)
-                order = None
-                for ord in orders:
-                    # Calculate hash the same way as serializer
-                    uuid_str = str(ord.id)
-                    hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                    hash_int = int(hash_obj.hexdigest(), 16)
-                    hash_id = hash_int % 2147483647
-                    if hash_id == integer_id:
-                        order = ord
-                        break
+                # Resolve through the legacy ID mapping (same hash as serializer)
+                order = resolve_legacy_id(Order.objects.filter(user=request.user), integer_id, SCHEME_FULL)
                 if not order:
                     return create_error_response(
                         error_message='Order not found',
@@ -2907,19 +2830,8 @@ class OrdersClientWithCustomerInfoView(APIView):
             # If not a valid UUID, try as integer ID (old Swagger format)
             try:
                 integer_id = int(id)
-                # Find order whose UUID hash matches the integer ID
-                import hashlib
-                orders = Order.objects.filter(user=request.user)
-                order = None
-                for ord in orders:
-                    # Calculate hash the same way as serializer
-                    uuid_str = str(ord.id)
-                    hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                    hash_int = int(hash_obj.hexdigest(), 16)
-                    hash_id = hash_int % 2147483647
-                    if hash_id == integer_id:
-                        order = ord
-                        break
+                # Resolve through the legacy ID mapping (same hash as serializer)
+                order = resolve_legacy_id(Order.objects.filter(user=request.user), integer_id, SCHEME_FULL)
                 if not order:
                     return create_error_response(
                         error_message='Order not found',
@@ -2976,19 +2888,8 @@ class OrdersOrderStatusUpdateView(APIView):
             # If not a valid UUID, try as integer ID (old Swagger format)
             try:
                 integer_id = int(id)
-                # Find order whose UUID hash matches the integer ID
-                import hashlib
-                orders = Order.objects.all()
-                order = None
-                for ord in orders:
-                    # Calculate hash the same way as serializer
-                    uuid_str = str(ord.id)
-                    hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                    hash_int = int(hash_obj.hexdigest(), 16)
-                    hash_id = hash_int % 2147483647
-                    if hash_id == integer_id:
-                        order = ord
-                        break
+                # Resolve through the legacy ID mapping (same hash as serializer)
+                order = resolve_legacy_id(Order.objects.all(), integer_id, SCHEME_FULL)
                 if not order:
                     return create_error_response(
                         error_message='Order not found',
@@ -3055,19 +2956,8 @@ class OrdersOrderItemStatusUpdateView(APIView):
             # If not a valid UUID, try as integer ID (old Swagger format)
             try:
                 integer_id = int(id)
-                # Find order item whose UUID hash matches the integer ID
-                import hashlib
-                order_items = OrderItem.objects.all()
-                order_item = None
-                for item in order_items:
-                    # Calculate hash the same way as serializer
-                    uuid_str = str(item.id)
-                    hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                    hash_int = int(hash_obj.hexdigest(), 16)
-                    hash_id = hash_int % 2147483647
-                    if hash_id == integer_id:
-                        order_item = item
-                        break
+                # Resolve through the legacy ID mapping (same hash as serializer)
+                order_item = resolve_legacy_id(OrderItem.objects.all(), integer_id, SCHEME_FULL)
                 if not order_item:
                     return create_error_response(
                         error_message='Order item not found',
@@ -22,6 +22,7 @@ from zistino_apps.users.permissions import IsManager
 from zistino_apps.points.models import UserPoints
 from zistino_apps.compatibility.users.serializers import UserCompatibilitySerializer
 from zistino_apps.compatibility.utils import create_success_response, create_error_response, create_authentication_error_response
+from zistino_apps.compatibility.claims import get_user_claims
 from drf_spectacular.utils import OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
 
@@ -1375,7 +1376,7 @@ class PersonalPermissionsView(APIView):
                 'isManager': getattr(request.user, 'is_manager', False),
                 'isDriver': getattr(request.user, 'is_driver', False),
                 'isActive': request.user.is_active,
-                'permissions': []  # TODO: Add custom permissions if needed
+                'permissions': sorted(get_user_claims(request.user))
             }
             return create_success_response(data=permissions_data, messages=[])
         except Exception as e:
@@ -0,0 +1,285 @@
+"""
+Product exports (POST /api/v1/products/export).
+
+Rows are read with values_list() over an iterator, with the category and
+first warranty names joined in SQL, and written one at a time:
+
+    csv   streamed to the client while it is generated
+    xlsx  written by openpyxl in write-only mode to a temporary file, which
+          is then streamed to the client
+
+so memory stays flat whatever the size of the catalogue. Exports of more
+than PRODUCT_EXPORT_SYNC_LIMIT rows are stored as a ProductExport and built
+by a Celery worker into media storage; the client polls the status endpoint
+and downloads the file with the export's download token.
+"""
+import csv
+import logging
+import secrets
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Avg, OuterRef, Q, Subquery
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+from zistino_apps.products.models import Product, Warranty
+from .models import ProductExport
+
+logger = logging.getLogger(__name__)
+
+EXPORT_HEADERS = [
+    'ID', 'Name', 'Description', 'Price', 'Category', 'In Stock',
+    'Is Active', 'Created At', 'Brand', 'Warranty'
+]
+# Write-only worksheets cannot be measured after writing, so widths are fixed
+EXPORT_COLUMN_WIDTHS = [38, 30, 50, 12, 25, 10, 10, 21, 20, 25]
+# A larger pageSize exports every matching product instead of one page
+MAX_EXPORT_PAGE_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+
+FILE_TYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def get_sync_limit():
+    return getattr(settings, 'PRODUCT_EXPORT_SYNC_LIMIT', 5000)
+
+
+def get_export_queryset(params):
+    """
+    Products matching an export request (ProductExportRequestSerializer data),
+    as values_list() rows of the export columns.
+    """
+    from zistino_apps.compatibility.search.documents import BODY, TITLE
+    from zistino_apps.compatibility.search.utils import search_queryset
+    from .views import apply_order_by
+
+    qs = Product.objects.all()
+
+    # Use keyword from advancedSearch if provided, otherwise use top-level keyword
+    keyword = params.get('keyword') or ''
+    advanced_search = params.get('advancedSearch')
+    if advanced_search and isinstance(advanced_search, dict):
+        keyword = advanced_search.get('keyword') or keyword
+    if keyword and keyword.strip():
+        qs = search_queryset(qs, keyword, fields=(TITLE, BODY))
+
+    # TODO: Filter by brandId when brand relationship is implemented
+
+    # Rate filter (average of accepted comments)
+    min_rate = params.get('minimumRate', 0) or 0
+    max_rate = params.get('maximumRate', 0) or 0
+    if min_rate > 0 or max_rate > 0:
+        products_with_ratings = Product.objects.annotate(
+            avg_rating=Avg('comments__rate', filter=Q(comments__is_accepted=True))
+        ).filter(avg_rating__gte=min_rate)
+        if max_rate > 0:
+            products_with_ratings = products_with_ratings.filter(avg_rating__lte=max_rate)
+        qs = qs.filter(id__in=products_with_ratings.values_list('id', flat=True))
+
+    # Empty orderBy: relevance for keyword searches, newest otherwise
+    order_by = [field for field in params.get('orderBy') or [] if field and field.strip()]
+    qs = apply_order_by(qs, order_by)
+
+    first_warranty = Warranty.objects.filter(product=OuterRef('pk')).order_by('pk').values('name')[:1]
+    qs = qs.annotate(
+        export_warranty=Subquery(first_warranty),
+    ).values_list(
+        'id', 'name', 'description', 'price_per_unit', 'category__name',
+        'is_active', 'created_at', 'export_warranty',
+    )
+
+    # Old Swagger exports one page; pageSize above MAX_EXPORT_PAGE_SIZE exports everything
+    page_number = params.get('pageNumber', 1) or 1
+    page_size = params.get('pageSize', 20) or 20
+    if page_size <= MAX_EXPORT_PAGE_SIZE:
+        offset = (page_number - 1) * page_size
+        qs = qs[offset:offset + page_size]
+    return qs
+
+
+def iter_export_rows(queryset):
+    """Yield one list of cell values per product row of get_export_queryset()."""
+    for product_id, name, description, price, category_name, is_active, created_at, warranty_name in (
+        queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    ):
+        yield [
+            str(product_id),
+            name or '',
+            description or '',
+            float(price) if price else 0,
+            category_name or '',
+            # In Stock is always 0 in exports, matching the serializer's inStock default
+            0,
+            'Yes' if is_active else 'No',
+            created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else '',
+            # Product has no brand relationship yet
+            '',
+            warranty_name or '',
+        ]
+
+
+def write_xlsx(rows, fileobj):
+    """Write rows to fileobj as a workbook, holding one row in memory at a time. Returns the row count."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Products')
+    for index, width in enumerate(EXPORT_COLUMN_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(index)].width = width
+
+    header = []
+    for title in EXPORT_HEADERS:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal='center')
+        header.append(cell)
+    ws.append(header)
+
+    count = 0
+    for row in rows:
+        ws.append(row)
+        count += 1
+    wb.save(fileobj)
+    return count
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    # BOM so Excel opens the Persian text as UTF-8
+    yield '\ufeff'
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv(rows, fileobj):
+    """Write rows to a binary fileobj as UTF-8 CSV. Returns the row count."""
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    for line in iter_csv(counted(rows)):
+        fileobj.write(line.encode('utf-8'))
+    return count
+
+
+def stream_export(queryset, file_type):
+    """Response streaming the export of queryset rows as an xlsx or csv attachment."""
+    filename = f'ProductExports.{file_type}'
+    if file_type == 'csv':
+        response = StreamingHttpResponse(iter_csv(iter_export_rows(queryset)), content_type=FILE_TYPES['csv'])
+        response['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
+
+    # The xlsx zip container is assembled on save, so build it in a temporary file
+    output = tempfile.TemporaryFile()
+    write_xlsx(iter_export_rows(queryset), output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=FILE_TYPES['xlsx'])
+
+
+def create_export(params, file_type, created_by=None):
+    """Store an export job and schedule it after commit. Returns the ProductExport."""
+    from zistino_apps.compatibility.tasks import build_product_export_task
+
+    export = ProductExport.objects.create(
+        created_by=created_by,
+        file_type=file_type,
+        filters=params,
+        download_token=secrets.token_urlsafe(32),
+    )
+    transaction.on_commit(lambda: build_product_export_task.delay(str(export.id)))
+    return export
+
+
+def run_export(export_id):
+    """
+    Build a queued export into media storage. Returns a summary dict.
+    A 'running' export (interrupted worker, redelivered task) is rebuilt from scratch.
+    """
+    ProductExport.objects.filter(pk=export_id, status__in=['queued', 'running']).update(
+        status='running', started_at=timezone.now(),
+    )
+    export = ProductExport.objects.get(pk=export_id)
+    if export.status != 'running':
+        return {'export': str(export_id), 'status': export.status}
+
+    writer = write_csv if export.file_type == 'csv' else write_xlsx
+    try:
+        with tempfile.TemporaryFile() as output:
+            row_count = writer(iter_export_rows(get_export_queryset(export.filters)), output)
+            output.seek(0)
+            export.file.save(f'products-{export.id}.{export.file_type}', File(output), save=False)
+    except Exception as e:
+        logger.error(f"Product export {export_id} failed: {str(e)}", exc_info=True)
+        ProductExport.objects.filter(pk=export_id).update(
+            status='failed', error=str(e), finished_at=timezone.now(),
+        )
+        raise
+
+    ProductExport.objects.filter(pk=export_id).update(
+        status='completed', file=export.file.name, row_count=row_count, finished_at=timezone.now(),
+    )
+    summary = {'export': str(export_id), 'status': 'completed', 'rows': row_count}
+    logger.info(f"Product export finished: {summary}")
+    return summary
+
+
+def get_expiry():
+    return timedelta(hours=getattr(settings, 'PRODUCT_EXPORT_TTL_HOURS', 24))
+
+
+def is_expired(export):
+    return export.created_at + get_expiry() < timezone.now()
+
+
+def delete_expired_exports():
+    """Delete export files and jobs older than PRODUCT_EXPORT_TTL_HOURS. Returns the number deleted."""
+    deleted = 0
+    for export in ProductExport.objects.filter(created_at__lt=timezone.now() - get_expiry()).iterator():
+        if export.file:
+            export.file.delete(save=False)
+        export.delete()
+        deleted += 1
+    return deleted
+
+
+def serialize_export(export, request=None):
+    data = {
+        'exportId': str(export.id),
+        'status': export.status,
+        'fileType': export.file_type,
+        'rowCount': export.row_count,
+        'downloadUrl': None,
+        'error': export.error or None,
+        'createdAt': export.created_at.isoformat(),
+        'startedAt': export.started_at.isoformat() if export.started_at else None,
+        'finishedAt': export.finished_at.isoformat() if export.finished_at else None,
+        'expiresAt': (export.created_at + get_expiry()).isoformat(),
+    }
+    if export.status == 'completed':
+        url = f"{reverse('products-export-download', kwargs={'export_id': export.id})}?token={export.download_token}"
+        data['downloadUrl'] = request.build_absolute_uri(url) if request else url
+    return data
@@ -0,0 +1,95 @@
+"""
+Query planning for product responses.
+
+ProductCompatibilitySerializer needs per-product aggregates (accepted
+comment rating and count, orders by product name) and several related
+tables. Instead of querying them per product, prepare_products() loads them
+for a whole page at once:
+
+    - rate and comments count: one grouped query over comments
+    - orders count: one grouped query over order items
+    - colors, prices, warranties and specification: one prefetch each
+
+so a page costs a constant number of queries whatever its size. Querysets
+built with with_listing_data() already carry the aggregates as SQL
+annotations and skip the grouped queries.
+"""
+from django.db.models import Avg, Count, IntegerField, OuterRef, Prefetch, Q, Subquery, prefetch_related_objects
+from django.db.models.functions import Coalesce
+
+from zistino_apps.notifications.models import Comment
+from zistino_apps.orders.models import OrderItem
+from zistino_apps.products.models import Price, ProductColor, Warranty
+
+# Attributes read by ProductCompatibilitySerializer
+RATE_ATTR = 'listing_rate'
+COMMENTS_COUNT_ATTR = 'listing_comments_count'
+ORDERS_COUNT_ATTR = 'listing_orders_count'
+
+
+def get_listing_prefetches():
+    # Ordered by pk so the first item matches the former .first() lookups
+    return [
+        Prefetch('product_colors', queryset=ProductColor.objects.select_related('color').order_by('pk')),
+        Prefetch('prices', queryset=Price.objects.order_by('pk')),
+        Prefetch('warranties', queryset=Warranty.objects.order_by('pk')),
+        'specification',
+    ]
+
+
+def with_listing_data(queryset):
+    """Annotate a Product queryset with the serializer aggregates and prefetch its related rows."""
+    orders_count = (
+        OrderItem.objects.filter(product_name=OuterRef('name'))
+        .order_by()
+        .values('product_name')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    accepted = Q(comments__is_accepted=True)
+    return queryset.annotate(**{
+        RATE_ATTR: Avg('comments__rate', filter=accepted),
+        COMMENTS_COUNT_ATTR: Count('comments', filter=accepted, distinct=True),
+        ORDERS_COUNT_ATTR: Coalesce(Subquery(orders_count, output_field=IntegerField()), 0),
+    }).prefetch_related(*get_listing_prefetches())
+
+
+def is_prepared(product):
+    return hasattr(product, ORDERS_COUNT_ATTR)
+
+
+def prepare_products(products):
+    """
+    Load the serializer aggregates and related rows for many products.
+    Accepts any iterable of products and returns them as a list.
+    """
+    products = list(products)
+    pending = [product for product in products if not is_prepared(product)]
+    if not pending:
+        # Annotated by with_listing_data(); prefetches are no-ops if already done
+        prefetch_related_objects(products, *get_listing_prefetches())
+        return products
+
+    ids = {product.pk for product in pending}
+    comment_stats = {
+        row['product_id']: row
+        for row in Comment.objects.filter(product_id__in=ids, is_accepted=True)
+        .order_by()
+        .values('product_id')
+        .annotate(rate=Avg('rate'), count=Count('id'))
+    }
+    orders_counts = dict(
+        OrderItem.objects.filter(product_name__in={product.name for product in pending})
+        .order_by()
+        .values('product_name')
+        .annotate(count=Count('id'))
+        .values_list('product_name', 'count')
+    )
+    for product in pending:
+        stats = comment_stats.get(product.pk)
+        setattr(product, RATE_ATTR, stats['rate'] if stats else None)
+        setattr(product, COMMENTS_COUNT_ATTR, stats['count'] if stats else 0)
+        setattr(product, ORDERS_COUNT_ATTR, orders_counts.get(product.name, 0))
+
+    prefetch_related_objects(products, *get_listing_prefetches())
+    return products
@@ -1,5 +1,6 @@
 """Models for Products compatibility layer."""
 from zistino_apps.products.models import Product, Category
+from django.conf import settings
 from django.db import models
 import uuid
 
@@ -38,5 +39,41 @@ class ProductGroupItem(models.Model):
         return f"{self.group.name} - {self.product.name}"
 
 
-__all__ = ['Product', 'Category', 'ProductGroup', 'ProductGroupItem']
+class ProductExport(models.Model):
+    """Large product export built as a background job (see compatibility.products.exports)."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    FILE_TYPE_CHOICES = [
+        ('xlsx', 'Excel'),
+        ('csv', 'CSV'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='product_exports')
+    file_type = models.CharField(max_length=10, choices=FILE_TYPE_CHOICES, default='xlsx')
+    filters = models.JSONField(default=dict, blank=True, help_text='Export request (ProductExportRequestSerializer data)')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    file = models.FileField(upload_to='exports/products/', blank=True)
+    download_token = models.CharField(max_length=64, help_text='Secret required to download the file')
+    row_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'product_exports'
+        verbose_name = 'Product Export'
+        verbose_name_plural = 'Product Exports'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Product export {self.id} ({self.status})"
+
+
+__all__ = ['Product', 'Category', 'ProductGroup', 'ProductGroupItem', 'ProductExport']
 
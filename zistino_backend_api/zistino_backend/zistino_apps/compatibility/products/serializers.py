@@ -10,11 +10,18 @@ from zistino_apps.products.serializers import (
 from rest_framework import serializers
 from zistino_apps.products.models import Product, Category, Color, Price, Specification, Warranty
 from zistino_apps.notifications.models import Comment
-from zistino_apps.orders.models import OrderItem
 from django.db.models import Count, Avg
 from datetime import datetime
 import json
 
+from .listing import (
+    RATE_ATTR,
+    COMMENTS_COUNT_ATTR,
+    ORDERS_COUNT_ATTR,
+    is_prepared,
+    prepare_products,
+)
+
 
 class ProductTextRequestSerializer(serializers.Serializer):
     """Serializer for productTexts array in old Swagger request format."""
@@ -126,10 +133,22 @@ class ProductCreateRequestSerializer(serializers.Serializer):
     f5 = serializers.IntegerField(required=False, allow_null=True, default=0)
 
 
+class ProductCompatibilityListSerializer(serializers.ListSerializer):
+    """Loads aggregates and related rows for the whole list at once (see listing.prepare_products)."""
+
+    def to_representation(self, data):
+        iterable = data.all() if hasattr(data, 'all') else data
+        return [self.child.to_representation(item) for item in prepare_products(iterable)]
+
+
 class ProductCompatibilitySerializer(serializers.ModelSerializer):
     """
     Compatibility serializer for Product that matches old Swagger format exactly.
     Includes all fields from old Swagger API response.
+
+    Per-product aggregates and related rows are read from values loaded by
+    listing.prepare_products() (or annotated by listing.with_listing_data()),
+    so serializing a list costs a constant number of queries.
     """
     # Basic fields
     id = serializers.UUIDField(read_only=True)  # Add id field at top level
@@ -216,22 +235,19 @@ class ProductCompatibilitySerializer(serializers.ModelSerializer):
             'issue', 'expaireDate', 'createdOn', 'p1', 'p2', 'p3', 'p4', 'p5',
             'f1', 'f2', 'f3', 'f4', 'f5', 'r1', 'r2', 'r3', 'r4', 'r5'
         ]
+        list_serializer_class = ProductCompatibilityListSerializer
 
     def get_rate(self, obj):
-        """Get average rating from comments."""
-        avg_rating = Comment.objects.filter(
-            product_id=obj.id,
-            is_accepted=True
-        ).aggregate(Avg('rate'))['rate__avg']
+        """Get average rating from accepted comments."""
+        avg_rating = getattr(obj, RATE_ATTR)
         return int(avg_rating) if avg_rating else 0
 
     def get_categories(self, obj):
         """Get categories as JSON string array format: '[{\"id\":\"11\"}]'."""
-        if obj.category:
-            import json
+        if obj.category_id:
             # Get category ID mapping from context if available
             category_id_mapping = self.context.get('category_id_mapping', {})
-            category_uuid_str = str(obj.category.id)
+            category_uuid_str = str(obj.category_id)
             
             # Use integer ID from mapping if available, otherwise use UUID string
             if category_uuid_str in category_id_mapping:
@@ -247,7 +263,7 @@ class ProductCompatibilitySerializer(serializers.ModelSerializer):
 
     def get_categoryIds(self, obj):
         """Get category IDs as array."""
-        if obj.category:
+        if obj.category_id:
             # Category ID is UUID, but old Swagger expects integer
             # Return empty array to match old Swagger format when category exists
             return []  # Old Swagger shows empty array even when category exists
@@ -259,13 +275,13 @@ class ProductCompatibilitySerializer(serializers.ModelSerializer):
         return 0
 
     def get_commentsCount(self, obj):
-        """Get comments count."""
-        return Comment.objects.filter(product_id=obj.id, is_accepted=True).count()
+        """Get accepted comments count."""
+        return getattr(obj, COMMENTS_COUNT_ATTR)
 
     def get_ordersCount(self, obj):
         """Get orders count by matching product name."""
         # OrderItem stores product_name as string, not a ForeignKey
-        return OrderItem.objects.filter(product_name=obj.name).count()
+        return getattr(obj, ORDERS_COUNT_ATTR)
 
     def get_size(self, obj):
         """Get size from specification."""
@@ -279,19 +295,19 @@ class ProductCompatibilitySerializer(serializers.ModelSerializer):
 
     def get_colorsList(self, obj):
         """Get colors as comma-separated string."""
-        colors = obj.product_colors.all().values_list('color__name', flat=True)
+        colors = [product_color.color.name for product_color in obj.product_colors.all()]
         return ', '.join(colors) if colors else None
 
     def get_masterColor(self, obj):
         """Get master color (first color or None)."""
-        first_color = obj.product_colors.first()
-        if first_color:
-            return first_color.color.name
+        colors = obj.product_colors.all()
+        if colors:
+            return colors[0].color.name
         return None
 
     def get_pricesList(self, obj):
         """Get prices as JSON string array format: '[]' or '[1800]'."""
-        prices = obj.prices.all().values_list('price', flat=True)
+        prices = [price.price for price in obj.prices.all()]
         if prices:
             # Convert to list of integers and return as JSON string
             price_list = [int(p) for p in prices]
@@ -338,9 +354,9 @@ class ProductCompatibilitySerializer(serializers.ModelSerializer):
 
     def get_warranty(self, obj):
         """Get warranty as string."""
-        warranty = obj.warranties.first()
-        if warranty:
-            return warranty.name
+        warranties = obj.warranties.all()
+        if warranties:
+            return warranties[0].name
         return None
 
     def get_specifications(self, obj):
@@ -403,6 +419,8 @@ class ProductCompatibilitySerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         """Convert to old Swagger format."""
+        if not is_prepared(instance):
+            prepare_products([instance])
         data = super().to_representation(instance)
 
         # Ensure id is a string (UUID)
@@ -485,6 +503,12 @@ class ProductExportRequestSerializer(serializers.Serializer):
     brandId = serializers.CharField(required=False, allow_null=True, allow_blank=True)
     minimumRate = serializers.IntegerField(required=False, default=0, min_value=0)
     maximumRate = serializers.IntegerField(required=False, default=0, min_value=0)
+    fileType = serializers.ChoiceField(
+        choices=['xlsx', 'csv'],
+        required=False,
+        default='xlsx',
+        help_text='Export file format (xlsx or csv)'
+    )
 
 
 class ProductClientSearchRequestSerializer(serializers.Serializer):
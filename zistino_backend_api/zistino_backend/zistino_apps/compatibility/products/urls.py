@@ -15,6 +15,7 @@ urlpatterns = [
     
     # Admin search endpoint (MUST come BEFORE router to avoid conflicts)
     path('search', views.ProductsViewSet.as_view({'post': 'search'}), name='products-search'),
+    path('export', views.ProductsViewSet.as_view({'post': 'export'}), name='products-export'),
     
     # Custom endpoints - Image 1
     path('edit/<str:id>', views.ProductsEditView.as_view(), name='products-edit'),
@@ -24,6 +25,7 @@ urlpatterns = [
     # Client endpoints (must come before router to avoid UUID validation conflicts)
     path('client', views.ProductsClientView.as_view(), name='products-client-create'),
     path('client/by-name', views.ProductsClientByNameView.as_view(), name='products-client-by-name'),
+    path('client/autocomplete', views.ProductsClientAutocompleteView.as_view(), name='products-client-autocomplete'),
     path('client/top5', views.ProductsClientTop5View.as_view(), name='products-client-top5'),
     path('client/search', views.ProductsClientSearchView.as_view(), name='products-client-search'),
     path('client/searchext', views.ProductsClientSearchExtView.as_view(), name='products-client-searchext'),
@@ -40,6 +42,10 @@ urlpatterns = [
     path('client/filter/<str:name>', views.ProductsClientFilterView.as_view(), name='products-client-filter'),
     path('client/<str:id>', views.ProductsClientRetrieveView.as_view(), name='products-client-retrieve'),
     
+    # Background exports (POST export returns 202 for large exports)
+    path('exports/<uuid:export_id>', views.ProductsExportStatusView.as_view(), name='products-export-status'),
+    path('exports/<uuid:export_id>/download', views.ProductsExportDownloadView.as_view(), name='products-export-download'),
+    
     # Custom endpoints - Image 2
     path('sold/<str:productId>', views.ProductsSoldView.as_view(), name='products-sold'),
     
@@ -10,7 +10,9 @@ from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
 from django.db.models import Q, Count, Avg, F
+from django.http import FileResponse
 from django.shortcuts import get_object_or_404
+import secrets
 import uuid
 
 from zistino_apps.products.models import Product, Category, ProductCode
@@ -23,7 +25,25 @@ from zistino_apps.content.serializers import BlogPostSerializer
 from zistino_apps.compatibility.utils import create_success_response, create_error_response
 from drf_spectacular.utils import OpenApiResponse
 
-from .models import ProductGroup, ProductGroupItem
+from .models import ProductExport, ProductGroup, ProductGroupItem
+from .listing import with_listing_data
+from .exports import (
+    FILE_TYPES as EXPORT_FILE_TYPES,
+    create_export,
+    get_export_queryset,
+    get_sync_limit as get_export_sync_limit,
+    is_expired as is_export_expired,
+    serialize_export,
+    stream_export,
+)
+from zistino_apps.compatibility.search.documents import BODY, KEYWORDS, TITLE
+from zistino_apps.compatibility.search.utils import is_ranked, search_queryset
+from zistino_apps.compatibility.search.autocomplete import SUGGESTION_TYPES, suggest
+from zistino_apps.compatibility.categories.registry import (
+    get_category_id_mapping,
+    find_category_by_hash,
+    find_category_by_sequential_id,
+)
 from .serializers import (
     ProductCompatibilitySerializer,
     ProductGroupSerializer,
@@ -64,6 +84,9 @@ def apply_order_by(qs, order_by_list):
     order_by_list = sanitize_order_by(order_by_list)
     
     if not order_by_list:
+        # Keyword searches default to relevance (see search.utils.search_queryset)
+        if is_ranked(qs):
+            return qs.order_by('-search_rank', '-created_at')
         return qs.order_by('-created_at')
     
     ordering = []
@@ -192,6 +215,11 @@ def apply_order_by(qs, order_by_list):
     return qs.order_by('-created_at')
 
 
+# Suggestions returned by the autocomplete endpoint
+AUTOCOMPLETE_DEFAULT_COUNT = 10
+AUTOCOMPLETE_MAX_COUNT = 50
+
+
 # Default error response example for all Products endpoints
 DEFAULT_ERROR_RESPONSE = {
     'default': {
@@ -357,14 +385,10 @@ class ProductsViewSet(viewsets.ModelViewSet):
     )
     def list(self, request, *args, **kwargs):
         """List all products. Returns format matching old Swagger."""
-        from zistino_apps.products.models import Category
-        from zistino_apps.compatibility.categories.serializers import get_category_integer_id_mapping
-        
         queryset = self.filter_queryset(self.get_queryset())
         
         # Get category ID mapping for serializer context (use sequential IDs)
-        all_categories_global = Category.objects.filter(is_active=True).order_by('created_at', 'name')
-        global_category_id_mapping = get_category_integer_id_mapping(all_categories_global, base_id=11)
+        global_category_id_mapping = get_category_id_mapping()
         
         serializer = ProductCompatibilitySerializer(
             queryset, 
@@ -396,14 +420,10 @@ class ProductsViewSet(viewsets.ModelViewSet):
     )
     def retrieve(self, request, *args, **kwargs):
         """Retrieve a product by ID. Returns format matching old Swagger."""
-        from zistino_apps.products.models import Category
-        from zistino_apps.compatibility.categories.serializers import get_category_integer_id_mapping
-        
         instance = self.get_object()
         
         # Get category ID mapping for serializer context (use sequential IDs)
-        all_categories_global = Category.objects.filter(is_active=True).order_by('created_at', 'name')
-        global_category_id_mapping = get_category_integer_id_mapping(all_categories_global, base_id=11)
+        global_category_id_mapping = get_category_id_mapping()
         
         serializer = ProductCompatibilitySerializer(
             instance, 
@@ -550,41 +570,6 @@ class ProductsViewSet(viewsets.ModelViewSet):
                 except (ValueError, TypeError, AttributeError):
                     return False
             
-            # Helper function to find category by integer hash
-            def find_category_by_hash(hash_id):
-                try:
-                    import hashlib
-                    all_categories = Category.objects.all()
-                    for cat in all_categories:
-                        uuid_str = str(cat.id)
-                        hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                        hash_int = int(hash_obj.hexdigest(), 16)
-                        cat_hash_id = hash_int % 2147483647
-                        if cat_hash_id == hash_id:
-                            return cat
-                except Exception:
-                    pass
-                return None
-            
-            # Helper function to find category by sequential integer ID (from client endpoint)
-            def find_category_by_sequential_id(seq_id):
-                """Find category by sequential integer ID (11, 12, 13...) from client endpoint."""
-                try:
-                    from zistino_apps.compatibility.categories.serializers import get_category_integer_id_mapping
-                    all_categories = Category.objects.filter(is_active=True).order_by('created_at', 'name')
-                    category_id_mapping = get_category_integer_id_mapping(all_categories, base_id=11)
-                    # Reverse mapping: sequential_id -> uuid_string
-                    reverse_mapping = {v: k for k, v in category_id_mapping.items()}
-                    uuid_str = reverse_mapping.get(seq_id)
-                    if uuid_str:
-                        try:
-                            return Category.objects.get(id=uuid_str)
-                        except Category.DoesNotExist:
-                            pass
-                except Exception:
-                    pass
-                return None
-            
             # If no direct category UUID, try to get from categoryIds (array - can be UUIDs or integers)
             if not category_id:
                 category_ids = validated_data.get('categoryIds') or request.data.get('categoryIds')
@@ -778,9 +763,7 @@ class ProductsViewSet(viewsets.ModelViewSet):
             # These might need to be created as related objects
             
             # Get category ID mapping for serializer context (use sequential IDs)
-            from zistino_apps.compatibility.categories.serializers import get_category_integer_id_mapping
-            all_categories_global = Category.objects.filter(is_active=True).order_by('created_at', 'name')
-            global_category_id_mapping = get_category_integer_id_mapping(all_categories_global, base_id=11)
+            global_category_id_mapping = get_category_id_mapping()
             
             # Return with ProductCompatibilitySerializer (old Swagger format)
             compat_serializer = ProductCompatibilitySerializer(
@@ -970,22 +953,6 @@ class ProductsViewSet(viewsets.ModelViewSet):
             except (ValueError, TypeError, AttributeError):
                 return False
         
-        # Helper function to find category by integer hash
-        def find_category_by_hash(hash_id):
-            try:
-                import hashlib
-                all_categories = Category.objects.all()
-                for cat in all_categories:
-                    uuid_str = str(cat.id)
-                    hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                    hash_int = int(hash_obj.hexdigest(), 16)
-                    cat_hash_id = hash_int % 2147483647
-                    if cat_hash_id == hash_id:
-                        return cat
-            except Exception:
-                pass
-            return None
-        
         # If no direct category UUID, try to get from categoryIds (array - can be UUIDs or integers)
         if not category_id:
             category_ids = data.get('categoryIds')
@@ -1056,9 +1023,7 @@ class ProductsViewSet(viewsets.ModelViewSet):
         product = serializer.save()
         
         # Get category ID mapping for serializer context (use sequential IDs)
-        from zistino_apps.compatibility.categories.serializers import get_category_integer_id_mapping
-        all_categories_global = Category.objects.filter(is_active=True).order_by('created_at', 'name')
-        global_category_id_mapping = get_category_integer_id_mapping(all_categories_global, base_id=11)
+        global_category_id_mapping = get_category_id_mapping()
         
         compat_serializer = ProductCompatibilitySerializer(
             product, 
@@ -1140,22 +1105,6 @@ class ProductsViewSet(viewsets.ModelViewSet):
             except (ValueError, TypeError, AttributeError):
                 return False
         
-        # Helper function to find category by integer hash
-        def find_category_by_hash(hash_id):
-            try:
-                import hashlib
-                all_categories = Category.objects.all()
-                for cat in all_categories:
-                    uuid_str = str(cat.id)
-                    hash_obj = hashlib.md5(uuid_str.encode('utf-8'))
-                    hash_int = int(hash_obj.hexdigest(), 16)
-                    cat_hash_id = hash_int % 2147483647
-                    if cat_hash_id == hash_id:
-                        return cat
-            except Exception:
-                pass
-            return None
-        
         # If no direct category UUID, try to get from categoryIds (array - can be UUIDs or integers)
         if not category_id:
             category_ids = data.get('categoryIds')
@@ -1226,9 +1175,7 @@ class ProductsViewSet(viewsets.ModelViewSet):
         product = serializer.save()
         
         # Get category ID mapping for serializer context (use sequential IDs)
-        from zistino_apps.compatibility.categories.serializers import get_category_integer_id_mapping
-        all_categories_global = Category.objects.filter(is_active=True).order_by('created_at', 'name')
-        global_category_id_mapping = get_category_integer_id_mapping(all_categories_global, base_id=11)
+        global_category_id_mapping = get_category_id_mapping()
         
         compat_serializer = ProductCompatibilitySerializer(
             product, 
@@ -1318,10 +1265,7 @@ class ProductsViewSet(viewsets.ModelViewSet):
         
         # Only apply keyword filter if keyword is not empty
         if keyword and keyword.strip():
-            qs = qs.filter(
-                Q(name__icontains=keyword) |
-                Q(description__icontains=keyword)
-            )
+            qs = search_queryset(qs, keyword, fields=(TITLE, BODY))
         
         # Apply brand filter
         brand_id = validated_data.get('brandId')
@@ -1353,9 +1297,8 @@ class ProductsViewSet(viewsets.ModelViewSet):
         order_by = validated_data.get('orderBy', [])
         # Filter out empty strings and None values from orderBy list
         order_by = [field for field in order_by if field and field.strip()]
-        # If orderBy is empty or only contains empty strings, default to newest
-        if not order_by:
-            order_by = ['newest']  # Default to newest when empty
+        # If orderBy is empty or only contains empty strings, apply_order_by
+        # orders keyword searches by relevance and everything else by newest
         qs = apply_order_by(qs, order_by)
         
         # Get total count before pagination
@@ -1447,10 +1390,7 @@ class ProductsViewSet(viewsets.ModelViewSet):
         
         # Only apply keyword filter if keyword is not empty (always includes description)
         if keyword and keyword.strip():
-            qs = qs.filter(
-                Q(name__icontains=keyword) |
-                Q(description__icontains=keyword)
-            )
+            qs = search_queryset(qs, keyword, fields=(TITLE, BODY))
         
         # Apply brand filter
         brand_id = validated_data.get('brandId')
@@ -1482,9 +1422,8 @@ class ProductsViewSet(viewsets.ModelViewSet):
         order_by = validated_data.get('orderBy', [])
         # Filter out empty strings and None values from orderBy list
         order_by = [field for field in order_by if field and field.strip()]
-        # If orderBy is empty or only contains empty strings, default to newest
-        if not order_by:
-            order_by = ['newest']  # Default to newest when empty
+        # If orderBy is empty or only contains empty strings, apply_order_by
+        # orders keyword searches by relevance and everything else by newest
         qs = apply_order_by(qs, order_by)
         
         # Get total count before pagination
@@ -1563,167 +1502,65 @@ class ProductsViewSet(viewsets.ModelViewSet):
         ],
         responses={
             200: OpenApiResponse(
-                description='Excel file download (ProductExports.xlsx). Content-Type: application/octet-stream, Content-Disposition: attachment; filename=ProductExports.xlsx',
+                description='Excel file download (ProductExports.xlsx). Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet, Content-Disposition: attachment; filename=ProductExports.xlsx. With fileType "csv": ProductExports.csv',
                 response=OpenApiTypes.BINARY
             ),
+            202: OpenApiResponse(
+                response=dict,
+                description='Large export queued as a background job; poll GET /api/v1/products/exports/{exportId}',
+                examples=[
+                    OpenApiExample(
+                        'Export queued',
+                        value={
+                            'data': {
+                                'exportId': '3f2b8c1e-7a4d-4e8b-9c11-5d0f6a7b8c9d',
+                                'status': 'queued',
+                                'fileType': 'xlsx',
+                                'rowCount': 0,
+                                'downloadUrl': None,
+                                'error': None,
+                                'createdAt': '2025-11-01T12:00:00+00:00',
+                                'startedAt': None,
+                                'finishedAt': None,
+                                'expiresAt': '2025-11-02T12:00:00+00:00'
+                            },
+                            'messages': ['Export queued; poll the status endpoint and download the file when completed'],
+                            'succeeded': True
+                        }
+                    )
+                ]
+            ),
             **DEFAULT_ERROR_RESPONSE
         }
     )
     @action(detail=False, methods=['post'], url_path='export')
     def export(self, request):
-        """Export products as Excel file matching old Swagger format."""
+        """
+        Export products as Excel (or CSV) file matching old Swagger format.
+        Exports of more than PRODUCT_EXPORT_SYNC_LIMIT rows are built in the
+        background: the response is 202 with the export job to poll.
+        """
         # Handle empty request body - all fields are optional
         request_data = request.data if request.data else {}
         serializer = ProductExportRequestSerializer(data=request_data)
         serializer.is_valid(raise_exception=True)
         
-        validated_data = serializer.validated_data
-        
-        # Build query
-        qs = Product.objects.all()
-        
-        # Apply keyword search
-        keyword = validated_data.get('keyword') or ''
-        advanced_search = validated_data.get('advancedSearch')
-        if advanced_search and isinstance(advanced_search, dict):
-            # Use keyword from advancedSearch if provided, otherwise use top-level keyword
-            advanced_keyword = advanced_search.get('keyword') or ''
-            keyword = advanced_keyword or keyword
-        
-        # Only apply keyword filter if keyword is not empty
-        if keyword and keyword.strip():
-            qs = qs.filter(
-                Q(name__icontains=keyword) |
-                Q(description__icontains=keyword)
-            )
+        validated_data = dict(serializer.validated_data)
+        file_type = validated_data.pop('fileType', 'xlsx')
         
-        # Apply brand filter
-        brand_id = validated_data.get('brandId')
-        if brand_id and brand_id.strip():
-            try:
-                from uuid import UUID
-                brand_uuid = UUID(brand_id)
-                # TODO: Filter by brand when brand relationship is implemented
-                # qs = qs.filter(brand_id=brand_uuid)
-            except (ValueError, TypeError):
-                pass  # Invalid UUID, skip filter
-        
-        # Apply rate filter (from comments)
-        min_rate = validated_data.get('minimumRate', 0)
-        max_rate = validated_data.get('maximumRate', 0)
-        if min_rate > 0 or max_rate > 0:
-            # Filter products by average rating from comments
-            # Comment model has 'product' ForeignKey with related_name='comments'
-            # and 'is_accepted' field
-            products_with_ratings = Product.objects.annotate(
-                avg_rating=Avg('comments__rate', filter=Q(comments__is_accepted=True))
-            ).filter(avg_rating__gte=min_rate if min_rate > 0 else 0)
-            
-            if max_rate > 0:
-                products_with_ratings = products_with_ratings.filter(avg_rating__lte=max_rate)
-            
-            product_ids = products_with_ratings.values_list('id', flat=True)
-            qs = qs.filter(id__in=product_ids)
-        
-        # Apply ordering using the helper function that handles old Swagger orderBy values
-        order_by = validated_data.get('orderBy', [])
-        # Filter out empty strings and None values from orderBy list
-        # Empty strings in orderBy should default to newest ordering
-        order_by = [field for field in order_by if field and field.strip()]
-        # If orderBy is empty or only contains empty strings, default to newest
-        if not order_by:
-            order_by = ['newest']  # Default to newest when empty
-        qs = apply_order_by(qs, order_by)
-        
-        # Apply pagination (for filtering, but export all matching results)
-        page_number = validated_data.get('pageNumber', 1) or 1
-        page_size = validated_data.get('pageSize', 20) or 20
-        # Note: Old Swagger exports all matching products, not just one page
-        # But we'll respect pageSize if it's reasonable (max 1000)
-        # If pageSize is 0 or not provided, export all (limit to 10000 for safety)
-        if page_size > 0 and page_size <= 1000:
-            offset = (page_number - 1) * page_size
-            qs = qs[offset:offset + page_size]
-        elif page_size == 0:
-            # Export all, but limit to 10000 for safety
-            qs = qs[:10000]
-        
-        products = list(qs)
-        
-        # Generate Excel file
         try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, Alignment
-            from django.http import HttpResponse
-            import io
-            
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Products"
-            
-            # Add headers
-            headers = [
-                'ID', 'Name', 'Description', 'Price', 'Category', 'In Stock',
-                'Is Active', 'Created At', 'Brand', 'Warranty'
-            ]
-            ws.append(headers)
-            
-            # Style header row
-            for cell in ws[1]:
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center')
-            
-            # Add product data
-            for product in products:
-                category_name = product.category.name if product.category else ''
-                brand_name = product.brand.name if hasattr(product, 'brand') and product.brand else ''
-                warranty_name = product.warranties.first().name if product.warranties.exists() else ''
-                
-                # Product model doesn't have in_stock field, use 0 as default
-                # (matching the serializer's inStock default value)
-                in_stock_value = 0
-                
-                row = [
-                    str(product.id),
-                    product.name or '',
-                    product.description or '',
-                    float(product.price_per_unit) if product.price_per_unit else 0,
-                    category_name,
-                    in_stock_value,
-                    'Yes' if product.is_active else 'No',
-                    product.created_at.strftime('%Y-%m-%d %H:%M:%S') if product.created_at else '',
-                    brand_name,
-                    warranty_name
-                ]
-                ws.append(row)
-            
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+            # Filters, ordering and pagination are applied by get_export_queryset
+            qs = get_export_queryset(validated_data)
             
-            # Save to BytesIO
-            output = io.BytesIO()
-            wb.save(output)
-            output.seek(0)
-            
-            # Create HTTP response with file
-            response = HttpResponse(
-                output.read(),
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = 'attachment; filename=ProductExports.xlsx'
-            response['Content-Length'] = len(output.getvalue())
+            if qs.count() > get_export_sync_limit():
+                export = create_export(validated_data, file_type, created_by=request.user)
+                return create_success_response(
+                    data=serialize_export(export, request),
+                    messages=['Export queued; poll the status endpoint and download the file when completed'],
+                    status_code=status.HTTP_202_ACCEPTED
+                )
             
-            return response
+            return stream_export(qs, file_type)
             
         except ImportError:
             # Fallback if openpyxl is not installed
@@ -2318,7 +2155,7 @@ class ProductsDapperView(APIView):
         """Get products in dapper context. Returns format matching old Swagger."""
         # TODO: Use id parameter for filtering if needed
         # For now, return all active products
-        products = Product.objects.filter(is_active=True).order_by('-created_at')
+        products = with_listing_data(Product.objects.filter(is_active=True).order_by('-created_at'))
         serializer = ProductCompatibilitySerializer(products, many=True, context={'request': request})
         return create_success_response(data=serializer.data)
 
@@ -2349,7 +2186,7 @@ class ProductsAllView(APIView):
 
     def get(self, request):
         """Get all products. Returns format matching old Swagger."""
-        products = Product.objects.filter(is_active=True).order_by('-created_at')
+        products = with_listing_data(Product.objects.filter(is_active=True).order_by('-created_at'))
         serializer = ProductCompatibilitySerializer(products, many=True, context={'request': request})
         return create_success_response(data=serializer.data)
 
@@ -2856,7 +2693,6 @@ class ProductsClientSearchView(APIView):
     def post(self, request):
         """Client search for products with orderBy options. Returns format matching old Swagger."""
         from zistino_apps.products.models import Category
-        from zistino_apps.compatibility.categories.serializers import get_category_integer_id_mapping
         
         serializer = ProductClientSearchRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -2876,7 +2712,7 @@ class ProductsClientSearchView(APIView):
         
         # Apply filters
         if keyword:
-            qs = qs.filter(Q(name__icontains=keyword) | Q(description__icontains=keyword))
+            qs = search_queryset(qs, keyword, fields=(TITLE, BODY))
         if brands:
             # TODO: Filter by brand name when brand relationship is implemented
             pass
@@ -2900,8 +2736,7 @@ class ProductsClientSearchView(APIView):
         total_count = qs.count()
 
         # Get category ID mapping for serializer context (use sequential IDs)
-        all_categories_global = Category.objects.filter(is_active=True).order_by('created_at', 'name')
-        global_category_id_mapping = get_category_integer_id_mapping(all_categories_global, base_id=11)
+        global_category_id_mapping = get_category_id_mapping()
 
         # Use ProductAdminSearchExtResponseSerializer for output
         product_serializer = ProductAdminSearchExtResponseSerializer(
@@ -3023,11 +2858,7 @@ class ProductsClientSearchExtView(APIView):
         
         # Apply filters
         if keyword:
-            qs = qs.filter(
-                Q(name__icontains=keyword) |
-                Q(description__icontains=keyword) |
-                Q(category__name__icontains=keyword)
-            )
+            qs = search_queryset(qs, keyword)
         if brands:
             # TODO: Filter by brand name when brand relationship is implemented
             pass
@@ -3160,7 +2991,7 @@ class ProductsClientSearchWithTagsView(APIView):
         
         # Apply filters
         if keyword:
-            qs = qs.filter(Q(name__icontains=keyword) | Q(description__icontains=keyword))
+            qs = search_queryset(qs, keyword, fields=(TITLE, BODY))
         if brands:
             # TODO: Filter by brand name when brand relationship is implemented
             pass
@@ -3329,11 +3160,7 @@ class ProductsAdminSearchExtView(APIView):
             qs = qs.filter(is_active=serializer.validated_data['isActive'])
         
         if keyword:
-            qs = qs.filter(
-                Q(name__icontains=keyword) |
-                Q(description__icontains=keyword) |
-                Q(category__name__icontains=keyword)
-            )
+            qs = search_queryset(qs, keyword)
         
         # Brand filter
         brand_id = serializer.validated_data.get('brandId')
@@ -3490,7 +3317,7 @@ class ProductsClientByCategoryIdView(APIView):
 
         qs = Product.objects.filter(category_id=id, is_active=True)
         if keyword:
-            qs = qs.filter(Q(name__icontains=keyword) | Q(description__icontains=keyword))
+            qs = search_queryset(qs, keyword, fields=(TITLE, BODY))
         
         qs = apply_order_by(qs, order_by)
         
@@ -3586,7 +3413,6 @@ class ProductsClientByCategoryTypeView(APIView):
     def _get_products_by_category_type(self, request, id):
         """Helper method to get products by category type."""
         from zistino_apps.products.models import Category
-        from zistino_apps.compatibility.categories.serializers import get_category_integer_id_mapping
         
         # Convert category type to integer
         try:
@@ -3617,8 +3443,7 @@ class ProductsClientByCategoryTypeView(APIView):
         qs = qs.order_by('-created_at')
         
         # Get category ID mapping for serializer context
-        all_categories_global = Category.objects.filter(is_active=True).order_by('created_at', 'name')
-        global_category_id_mapping = get_category_integer_id_mapping(all_categories_global, base_id=11)
+        global_category_id_mapping = get_category_id_mapping()
         category_id_mapping_for_serializer = global_category_id_mapping
 
         # Use ProductCompatibilitySerializer for output (matching list format)
@@ -3905,10 +3730,8 @@ class ProductsClientByNameView(APIView):
                 errors={'keyword': ['keyword parameter is required']}
             )
         
-        qs = Product.objects.filter(
-            Q(name__icontains=keyword) | Q(description__icontains=keyword),
-            is_active=True
-        )
+        qs = search_queryset(Product.objects.filter(is_active=True), keyword, fields=(TITLE, BODY))
+        qs = qs.order_by('-search_rank', 'name')
         
         # Limit to 5 products (or more if needed - old Swagger doesn't specify exact limit)
         products = qs[:5]
@@ -3929,6 +3752,98 @@ class ProductsClientByNameView(APIView):
         return create_success_response(data=data)
 
 
+@extend_schema(
+    tags=['Products'],
+    operation_id='products_client_autocomplete',
+    summary='Typeahead suggestions for the search box',
+    description='Suggests active products and categories, tags and blog tags whose name (or a later word of it) starts with keyword. Served from an in-memory index, without database queries.',
+    parameters=[
+        OpenApiParameter(
+            name='keyword',
+            type=str,
+            location=OpenApiParameter.QUERY,
+            required=True,
+            description='Partial keyword typed by the user'
+        ),
+        OpenApiParameter(
+            name='count',
+            type=int,
+            location=OpenApiParameter.QUERY,
+            required=False,
+            description=f'Maximum number of suggestions (default {AUTOCOMPLETE_DEFAULT_COUNT}, max {AUTOCOMPLETE_MAX_COUNT})'
+        ),
+        OpenApiParameter(
+            name='types',
+            type=str,
+            location=OpenApiParameter.QUERY,
+            required=False,
+            description='Comma-separated suggestion types: product, category, tag, blogtag (default: all)'
+        )
+    ],
+    responses={
+        200: OpenApiResponse(
+            response=serializers.Serializer,
+            description='Suggestions, names starting with keyword first',
+            examples=[
+                OpenApiExample(
+                    'Success response',
+                    value={
+                        'messages': [],
+                        'succeeded': True,
+                        'data': [
+                            {
+                                'title': 'شامپو کلیر',
+                                'value': '94860000-b419-c60d-2b41-08dc425c06b1',
+                                'type': 'product'
+                            }
+                        ]
+                    }
+                )
+            ]
+        ),
+        **DEFAULT_ERROR_RESPONSE
+    }
+)
+class ProductsClientAutocompleteView(APIView):
+    """GET /api/v1/products/client/autocomplete"""
+    permission_classes = [AllowAny]
+    # Public and called on every keystroke: skip token authentication
+    authentication_classes = []
+
+    def get(self, request):
+        """Get top suggestions for a partial keyword."""
+        keyword = request.query_params.get('keyword', '').strip()
+        if not keyword:
+            return create_error_response(
+                error_message='keyword parameter is required',
+                status_code=status.HTTP_400_BAD_REQUEST,
+                errors={'keyword': ['keyword parameter is required']}
+            )
+
+        try:
+            count = int(request.query_params.get('count') or AUTOCOMPLETE_DEFAULT_COUNT)
+        except (TypeError, ValueError):
+            count = AUTOCOMPLETE_DEFAULT_COUNT
+        count = max(1, min(count, AUTOCOMPLETE_MAX_COUNT))
+
+        types = SUGGESTION_TYPES
+        if request.query_params.get('types'):
+            types = tuple(
+                value.strip().lower() for value in request.query_params['types'].split(',')
+                if value.strip().lower() in SUGGESTION_TYPES
+            )
+
+        data = [
+            {
+                'title': suggestion.title,
+                'value': suggestion.value,
+                'type': suggestion.type
+            }
+            for suggestion in suggest(keyword, count=count, types=types)
+        ]
+        return create_success_response(data=data)
+
+
 @extend_schema(
     tags=['Products'],
     operation_id='products_client_bytagname',
@@ -4022,7 +3937,7 @@ class ProductsClientByTagNameView(APIView):
         
         # Apply filters
         if keyword:
-            product_qs = product_qs.filter(Q(name__icontains=keyword) | Q(description__icontains=keyword))
+            product_qs = search_queryset(product_qs, keyword, fields=(TITLE, BODY))
         if brand_id:
             # TODO: Filter by brand when brand relationship is implemented
             pass
@@ -4070,7 +3985,8 @@ class ProductsClientByTagNameView(APIView):
         
         # Apply keyword filter to blog posts
         if keyword:
-            blog_qs = blog_qs.filter(Q(title__icontains=keyword) | Q(content__icontains=keyword) | Q(excerpt__icontains=keyword))
+            blog_qs = search_queryset(blog_qs, keyword, fields=(TITLE, BODY))
+            blog_qs = blog_qs.order_by('-search_rank', '-published_at', '-created_at')
         
         # TODO: Filter blog posts by tag name when tag system is fully implemented
         # For now, filter by keyword only
@@ -4320,7 +4236,7 @@ class ProductsClientPrefilterMaxMinView(APIView):
         
         # Filter by name if provided
         if Name:
-            qs = qs.filter(Q(name__icontains=Name) | Q(category__name__icontains=Name))
+            qs = search_queryset(qs, Name, fields=(TITLE, KEYWORDS))
         
         # Get min and max prices
         from django.db.models import Min, Max
@@ -4372,10 +4288,7 @@ class ProductsClientFilterView(APIView):
 
     def get(self, request, name):
         """Get products using filter by name. Returns format matching old Swagger."""
-        qs = Product.objects.filter(
-            Q(name__icontains=name) | Q(description__icontains=name),
-            is_active=True
-        )
+        qs = search_queryset(Product.objects.filter(is_active=True), name, fields=(TITLE, BODY))
         
         # Create list of name/id objects matching old Swagger format
         data = [
@@ -4436,10 +4349,7 @@ class ProductsClientFilterByTypeView(APIView):
     def get(self, request, type, name):
         """Get products using filter by type and name. Returns format matching old Swagger."""
         # TODO: Implement type-based filtering
-        qs = Product.objects.filter(
-            Q(name__icontains=name) | Q(description__icontains=name),
-            is_active=True
-        )
+        qs = search_queryset(Product.objects.filter(is_active=True), name, fields=(TITLE, BODY))
         
         # Create list of name/id objects matching old Swagger format
         data = [
@@ -4453,3 +4363,100 @@ class ProductsClientFilterByTypeView(APIView):
         # Old Swagger returns array directly (not wrapped in response format)
         return Response(data)
 
+
+
+@extend_schema(
+    tags=['Products'],
+    operation_id='products_export_status',
+    summary='Get the status of a background product export',
+    responses={
+        200: OpenApiResponse(
+            response=dict,
+            description='Export job; downloadUrl is set once the file is ready',
+            examples=[
+                OpenApiExample(
+                    'Completed export',
+                    value={
+                        'data': {
+                            'exportId': '3f2b8c1e-7a4d-4e8b-9c11-5d0f6a7b8c9d',
+                            'status': 'completed',
+                            'fileType': 'xlsx',
+                            'rowCount': 48210,
+                            'downloadUrl': 'https://example.com/api/v1/products/exports/3f2b8c1e-7a4d-4e8b-9c11-5d0f6a7b8c9d/download?token=...',
+                            'error': None,
+                            'createdAt': '2025-11-01T12:00:00+00:00',
+                            'startedAt': '2025-11-01T12:00:01+00:00',
+                            'finishedAt': '2025-11-01T12:00:40+00:00',
+                            'expiresAt': '2025-11-02T12:00:00+00:00'
+                        },
+                        'messages': [],
+                        'succeeded': True
+                    }
+                )
+            ]
+        ),
+        404: {'description': 'Export not found'}
+    }
+)
+class ProductsExportStatusView(APIView):
+    """GET /api/v1/products/exports/{exportId} - Background export progress"""
+    permission_classes = [IsAuthenticated, IsManager]
+
+    def get(self, request, export_id):
+        try:
+            export = ProductExport.objects.get(pk=export_id)
+        except ProductExport.DoesNotExist:
+            return create_error_response(
+                error_message='Export not found',
+                status_code=status.HTTP_404_NOT_FOUND,
+                errors={'id': ['Export not found']}
+            )
+        return create_success_response(data=serialize_export(export, request))
+
+
+@extend_schema(
+    tags=['Products'],
+    operation_id='products_export_download',
+    summary='Download the file of a completed product export',
+    parameters=[
+        OpenApiParameter(
+            name='token',
+            type=str,
+            location=OpenApiParameter.QUERY,
+            required=True,
+            description='Download token from the export downloadUrl'
+        )
+    ],
+    responses={
+        200: OpenApiResponse(
+            description='Export file (ProductExports.xlsx or ProductExports.csv)',
+            response=OpenApiTypes.BINARY
+        ),
+        404: {'description': 'Export not found, not completed, or expired'}
+    }
+)
+class ProductsExportDownloadView(APIView):
+    """GET /api/v1/products/exports/{exportId}/download?token=... - The token authorizes the download"""
+    permission_classes = [AllowAny]
+
+    def get(self, request, export_id):
+        token = request.query_params.get('token', '')
+        export = ProductExport.objects.filter(pk=export_id, status='completed').first()
+        if (
+            export is None
+            or not export.file
+            or not token
+            or not secrets.compare_digest(token, export.download_token)
+            or is_export_expired(export)
+        ):
+            return create_error_response(
+                error_message='Export not found',
+                status_code=status.HTTP_404_NOT_FOUND,
+                errors={'id': ['Export not found or expired']}
+            )
+        return FileResponse(
+            export.file.open('rb'),
+            as_attachment=True,
+            filename=f'ProductExports.{export.file_type}',
+            content_type=EXPORT_FILE_TYPES[export.file_type]
+        )
@@ -0,0 +1 @@
+# Full-text search for products and blog posts
@@ -0,0 +1,259 @@
+"""
+Typeahead suggestions for the client search box.
+
+The names of active products and categories, product tags and blog tags
+are kept in a process-local AutocompleteIndex: sorted arrays of normalized
+keys (see search.normalization) per suggestion type, searched with bisect.
+A name is found by its first word and by every later word ("box" finds
+"Cardboard box"), and suggestions whose name starts with the query come
+first. Lookups never touch the database.
+
+Saving or deleting one of these rows records the change in the shared cache
+under a new version number, after the transaction commits. Every worker
+replays the changes it has not seen on its next lookup, and only reloads
+the whole index from the database when changes have expired or it has
+fallen more than MAX_REPLAY versions behind.
+"""
+import heapq
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .normalization import query_terms
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_VERSION_KEY = 'compat:autocomplete_version'
+AUTOCOMPLETE_CHANGE_KEY = 'compat:autocomplete_change:{version}'
+CHANGE_TIMEOUT = 60 * 60
+MAX_REPLAY = 500
+
+PRODUCT = 'product'
+CATEGORY = 'category'
+TAG = 'tag'
+BLOG_TAG = 'blogtag'
+SUGGESTION_TYPES = (PRODUCT, CATEGORY, TAG, BLOG_TAG)
+
+Suggestion = namedtuple('Suggestion', ['type', 'value', 'title'])
+
+
+def get_keys(title):
+    """Normalized keys of a name: the whole name, then the name from each later word."""
+    terms = query_terms(title)
+    return [' '.join(terms[position:]) for position in range(len(terms))]
+
+
+class AutocompleteIndex:
+    """
+    Sorted prefix index of suggestions, with separate arrays per suggestion
+    type so a lookup restricted to some types only bisects those.
+    Not thread-safe; guarded by the module lock.
+    """
+
+    def __init__(self, suggestions=()):
+        self.suggestions = {}  # (type, value) -> Suggestion
+        # type -> sorted (key, value), for whole names and from each later word
+        self.name_keys = {suggestion_type: [] for suggestion_type in SUGGESTION_TYPES}
+        self.word_keys = {suggestion_type: [] for suggestion_type in SUGGESTION_TYPES}
+        for suggestion in suggestions:
+            self._add_keys(suggestion, keep_sorted=False)
+        for entries in (*self.name_keys.values(), *self.word_keys.values()):
+            entries.sort()
+
+    def __len__(self):
+        return len(self.suggestions)
+
+    def _entries(self, suggestion_type, position):
+        keys = self.name_keys if position == 0 else self.word_keys
+        return keys.setdefault(suggestion_type, [])
+
+    def _add_keys(self, suggestion, keep_sorted=True):
+        self.suggestions[(suggestion.type, suggestion.value)] = suggestion
+        for position, key in enumerate(get_keys(suggestion.title)):
+            entries = self._entries(suggestion.type, position)
+            if keep_sorted:
+                insort(entries, (key, suggestion.value))
+            else:
+                entries.append((key, suggestion.value))
+
+    def add(self, suggestion):
+        self.remove(suggestion.type, suggestion.value)
+        self._add_keys(suggestion)
+
+    def remove(self, suggestion_type, value):
+        suggestion = self.suggestions.pop((suggestion_type, value), None)
+        if suggestion is None:
+            return
+        for position, key in enumerate(get_keys(suggestion.title)):
+            entries = self._entries(suggestion_type, position)
+            entry = (key, value)
+            index = bisect_left(entries, entry)
+            if index < len(entries) and entries[index] == entry:
+                del entries[index]
+
+    @staticmethod
+    def _prefixed(entries, suggestion_type, prefix):
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and entries[position][0].startswith(prefix):
+            key, value = entries[position]
+            yield key, suggestion_type, value
+            position += 1
+
+    def suggest(self, keyword, count=10, types=SUGGESTION_TYPES):
+        """Up to count suggestions whose name (or a later word of it) starts with keyword."""
+        types = [suggestion_type for suggestion_type in SUGGESTION_TYPES if suggestion_type in types]
+        if not types or count <= 0:
+            return []
+        prefix = ' '.join(query_terms(keyword))
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        for keys in (self.name_keys, self.word_keys):
+            # Merge the per-type ranges in (key, type, value) order
+            matches = heapq.merge(*(
+                self._prefixed(keys[suggestion_type], suggestion_type, prefix) for suggestion_type in types
+            ))
+            for _key, suggestion_type, value in matches:
+                if (suggestion_type, value) in seen:
+                    continue
+                seen.add((suggestion_type, value))
+                results.append(self.suggestions[(suggestion_type, value)])
+                if len(results) >= count:
+                    return results
+        return results
+
+
+def get_suggestion(instance):
+    """The Suggestion of an indexed row, or None if the row is not suggested (e.g. inactive)."""
+    from zistino_apps.content.models import BlogTag, Tag
+    from zistino_apps.products.models import Category, Product
+
+    if isinstance(instance, Product):
+        return Suggestion(PRODUCT, str(instance.pk), instance.name) if instance.is_active else None
+    if isinstance(instance, Category):
+        return Suggestion(CATEGORY, str(instance.pk), instance.name) if instance.is_active else None
+    if isinstance(instance, Tag):
+        return Suggestion(TAG, str(instance.pk), instance.text)
+    if isinstance(instance, BlogTag):
+        return Suggestion(BLOG_TAG, str(instance.pk), instance.name)
+    return None
+
+
+def get_suggestion_type(model):
+    from zistino_apps.content.models import BlogTag, Tag
+    from zistino_apps.products.models import Category, Product
+
+    return {Product: PRODUCT, Category: CATEGORY, Tag: TAG, BlogTag: BLOG_TAG}.get(model)
+
+
+def build_autocomplete_index():
+    """Load all suggested names from the database into a new AutocompleteIndex."""
+    from zistino_apps.content.models import BlogTag, Tag
+    from zistino_apps.products.models import Category, Product
+
+    suggestions = []
+    for pk, name in Product.objects.filter(is_active=True).values_list('pk', 'name').iterator():
+        suggestions.append(Suggestion(PRODUCT, str(pk), name))
+    for pk, name in Category.objects.filter(is_active=True).values_list('pk', 'name'):
+        suggestions.append(Suggestion(CATEGORY, str(pk), name))
+    for pk, text in Tag.objects.values_list('pk', 'text'):
+        suggestions.append(Suggestion(TAG, str(pk), text))
+    for pk, name in BlogTag.objects.values_list('pk', 'name'):
+        suggestions.append(Suggestion(BLOG_TAG, str(pk), name))
+    return AutocompleteIndex(suggestions)
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def _current_version():
+    try:
+        return cache.get(AUTOCOMPLETE_VERSION_KEY, 0)
+    except Exception:
+        # Cache unavailable: keep serving the local index
+        logger.warning('Autocomplete version check failed; using local index', exc_info=True)
+        return _index_version
+
+
+def _apply_changes(index, changes):
+    for action, suggestion_type, value, title in changes:
+        if action == 'add':
+            index.add(Suggestion(suggestion_type, value, title))
+        else:
+            index.remove(suggestion_type, value)
+
+
+def _catch_up(version):
+    """Replay the changes since the local version, or reload. Must hold _lock."""
+    global _index, _index_version
+    if _index is not None and _index_version is not None and 0 < version - _index_version <= MAX_REPLAY:
+        keys = [AUTOCOMPLETE_CHANGE_KEY.format(version=number) for number in range(_index_version + 1, version + 1)]
+        try:
+            changes = cache.get_many(keys)
+        except Exception:
+            changes = {}
+        if len(changes) == len(keys):
+            _apply_changes(_index, [changes[key] for key in keys])
+            _index_version = version
+            return
+    # Read before loading: changes committed meanwhile are replayed next time
+    _index = build_autocomplete_index()
+    _index_version = version
+
+
+def suggest(keyword, count=10, types=SUGGESTION_TYPES):
+    """Top suggestions for a partial keyword, served from the process-local index."""
+    if not any(suggestion_type in SUGGESTION_TYPES for suggestion_type in types):
+        return []
+    version = _current_version()
+    with _lock:
+        if _index is None or version != _index_version:
+            _catch_up(version)
+        return _index.suggest(keyword, count=count, types=types)
+
+
+def publish_change(action, suggestion_type, value, title=''):
+    """Record an index change for every worker, once the current transaction commits."""
+    def publish():
+        try:
+            cache.add(AUTOCOMPLETE_VERSION_KEY, 0, timeout=None)
+            version = cache.incr(AUTOCOMPLETE_VERSION_KEY)
+            cache.set(
+                AUTOCOMPLETE_CHANGE_KEY.format(version=version),
+                (action, suggestion_type, value, title),
+                timeout=CHANGE_TIMEOUT,
+            )
+        except Exception:
+            logger.warning('Failed to publish autocomplete change', exc_info=True)
+
+    transaction.on_commit(publish)
+
+
+def update_suggestion_on_save(sender, instance, **kwargs):
+    suggestion = get_suggestion(instance)
+    if suggestion is not None:
+        publish_change('add', *suggestion)
+    else:
+        publish_change('remove', get_suggestion_type(sender), str(instance.pk))
+
+
+def remove_suggestion_on_delete(sender, instance, **kwargs):
+    publish_change('remove', get_suggestion_type(sender), str(instance.pk))
+
+
+def connect_autocomplete_signals():
+    """Publish index changes when a product, category, tag or blog tag is saved or deleted."""
+    from django.db.models.signals import post_save, post_delete
+    from zistino_apps.content.models import BlogTag, Tag
+    from zistino_apps.products.models import Category, Product
+
+    for model in (Product, Category, Tag, BlogTag):
+        post_save.connect(update_suggestion_on_save, sender=model, dispatch_uid=f'autocomplete_post_save_{model._meta.label_lower}')
+        post_delete.connect(remove_suggestion_on_delete, sender=model, dispatch_uid=f'autocomplete_post_delete_{model._meta.label_lower}')
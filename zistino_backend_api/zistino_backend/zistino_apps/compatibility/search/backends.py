@@ -0,0 +1,224 @@
+"""
+Search backends.
+
+A backend stores the normalized terms of each document and filters a
+queryset down to the rows matching every query term (as a word prefix),
+annotated with a relevance rank (RANK_ANNOTATION). The backend is chosen
+with the SEARCH_BACKEND setting:
+
+    PostgresSearchBackend  SearchDocument rows with a GIN-indexed tsvector
+    LocalSearchBackend     in-process inverted index, for tests and sqlite
+"""
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import models
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast
+from django.utils.module_loading import import_string
+
+from .documents import BODY, KEYWORDS, TITLE
+from .models import SearchDocument
+
+DEFAULT_SEARCH_BACKEND = 'zistino_apps.compatibility.search.backends.PostgresSearchBackend'
+RANK_ANNOTATION = 'search_rank'
+
+
+class SearchBackend:
+    """Interface of the search backends. Documents map object ids (str) to SearchFields of term lists."""
+
+    def index(self, model_label, documents):
+        raise NotImplementedError
+
+    def remove(self, model_label, object_ids):
+        raise NotImplementedError
+
+    def clear(self, model_label):
+        raise NotImplementedError
+
+    def filter(self, queryset, terms, fields):
+        """Return queryset rows matching all terms in the given fields, annotated with RANK_ANNOTATION."""
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Full-text search over SearchDocument.search_vector (PostgreSQL only)."""
+    # Terms are normalized in Python; 'simple' only lower-cases, without stemming or stop words
+    config = 'simple'
+    weights = {TITLE: 'A', BODY: 'B', KEYWORDS: 'C'}
+
+    def get_vector(self):
+        return (
+            SearchVector('title', weight='A', config=self.config)
+            + SearchVector('body', weight='B', config=self.config)
+            + SearchVector('keywords', weight='C', config=self.config)
+        )
+
+    def index(self, model_label, documents):
+        if not documents:
+            return
+        SearchDocument.objects.bulk_create(
+            [
+                SearchDocument(
+                    model_label=model_label,
+                    object_id=object_id,
+                    title=' '.join(fields.title),
+                    body=' '.join(fields.body),
+                    keywords=' '.join(fields.keywords),
+                )
+                for object_id, fields in documents.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['model_label', 'object_id'],
+            update_fields=['title', 'body', 'keywords', 'updated_at'],
+        )
+        SearchDocument.objects.filter(
+            model_label=model_label,
+            object_id__in=list(documents),
+        ).update(search_vector=self.get_vector())
+
+    def remove(self, model_label, object_ids):
+        SearchDocument.objects.filter(model_label=model_label, object_id__in=list(object_ids)).delete()
+
+    def clear(self, model_label):
+        SearchDocument.objects.filter(model_label=model_label).delete()
+
+    def get_query(self, terms, fields):
+        # Terms only contain letters and digits, so they are safe in a raw tsquery
+        weights = ''.join(self.weights[field] for field in fields)
+        return SearchQuery(
+            ' & '.join(f'{term}:*{weights}' for term in terms),
+            search_type='raw',
+            config=self.config,
+        )
+
+    def filter(self, queryset, terms, fields):
+        model = queryset.model
+        query = self.get_query(terms, fields)
+        documents = SearchDocument.objects.filter(model_label=model._meta.label_lower, search_vector=query)
+        pk_field = models.UUIDField() if isinstance(model._meta.pk, models.UUIDField) else models.BigIntegerField()
+        rank = (
+            documents.filter(object_id=Cast(OuterRef('pk'), models.CharField()))
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .values('rank')[:1]
+        )
+        return queryset.filter(
+            pk__in=documents.annotate(matched_id=Cast('object_id', pk_field)).values('matched_id')
+        ).annotate(**{RANK_ANNOTATION: Subquery(rank, output_field=FloatField())})
+
+
+class LocalSearchBackend(SearchBackend):
+    """
+    In-process inverted index. Only sees documents indexed by this process,
+    so it is meant for tests and local development.
+    """
+    # Same relative weights as ts_rank's defaults for A, B and C
+    weights = {TITLE: 1.0, BODY: 0.4, KEYWORDS: 0.2}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents = {}  # model_label -> {object_id: {term: score per field}}
+        self._postings = {}   # model_label -> {term: set of object_ids}
+        self._terms = {}      # model_label -> sorted terms, for prefix lookups
+
+    def _remove(self, model_label, object_id):
+        term_scores = self._documents.get(model_label, {}).pop(object_id, None)
+        if not term_scores:
+            return
+        postings = self._postings[model_label]
+        for term in term_scores:
+            postings[term].discard(object_id)
+            if not postings[term]:
+                del postings[term]
+        self._terms.pop(model_label, None)
+
+    def index(self, model_label, documents):
+        with self._lock:
+            model_documents = self._documents.setdefault(model_label, {})
+            postings = self._postings.setdefault(model_label, {})
+            for object_id, fields in documents.items():
+                self._remove(model_label, object_id)
+                term_scores = {}
+                for field, weight in self.weights.items():
+                    for term in getattr(fields, field):
+                        scores = term_scores.setdefault(term, dict.fromkeys(self.weights, 0.0))
+                        scores[field] += weight
+                model_documents[object_id] = term_scores
+                for term in term_scores:
+                    postings.setdefault(term, set()).add(object_id)
+            self._terms.pop(model_label, None)
+
+    def remove(self, model_label, object_ids):
+        with self._lock:
+            for object_id in object_ids:
+                self._remove(model_label, str(object_id))
+
+    def clear(self, model_label):
+        with self._lock:
+            self._documents.pop(model_label, None)
+            self._postings.pop(model_label, None)
+            self._terms.pop(model_label, None)
+
+    def _prefixed_terms(self, model_label, prefix):
+        terms = self._terms.get(model_label)
+        if terms is None:
+            terms = self._terms[model_label] = sorted(self._postings.get(model_label, ()))
+        position = bisect_left(terms, prefix)
+        while position < len(terms) and terms[position].startswith(prefix):
+            yield terms[position]
+            position += 1
+
+    def get_scores(self, model_label, terms, fields):
+        """{object_id: rank} of the documents matching every term in the given fields."""
+        with self._lock:
+            documents = self._documents.get(model_label, {})
+            postings = self._postings.get(model_label, {})
+            scores = None
+            for term in terms:
+                term_scores = {}
+                for indexed_term in self._prefixed_terms(model_label, term):
+                    for object_id in postings[indexed_term]:
+                        field_scores = documents[object_id][indexed_term]
+                        score = sum(field_scores[field] for field in fields)
+                        if score:
+                            term_scores[object_id] = term_scores.get(object_id, 0.0) + score
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        object_id: scores[object_id] + score
+                        for object_id, score in term_scores.items()
+                        if object_id in scores
+                    }
+                if not scores:
+                    break
+            return scores or {}
+
+    def filter(self, queryset, terms, fields):
+        scores = self.get_scores(queryset.model._meta.label_lower, terms, fields)
+        if not scores:
+            return queryset.none().annotate(**{RANK_ANNOTATION: Value(0.0, output_field=FloatField())})
+        rank = Case(
+            *[When(pk=object_id, then=Value(score)) for object_id, score in scores.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=list(scores)).annotate(**{RANK_ANNOTATION: rank})
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_search_backend():
+    """Return the backend instance configured by the SEARCH_BACKEND setting."""
+    path = getattr(settings, 'SEARCH_BACKEND', DEFAULT_SEARCH_BACKEND)
+    backend = _backends.get(path)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(path)
+            if backend is None:
+                backend = _backends[path] = import_string(path)()
+    return backend
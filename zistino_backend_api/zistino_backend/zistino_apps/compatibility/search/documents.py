@@ -0,0 +1,51 @@
+"""
+Searchable models and the text each one contributes to the search index.
+"""
+from collections import namedtuple
+
+from django.apps import apps
+
+# Source text of a document; each field is normalized before indexing
+SearchFields = namedtuple('SearchFields', ['title', 'body', 'keywords'])
+
+# Field groups that a search can be restricted to
+TITLE = 'title'
+BODY = 'body'
+KEYWORDS = 'keywords'
+ALL_FIELDS = (TITLE, BODY, KEYWORDS)
+
+
+def product_document(product):
+    return SearchFields(
+        title=product.name,
+        body=product.description,
+        keywords=product.category.name if product.category_id else '',
+    )
+
+
+def blog_post_document(post):
+    return SearchFields(
+        title=post.title,
+        body=f'{post.excerpt}\n{post.content}',
+        keywords=post.author_name,
+    )
+
+
+# Model label -> (document builder, select_related fields used by the builder)
+SEARCH_MODELS = {
+    'products.Product': (product_document, ('category',)),
+    'content.BlogPost': (blog_post_document, ()),
+}
+
+
+def get_search_models():
+    """Return (model, builder, select_related) for every searchable model."""
+    return [
+        (apps.get_model(label), builder, select_related)
+        for label, (builder, select_related) in SEARCH_MODELS.items()
+    ]
+
+
+def get_document_builder(model):
+    """Return (builder, select_related) for a model class, or None if it is not searchable."""
+    return SEARCH_MODELS.get(model._meta.label)
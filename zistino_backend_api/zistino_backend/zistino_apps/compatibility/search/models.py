@@ -0,0 +1,38 @@
+"""
+Models for full-text search.
+"""
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Normalized searchable text of one product or blog post.
+
+    The text fields hold the normalized terms of the source row (see
+    search.normalization); search_vector is built from them with weights
+    A (title), B (body) and C (keywords) and is GIN-indexed, so keyword
+    searches never scan the source tables.
+    """
+    id = models.BigAutoField(primary_key=True)
+    model_label = models.CharField(max_length=100, help_text='Lower-cased model label (e.g., products.product)')
+    object_id = models.CharField(max_length=64, help_text='Primary key of the indexed row, as a string')
+    title = models.TextField(blank=True, help_text='Normalized terms of the title (weight A)')
+    body = models.TextField(blank=True, help_text='Normalized terms of the body (weight B)')
+    keywords = models.TextField(blank=True, help_text='Normalized terms of related names (weight C)')
+    search_vector = SearchVectorField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'compatibility'
+        db_table = 'search_documents'
+        verbose_name = 'Search Document'
+        verbose_name_plural = 'Search Documents'
+        unique_together = ('model_label', 'object_id')
+        indexes = [
+            GinIndex(fields=['search_vector'], name='search_docs_vector_gin'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label} {self.object_id}"
@@ -0,0 +1,66 @@
+"""
+Persian-aware text normalization for search.
+
+Persian text reaches the database in several spellings of the same word:
+Arabic Yeh/Kaf (ي ك) instead of Persian Yeh/Keheh (ی ک), optional
+diacritics and tatweel, Persian or Arabic digits, and words joined with a
+zero-width non-joiner (ZWNJ, e.g. کتاب‌ها) or written together or apart.
+Documents and queries go through the same normalization, so any of these
+spellings finds the others.
+"""
+import re
+
+ZWNJ = '\u200c'
+
+CHARACTER_MAP = str.maketrans({
+    'ي': 'ی',  # Arabic Yeh
+    'ى': 'ی',  # Alef Maksura
+    'ك': 'ک',  # Arabic Kaf
+    'ة': 'ه',  # Teh Marbuta
+    'ۀ': 'ه',  # Heh with Yeh above
+    'أ': 'ا',
+    'إ': 'ا',
+    'ٱ': 'ا',
+    '\u200d': ZWNJ,  # zero-width joiner
+    '\u00ad': ZWNJ,  # soft hyphen
+    **{chr(0x06F0 + digit): str(digit) for digit in range(10)},  # Persian digits
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic digits
+})
+
+# Harakat, superscript alef and tatweel
+IGNORED_CHARACTERS = re.compile('[\u064b-\u065f\u0670\u0640]')
+
+# Runs of letters/digits, possibly joined by ZWNJ
+WORD_PATTERN = re.compile(f'[^\\W_]+(?:{ZWNJ}[^\\W_]+)*')
+
+
+def normalize_text(text):
+    """Return text with unified Persian characters and digits, lower-cased."""
+    if not text:
+        return ''
+    text = IGNORED_CHARACTERS.sub('', str(text).translate(CHARACTER_MAP))
+    return text.casefold()
+
+
+def document_terms(text):
+    """
+    Terms stored for a document field, in order. A ZWNJ-joined word yields
+    the joined word and each of its parts, so both کتابها and کتاب match it.
+    """
+    terms = []
+    for word in WORD_PATTERN.findall(normalize_text(text)):
+        parts = word.split(ZWNJ)
+        terms.append(''.join(parts))
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+def query_terms(text):
+    """Distinct terms of a search query; ZWNJ-joined words are matched joined."""
+    terms = []
+    for word in WORD_PATTERN.findall(normalize_text(text)):
+        term = word.replace(ZWNJ, '')
+        if term not in terms:
+            terms.append(term)
+    return terms
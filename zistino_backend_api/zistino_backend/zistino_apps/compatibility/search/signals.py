@@ -0,0 +1,40 @@
+"""
+Signals that keep the search index in sync with the searchable models.
+"""
+from django.db.models.signals import post_save, post_delete
+
+from .documents import get_search_models
+from .utils import index_instances, index_objects, remove_objects
+
+
+def index_on_save(sender, instance, **kwargs):
+    index_instances(sender, [instance])
+
+
+def remove_on_delete(sender, instance, **kwargs):
+    remove_objects(sender, [instance.pk])
+
+
+def reindex_category_products(sender, instance, **kwargs):
+    """Category names are indexed with their products (weight C)."""
+    from zistino_apps.products.models import Product
+
+    index_objects(Product, Product.objects.filter(category=instance).values_list('pk', flat=True))
+
+
+def connect_search_signals():
+    """Connect the index signals for every model in SEARCH_MODELS."""
+    from zistino_apps.products.models import Category
+
+    for model, _builder, _select_related in get_search_models():
+        post_save.connect(
+            index_on_save,
+            sender=model,
+            dispatch_uid=f'search_post_save_{model._meta.label_lower}',
+        )
+        post_delete.connect(
+            remove_on_delete,
+            sender=model,
+            dispatch_uid=f'search_post_delete_{model._meta.label_lower}',
+        )
+    post_save.connect(reindex_category_products, sender=Category, dispatch_uid='search_post_save_category')
@@ -0,0 +1,58 @@
+"""
+Utility functions for keyword search and keeping the search index in sync.
+"""
+from .backends import RANK_ANNOTATION, get_search_backend
+from .documents import ALL_FIELDS, SearchFields, get_document_builder
+from .normalization import document_terms, query_terms
+
+
+def search_queryset(queryset, keyword, fields=ALL_FIELDS):
+    """
+    Filter a queryset of a searchable model to the rows matching keyword,
+    annotated with RANK_ANNOTATION ('search_rank'). Every word of the keyword must match the
+    start of a word in one of the given fields (title, body, keywords).
+    """
+    terms = query_terms(keyword)
+    if not terms:
+        return queryset.none()
+    return get_search_backend().filter(queryset, terms, fields)
+
+
+def is_ranked(queryset):
+    """True if the queryset was filtered by search_queryset()."""
+    return RANK_ANNOTATION in queryset.query.annotations
+
+
+def build_document(instance, builder):
+    fields = builder(instance)
+    return SearchFields(*(document_terms(value) for value in fields))
+
+
+def index_instances(model, instances):
+    """Store the search documents of saved instances of a searchable model."""
+    spec = get_document_builder(model)
+    if not spec:
+        return 0
+    builder = spec[0]
+    documents = {str(instance.pk): build_document(instance, builder) for instance in instances}
+    get_search_backend().index(model._meta.label_lower, documents)
+    return len(documents)
+
+
+def index_objects(model, object_ids):
+    """Load rows by primary key and (re)index them; missing rows are removed from the index."""
+    spec = get_document_builder(model)
+    if not spec:
+        return 0
+    object_ids = list(object_ids)
+    instances = list(model.objects.select_related(*spec[1]).filter(pk__in=object_ids))
+    found = {str(instance.pk) for instance in instances}
+    missing = [str(object_id) for object_id in object_ids if str(object_id) not in found]
+    if missing:
+        remove_objects(model, missing)
+    return index_instances(model, instances)
+
+
+def remove_objects(model, object_ids):
+    """Drop the search documents of deleted rows."""
+    get_search_backend().remove(model._meta.label_lower, [str(object_id) for object_id in object_ids])
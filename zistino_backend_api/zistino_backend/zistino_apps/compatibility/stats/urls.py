@@ -1,6 +1,6 @@
 """
 URL patterns for Stats compatibility layer.
-Provides all 2 endpoints matching Flutter app expectations.
+Provides the 2 endpoints matching Flutter app expectations plus auth cache statistics.
 """
 from django.urls import path
 from . import views
@@ -8,5 +8,6 @@ from . import views
 urlpatterns = [
     path('', views.StatsView.as_view(), name='stats'),
     path('chart', views.StatsChartView.as_view(), name='stats-chart'),
+    path('auth-cache', views.StatsAuthCacheView.as_view(), name='stats-auth-cache'),
 ]
 
@@ -11,6 +11,7 @@ from django.contrib.auth import get_user_model
 
 from zistino_apps.users.permissions import IsManager
 from zistino_apps.compatibility.utils import create_success_response, create_error_response
+from zistino_apps.compatibility.auth_cache import get_auth_cache_stats
 from zistino_apps.compatibility.roles.models import Role
 from zistino_apps.products.models import Product, Brand
 
@@ -130,3 +131,46 @@ class StatsChartView(APIView):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 errors={'error': [str(e)]}
             )
+
+
+@extend_schema(
+    tags=['Stats'],
+    operation_id='stats_auth_cache',
+    summary='Get authentication cache statistics',
+    description='Returns hit counters and the hit rate of the JWT authentication user cache across all workers. Counters are flushed by each worker every 100 lookups.',
+    responses={
+        200: OpenApiResponse(
+            response=dict,
+            description='Authentication cache statistics',
+            examples=[
+                OpenApiExample(
+                    'Success Response',
+                    value={
+                        "data": {
+                            "localHits": 9120,
+                            "sharedHits": 640,
+                            "misses": 240,
+                            "lookups": 10000,
+                            "hitRate": 0.976
+                        },
+                        "messages": [],
+                        "succeeded": True
+                    }
+                )
+            ]
+        )
+    }
+)
+class StatsAuthCacheView(APIView):
+    """GET /api/v1/stats/auth-cache - Get authentication cache statistics"""
+    permission_classes = [IsAuthenticated, IsManager]
+
+    def get(self, request):
+        try:
+            return create_success_response(data=get_auth_cache_stats(), messages=[])
+        except Exception as e:
+            return create_error_response(
+                error_message=f'An error occurred: {str(e)}',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                errors={'error': [str(e)]}
+            )
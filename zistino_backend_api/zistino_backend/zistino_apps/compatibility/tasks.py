@@ -0,0 +1,51 @@
+"""
+Celery tasks for the compatibility layer.
+"""
+import logging
+from celery import shared_task
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(acks_late=True)
+def build_product_export_task(export_id):
+    """
+    Build a large product export into media storage (see
+    compatibility.products.exports). Acknowledged late, so an export
+    interrupted by a worker crash is redelivered.
+    """
+    from zistino_apps.compatibility.products.exports import run_export
+
+    try:
+        summary = run_export(export_id)
+        summary['success'] = True
+        return summary
+    except Exception as e:
+        logger.error(f"❌ Error in build_product_export_task: {str(e)}", exc_info=True)
+        return {
+            'success': False,
+            'error': str(e),
+            'timestamp': timezone.now().isoformat()
+        }
+
+
+@shared_task
+def delete_expired_product_exports_task():
+    """Periodic task that deletes product export files older than PRODUCT_EXPORT_TTL_HOURS."""
+    from zistino_apps.compatibility.products.exports import delete_expired_exports
+
+    try:
+        deleted = delete_expired_exports()
+        return {
+            'success': True,
+            'deleted': deleted,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"❌ Error in delete_expired_product_exports_task: {str(e)}", exc_info=True)
+        return {
+            'success': False,
+            'error': str(e),
+            'timestamp': timezone.now().isoformat()
+        }
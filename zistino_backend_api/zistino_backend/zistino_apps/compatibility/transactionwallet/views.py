@@ -21,6 +21,7 @@ from zistino_apps.payments.views import WalletViewSet, TransactionViewSet, Admin
 from zistino_apps.users.permissions import IsManager
 from zistino_apps.authentication.models import User
 from zistino_apps.compatibility.utils import create_success_response, create_error_response
+from zistino_apps.compatibility.legacyids.utils import resolve_legacy_id, SCHEME_HEX
 from drf_spectacular.utils import OpenApiExample, OpenApiResponse, OpenApiParameter
 from datetime import datetime
 from decimal import Decimal
@@ -72,12 +73,12 @@ class TransactionWalletViewSet(viewsets.ModelViewSet):
         except (Transaction.DoesNotExist, ValueError, TypeError):
             # If UUID parsing fails, try to find by integer hash
             # This is for backward compatibility with integer IDs
-            import hashlib
-            for txn in Transaction.objects.all():
-                txn_id_str = str(txn.id).replace('-', '')
-                txn_id_int = int(hashlib.md5(txn_id_str.encode()).hexdigest()[:8], 16) % 100000000
-                if str(txn_id_int) == str(pk):
-                    return txn
+            try:
+                txn = resolve_legacy_id(Transaction.objects.all(), pk, SCHEME_HEX)
+            except (ValueError, TypeError):
+                txn = None
+            if txn:
+                return txn
             
             # If not found, raise DoesNotExist
             raise Transaction.DoesNotExist(f'Transaction with ID "{pk}" not found.')
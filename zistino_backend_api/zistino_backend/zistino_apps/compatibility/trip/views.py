@@ -15,6 +15,7 @@ import uuid
 
 from zistino_apps.users.permissions import IsManager
 from zistino_apps.compatibility.utils import create_success_response, create_error_response
+from zistino_apps.compatibility.legacyids.utils import resolve_legacy_id, SCHEME_HEX
 from zistino_apps.deliveries.models import Delivery
 from .models import Trip
 from .serializers import (
@@ -551,16 +552,11 @@ class TripGetByJobIdView(APIView):
             try:
                 delivery = Delivery.objects.get(id=jobid)
             except (ValueError, Delivery.DoesNotExist):
-                # Try to find by integer hash
-                import hashlib
-                deliveries = Delivery.objects.all()
-                delivery = None
-                for d in deliveries:
-                    delivery_id_str = str(d.id).replace('-', '')
-                    delivery_id_int = int(hashlib.md5(delivery_id_str.encode()).hexdigest()[:8], 16) % 100000000
-                    if str(delivery_id_int) == str(jobid):
-                        delivery = d
-                        break
+                # Try to find by integer hash through the legacy ID mapping
+                try:
+                    delivery = resolve_legacy_id(Delivery.objects.all(), jobid, SCHEME_HEX)
+                except (ValueError, TypeError):
+                    delivery = None
                 
                 if not delivery:
                     return create_error_response(
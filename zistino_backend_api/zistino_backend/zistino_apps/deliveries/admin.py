@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Delivery, Trip, LocationUpdate, WeightShortfall, SurveyQuestion, SurveyAnswer, DeliverySurvey, DeliveryItem
+from .models import Delivery, Trip, LocationUpdate, TripTrack, WeightShortfall, SurveyQuestion, SurveyAnswer, DeliverySurvey, DeliveryItem
 
 
 class LocationUpdateInline(admin.TabularInline):
@@ -124,6 +124,19 @@ class LocationUpdateAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(TripTrack)
+class TripTrackAdmin(admin.ModelAdmin):
+    """Admin for compacted trip tracks (read-only summary, the packed data is not editable)"""
+    list_display = ('trip', 'user', 'point_count', 'started_at', 'ended_at')
+    search_fields = ('user__phone_number', 'user__username', 'trip__id')
+    readonly_fields = (
+        'trip', 'user', 'point_count', 'started_at', 'ended_at',
+        'min_latitude', 'min_longitude', 'max_latitude', 'max_longitude', 'created_at', 'updated_at'
+    )
+    exclude = ('data',)
+    ordering = ('-started_at',)
+
+
 @admin.register(WeightShortfall)
 class WeightShortfallAdmin(admin.ModelAdmin):
     """Admin for weight shortfalls"""
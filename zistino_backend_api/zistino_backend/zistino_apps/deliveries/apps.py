@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DeliveriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'zistino_apps.deliveries'
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import zistino_apps.deliveries.signals
@@ -0,0 +1,245 @@
+"""
+Batch auto-assignment of pending orders to drivers.
+
+Instead of picking a driver greedily inside each order request, the
+dispatcher takes every unassigned order in a time slot, resolves their zones
+in one pass over the zone index, loads driver load / priority with a
+constant number of queries and last known positions from the live-position
+cache, and balances the orders across
+drivers before writing all deliveries with a single bulk_create.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import timedelta
+from uuid import UUID
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from zistino_apps.orders.models import Order
+from zistino_apps.users.models import UserZone
+from zistino_apps.deliveries.models import Delivery
+from zistino_apps.deliveries.geo import haversine_km
+from zistino_apps.deliveries.live_positions import get_live_positions
+from zistino_apps.deliveries.utils import (
+    PENDING_DELIVERY_STATUSES,
+    find_zones_for_locations,
+    find_nearest_time_slot,
+)
+
+logger = logging.getLogger(__name__)
+
+# Score weights: lower score wins. One pending delivery costs as much as
+# LOAD_WEIGHT km of extra driving; each priority step is worth PRIORITY_WEIGHT km.
+LOAD_WEIGHT = 5.0
+PRIORITY_WEIGHT = 2.0
+DISTANCE_WEIGHT = 1.0
+# Distance assumed for drivers without a live position
+UNKNOWN_DISTANCE_KM = 10.0
+
+
+@dataclass
+class DriverSlot:
+    """In-memory view of a driver while balancing a batch."""
+    driver_id: object
+    load: int = 0
+    last_latitude: float = None
+    last_longitude: float = None
+    zone_priorities: dict = field(default_factory=dict)
+
+    def distance_km(self, latitude, longitude):
+        if self.last_latitude is None or self.last_longitude is None:
+            return UNKNOWN_DISTANCE_KM
+        return haversine_km(self.last_latitude, self.last_longitude, latitude, longitude)
+
+    def score(self, zone_id, latitude, longitude):
+        return (
+            self.load * LOAD_WEIGHT
+            - self.zone_priorities.get(zone_id, 0) * PRIORITY_WEIGHT
+            + self.distance_km(latitude, longitude) * DISTANCE_WEIGHT
+        )
+
+
+def get_default_slot():
+    """Return (start, end) of the nearest delivery time slot."""
+    result = find_nearest_time_slot()
+    if not result:
+        return None, None
+    slot_start, slot_info = result
+    slot_end = slot_start + timedelta(hours=slot_info['end_hour'] - slot_info['start_hour'])
+    return slot_start, slot_end
+
+
+def get_unassigned_orders(slot_start=None, slot_end=None):
+    """
+    Pending orders with a location and no delivery yet.
+
+    With a slot, only orders due by the end of the slot are returned: those
+    whose preferred date falls in the slot or before it (overdue orders of
+    past slots), and those without a preferred date.
+    """
+    orders = Order.objects.filter(
+        status='pending',
+        latitude__isnull=False,
+        longitude__isnull=False,
+        deliveries__isnull=True,
+    )
+    if slot_start and slot_end:
+        orders = orders.filter(
+            preferred_delivery_date__isnull=True
+        ) | orders.filter(
+            preferred_delivery_date__lt=slot_end,
+        )
+    return orders.order_by('created_at')
+
+
+def load_driver_slots(zone_ids):
+    """
+    Load every active driver of the given zones with their pending load,
+    per-zone priority (two queries) and last reported position (one read of
+    the live-position cache; drivers without a recent sample have none).
+
+    Returns (drivers_by_id, driver_ids_by_zone).
+    """
+    drivers = {}
+    zone_drivers = {}
+    user_zones = UserZone.objects.filter(
+        zone_id__in=zone_ids,
+        user__is_driver=True,
+        user__is_active=True,
+        user__is_active_driver=True,
+    ).values_list('zone_id', 'user_id', 'priority')
+    for zone_id, user_id, priority in user_zones:
+        slot = drivers.setdefault(user_id, DriverSlot(driver_id=user_id))
+        slot.zone_priorities[zone_id] = priority
+        zone_drivers.setdefault(zone_id, []).append(user_id)
+
+    if not drivers:
+        return drivers, zone_drivers
+
+    pending = Delivery.objects.filter(
+        driver_id__in=drivers.keys(),
+        status__in=PENDING_DELIVERY_STATUSES,
+    ).values('driver_id').annotate(count=Count('id'))
+    for row in pending:
+        drivers[row['driver_id']].load = row['count']
+
+    # Last positions come from the live-position cache, not the location history
+    try:
+        positions = get_live_positions(driver_ids=list(drivers))
+    except Exception:
+        logger.warning('Live positions unavailable; dispatching without driver distances', exc_info=True)
+        positions = []
+    for position in positions:
+        slot = drivers.get(UUID(position['driverId']))
+        if slot is not None:
+            slot.last_latitude = position['latitude']
+            slot.last_longitude = position['longitude']
+
+    return drivers, zone_drivers
+
+
+def plan_assignments(orders, zones, drivers, zone_drivers, capacity):
+    """
+    Balance orders across drivers in one pass.
+
+    Each order goes to the driver of its zone with the lowest score
+    (load, zone priority and distance from the driver's last position)
+    among drivers still under capacity. Loads are updated as the batch is
+    planned so later orders see earlier picks.
+
+    Returns a list of (order, zone, driver_id) and the list of unassigned orders.
+    """
+    planned = []
+    unassigned = []
+    for order, zone in zip(orders, zones):
+        if zone is None:
+            unassigned.append(order)
+            continue
+        latitude = float(order.latitude)
+        longitude = float(order.longitude)
+        candidates = [
+            drivers[driver_id] for driver_id in zone_drivers.get(zone.id, [])
+            if not capacity or drivers[driver_id].load < capacity
+        ]
+        if not candidates:
+            unassigned.append(order)
+            continue
+        best = min(candidates, key=lambda slot: slot.score(zone.id, latitude, longitude))
+        best.load += 1
+        planned.append((order, zone, best.driver_id))
+    return planned, unassigned
+
+
+def dispatch_pending_orders(slot_start=None, slot_end=None, capacity=None, dry_run=False):
+    """
+    Assign all unassigned orders of a time slot to drivers in one batch.
+
+    Args:
+        slot_start/slot_end: Time slot to dispatch. Defaults to the nearest slot.
+        capacity: Maximum pending deliveries per driver (0 = unlimited).
+                  Defaults to settings.DELIVERY_DRIVER_CAPACITY.
+        dry_run: Plan only, do not write deliveries.
+
+    Returns a summary dict.
+    """
+    if slot_start is None and slot_end is None:
+        slot_start, slot_end = get_default_slot()
+    if capacity is None:
+        capacity = getattr(settings, 'DELIVERY_DRIVER_CAPACITY', 0)
+
+    with transaction.atomic():
+        # Lock the order rows so overlapping runs never assign the same order twice
+        orders = list(
+            get_unassigned_orders(slot_start, slot_end)
+            .select_for_update(skip_locked=True, of=('self',))
+        )
+        # Re-check after locking: a run that committed while we waited for the
+        # lock is not visible to the locking statement's snapshot
+        if orders:
+            assigned_ids = set(
+                Delivery.objects.filter(order_id__in=[order.id for order in orders])
+                .values_list('order_id', flat=True)
+            )
+            orders = [order for order in orders if order.id not in assigned_ids]
+        if not orders:
+            return {'orders': 0, 'assigned': 0, 'unassigned': 0}
+
+        zones = find_zones_for_locations((order.latitude, order.longitude) for order in orders)
+        zone_ids = {zone.id for zone in zones if zone is not None}
+        drivers, zone_drivers = load_driver_slots(zone_ids)
+        planned, unassigned = plan_assignments(orders, zones, drivers, zone_drivers, capacity)
+
+        if not dry_run and planned:
+            deliveries = [
+                Delivery(
+                    driver_id=driver_id,
+                    order=order,
+                    status='assigned',
+                    address=order.address1 or order.address2 or '',
+                    phone_number=order.phone1 or order.phone2 or order.user_phone_number or '',
+                    latitude=order.latitude,
+                    longitude=order.longitude,
+                    delivery_date=order.preferred_delivery_date or slot_start,
+                )
+                for order, zone, driver_id in planned
+            ]
+            Delivery.objects.bulk_create(deliveries, batch_size=500)
+
+            # bulk_create does not send post_save, so register legacy integer IDs explicitly
+            from zistino_apps.compatibility.legacyids.utils import sync_legacy_ids
+            sync_legacy_ids(Delivery, [delivery.id for delivery in deliveries])
+
+    summary = {
+        'orders': len(orders),
+        'assigned': len(planned),
+        'unassigned': len(unassigned),
+        'slot_start': slot_start.isoformat() if slot_start else None,
+        'slot_end': slot_end.isoformat() if slot_end else None,
+        'dry_run': dry_run,
+        'timestamp': timezone.now().isoformat(),
+    }
+    logger.info(f"Dispatched orders: {summary}")
+    return summary
@@ -0,0 +1,216 @@
+"""
+Geometry helpers for zones and routes.
+"""
+import json
+import re
+from array import array
+from math import radians, cos, sin, asin, sqrt
+
+EARTH_RADIUS_KM = 6371
+
+_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometers."""
+    lat1, lng1, lat2, lng2 = radians(lat1), radians(lng1), radians(lat2), radians(lng2)
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    return 2 * asin(sqrt(min(a, 1.0))) * EARTH_RADIUS_KM
+
+
+class Polygon:
+    """
+    Compact polygon: vertices packed as [lat0, lng0, lat1, lng1, ...] in a
+    float array, plus a precomputed bounding box for cheap rejection.
+    """
+    __slots__ = ('coords', 'min_lat', 'min_lng', 'max_lat', 'max_lng')
+
+    def __init__(self, vertices):
+        self.coords = array('d')
+        for lat, lng in vertices:
+            self.coords.append(lat)
+            self.coords.append(lng)
+        lats = self.coords[0::2]
+        lngs = self.coords[1::2]
+        self.min_lat, self.max_lat = min(lats), max(lats)
+        self.min_lng, self.max_lng = min(lngs), max(lngs)
+
+    def __len__(self):
+        return len(self.coords) // 2
+
+    def centroid(self):
+        """Vertex average - good enough as a nearest-zone anchor for small zones."""
+        count = len(self)
+        return sum(self.coords[0::2]) / count, sum(self.coords[1::2]) / count
+
+    def in_bbox(self, lat, lng):
+        return self.min_lat <= lat <= self.max_lat and self.min_lng <= lng <= self.max_lng
+
+    def contains(self, lat, lng):
+        """Ray-casting point-in-polygon test (planar, fine at city scale)."""
+        if not self.in_bbox(lat, lng):
+            return False
+        coords = self.coords
+        count = len(coords)
+        inside = False
+        j = count - 2
+        for i in range(0, count, 2):
+            lat_i, lng_i = coords[i], coords[i + 1]
+            lat_j, lng_j = coords[j], coords[j + 1]
+            if (lat_i > lat) != (lat_j > lat):
+                cross_lng = lng_i + (lat - lat_i) * (lng_j - lng_i) / (lat_j - lat_i)
+                if lng < cross_lng:
+                    inside = not inside
+            j = i
+        return inside
+
+
+def _pair(item):
+    """Return (lat, lng) from a [lat, lng] pair or a {'lat'/'latitude', 'lng'/'longitude'} dict."""
+    if isinstance(item, dict):
+        lat = item.get('lat', item.get('latitude'))
+        lng = item.get('lng', item.get('lon', item.get('longitude')))
+        return float(lat), float(lng)
+    lat, lng = item[0], item[1]
+    return float(lat), float(lng)
+
+
+def parse_zonepath(zonepath):
+    """
+    Parse Zone.zonepath into a Polygon, or return None if it is not a polygon.
+
+    Accepted formats:
+        - JSON list of [lat, lng] pairs or {"lat": .., "lng": ..} objects
+        - GeoJSON Polygon ({"type": "Polygon", "coordinates": [[[lng, lat], ...]]})
+        - Plain text with alternating latitude/longitude numbers,
+          e.g. "35.70,51.40;35.71,51.42;35.69,51.43"
+
+    Free-text paths (street names etc.) are ignored so the zone keeps using its radius.
+    """
+    if not zonepath:
+        return None
+    text = zonepath.strip()
+    vertices = None
+
+    if text[:1] in '[{':
+        try:
+            data = json.loads(text)
+            if isinstance(data, dict) and data.get('type') == 'Polygon':
+                # GeoJSON uses [lng, lat] order
+                vertices = [(float(p[1]), float(p[0])) for p in data['coordinates'][0]]
+            elif isinstance(data, dict) and 'coordinates' in data:
+                vertices = [_pair(p) for p in data['coordinates']]
+            elif isinstance(data, list):
+                vertices = [_pair(p) for p in data]
+        except (ValueError, TypeError, KeyError, IndexError):
+            vertices = None
+    else:
+        numbers = _NUMBER_RE.findall(text)
+        # Only treat the text as coordinates if it is nothing but numbers and separators
+        if numbers and len(numbers) % 2 == 0 and not re.search(r'[^\d\s.,;|\-]', text):
+            values = [float(n) for n in numbers]
+            vertices = list(zip(values[0::2], values[1::2]))
+
+    if not vertices:
+        return None
+    # Drop explicit closing vertex
+    if len(vertices) > 1 and vertices[0] == vertices[-1]:
+        vertices = vertices[:-1]
+    if len(vertices) < 3:
+        return None
+    if not all(-90 <= lat <= 90 and -180 <= lng <= 180 for lat, lng in vertices):
+        return None
+    return Polygon(vertices)
+
+
+def simplify_indexes(latitudes, longitudes, tolerance_m):
+    """
+    Douglas-Peucker simplification of a polyline.
+
+    Returns the sorted indexes of the points to keep so that no dropped point
+    is farther than tolerance_m meters from the simplified line. Distances are
+    measured in a local equirectangular projection (fine at city scale).
+    """
+    count = len(latitudes)
+    if count <= 2 or tolerance_m <= 0:
+        return list(range(count))
+
+    # Project to meters around the first point
+    meters_per_degree = radians(1) * EARTH_RADIUS_KM * 1000
+    lng_scale = meters_per_degree * cos(radians(latitudes[0]))
+    xs = array('d', [(lng - longitudes[0]) * lng_scale for lng in longitudes])
+    ys = array('d', [(lat - latitudes[0]) * meters_per_degree for lat in latitudes])
+    tolerance_sq = tolerance_m * tolerance_m
+
+    keep = bytearray(count)
+    keep[0] = keep[count - 1] = 1
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = xs[first], ys[first]
+        dx, dy = xs[last] - x1, ys[last] - y1
+        length_sq = dx * dx + dy * dy
+        max_dist_sq = -1.0
+        index = first
+        for i in range(first + 1, last):
+            px, py = xs[i] - x1, ys[i] - y1
+            if length_sq:
+                t = max(0.0, min(1.0, (px * dx + py * dy) / length_sq))
+                px -= t * dx
+                py -= t * dy
+            dist_sq = px * px + py * py
+            if dist_sq > max_dist_sq:
+                max_dist_sq, index = dist_sq, i
+        if max_dist_sq > tolerance_sq:
+            keep[index] = 1
+            if index - first > 1:
+                stack.append((first, index))
+            if last - index > 1:
+                stack.append((index, last))
+    return [i for i in range(count) if keep[i]]
+
+
+def _encode_polyline_value(value, chunks):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+
+
+def encode_polyline(latitudes, longitudes, precision=5):
+    """Encode coordinates in the Google encoded polyline format."""
+    factor = 10 ** precision
+    chunks = []
+    previous_lat = previous_lng = 0
+    for lat, lng in zip(latitudes, longitudes):
+        lat_e = int(round(lat * factor))
+        lng_e = int(round(lng * factor))
+        _encode_polyline_value(lat_e - previous_lat, chunks)
+        _encode_polyline_value(lng_e - previous_lng, chunks)
+        previous_lat, previous_lng = lat_e, lng_e
+    return ''.join(chunks)
+
+
+def decode_polyline(encoded, precision=5):
+    """Decode a Google encoded polyline into a list of (lat, lng) pairs."""
+    factor = 10 ** precision
+    coordinates = []
+    index = lat = lng = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            result = shift = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coordinates.append((lat / factor, lng / factor))
+    return coordinates
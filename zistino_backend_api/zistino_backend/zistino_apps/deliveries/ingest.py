@@ -0,0 +1,197 @@
+"""
+Batched LocationUpdate ingestion.
+
+Driver apps can upload many GPS samples for one trip in a single request.
+Samples are validated in one pass over plain dicts (no per-sample serializer)
+and inserted with one bulk_create. Samples carrying a client timestamp are
+idempotent per (trip, client_timestamp), so offline replays do not create
+duplicate points.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from zistino_apps.deliveries.models import LocationUpdate
+from zistino_apps.deliveries.trip_stats import update_trip_stats
+from zistino_apps.deliveries.live_positions import update_live_position
+
+# Accepted field names per LocationUpdate column (old Swagger camelCase first)
+INT_FIELDS = {
+    'speed': ('speed',),
+    'satellites': ('satellites',),
+    'hdop': ('hdop',),
+    'gsm_signal': ('gsmSignal', 'gsm_signal'),
+    'odometer': ('odometer',),
+}
+TIMESTAMP_FIELDS = ('timestamp', 'clientTimestamp', 'client_timestamp', 'createdOn')
+
+
+def get_max_batch_size():
+    return getattr(settings, 'LOCATION_BATCH_MAX_SIZE', 1000)
+
+
+def parse_client_timestamp(value):
+    """
+    Parse a client sample timestamp: ISO 8601 string, or epoch seconds /
+    milliseconds. Returns an aware datetime, or None if value is empty.
+    Raises ValueError for unparseable values.
+    """
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = value / 1000.0 if value > 1e11 else float(value)
+        return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        raise ValueError(f'Invalid timestamp: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _first(sample, names):
+    for name in names:
+        if name in sample:
+            return sample[name]
+    return None
+
+
+def _to_float(value):
+    result = float(value)
+    if not math.isfinite(result):
+        raise ValueError('not a finite number')
+    return result
+
+
+def validate_location_samples(samples):
+    """
+    Validate raw sample dicts in a single pass.
+
+    Returns (rows, errors) where rows is a list of cleaned dicts ready for
+    LocationUpdate(**row) and errors maps the sample index to a message.
+    Samples repeating a client timestamp already seen in the batch are dropped.
+    """
+    rows = []
+    errors = {}
+    seen_timestamps = set()
+
+    for index, sample in enumerate(samples):
+        if not isinstance(sample, dict):
+            errors[index] = 'Sample must be an object.'
+            continue
+        try:
+            latitude = _to_float(sample['latitude'])
+            longitude = _to_float(sample['longitude'])
+        except KeyError as e:
+            errors[index] = f'Missing field: {e.args[0]}'
+            continue
+        except (TypeError, ValueError):
+            errors[index] = 'latitude and longitude must be numbers.'
+            continue
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            errors[index] = 'latitude/longitude out of range.'
+            continue
+
+        try:
+            row = {
+                'latitude': round(latitude, 6),
+                'longitude': round(longitude, 6),
+                'altitude': round(_to_float(sample.get('altitude') or 0), 2),
+                'heading': str(sample.get('heading') or '')[:50],
+                'client_timestamp': parse_client_timestamp(_first(sample, TIMESTAMP_FIELDS)),
+            }
+            for column, names in INT_FIELDS.items():
+                value = _first(sample, names)
+                row[column] = int(value) if value not in (None, '') else 0
+        except (TypeError, ValueError) as e:
+            errors[index] = f'Invalid value: {e}'
+            continue
+
+        if row['client_timestamp'] is not None:
+            if row['client_timestamp'] in seen_timestamps:
+                continue
+            seen_timestamps.add(row['client_timestamp'])
+        rows.append(row)
+
+    return rows, errors
+
+
+def drop_conflicting_locations(trip, locations):
+    """
+    Keep the locations actually stored by an ignore_conflicts bulk_create.
+
+    A timestamped sample loses to a concurrent replay that stored the same
+    (trip, client_timestamp) first; the stored row is ours only if it carries
+    the created_at set on our instance (bulk_create returns no ids here).
+    """
+    timestamps = [location.client_timestamp for location in locations if location.client_timestamp is not None]
+    if not timestamps:
+        return locations
+    stored = dict(LocationUpdate.objects.filter(
+        trip=trip,
+        client_timestamp__in=timestamps,
+    ).values_list('client_timestamp', 'created_at'))
+    return [
+        location for location in locations
+        if location.client_timestamp is None or stored.get(location.client_timestamp) == location.created_at
+    ]
+
+
+def ingest_location_batch(trip, user, samples):
+    """
+    Store a batch of GPS samples for a trip with one bulk_create.
+
+    Returns a summary dict with received/inserted/duplicates/rejected counts
+    and per-index validation errors.
+    """
+    rows, errors = validate_location_samples(samples)
+
+    # Drop samples already stored for this trip (offline replays)
+    timestamps = [row['client_timestamp'] for row in rows if row['client_timestamp'] is not None]
+    existing = set()
+    if timestamps:
+        existing = set(LocationUpdate.objects.filter(
+            trip=trip,
+            client_timestamp__in=timestamps,
+        ).values_list('client_timestamp', flat=True))
+
+    new_locations = [
+        LocationUpdate(user=user, trip=trip, **row)
+        for row in rows
+        if row['client_timestamp'] is None or row['client_timestamp'] not in existing
+    ]
+    # ignore_conflicts covers concurrent replays of the same batch
+    LocationUpdate.objects.bulk_create(new_locations, batch_size=500, ignore_conflicts=True)
+    new_locations = drop_conflicting_locations(trip, new_locations)
+    update_trip_stats(trip.id, new_locations)
+    if new_locations:
+        newest = max(new_locations, key=lambda location: location.client_timestamp or location.created_at)
+        update_live_position(user.id, newest)
+
+    return {
+        'received': len(samples),
+        'inserted': len(new_locations),
+        'duplicates': len(samples) - len(errors) - len(new_locations),
+        'rejected': len(errors),
+        'errors': {str(index): message for index, message in errors.items()},
+    }
+
+
+def extract_batch_payload(data, query_params):
+    """
+    Split a batch request body into (trip_id, samples).
+
+    Accepts {"tripId": .., "locations": [...]} as JSON, or a bare list of
+    samples (JSON array or NDJSON) with tripId in the query string. Any other
+    body (e.g. a JSON scalar) yields no samples.
+    """
+    if isinstance(data, list):
+        return query_params.get('tripId') or query_params.get('trip'), data
+    if not isinstance(data, dict):
+        return None, None
+    trip_id = data.get('tripId', data.get('trip')) or query_params.get('tripId')
+    samples = data.get('locations', data.get('samples'))
+    return trip_id, samples
@@ -0,0 +1,112 @@
+"""
+Live driver positions.
+
+Every stored sample overwrites the driver's latest-position entry in the
+shared cache, so "where is every driver now" is one get_many over the active
+drivers instead of a LocationUpdate query per driver.
+
+Each update also takes a number from a global sequence; readers pass the
+last sequence they saw to receive only the positions that changed since
+(long-poll and server-sent events).
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+LIVE_POSITION_KEY = 'deliveries:live_position:{driver_id}'
+LIVE_POSITION_SEQUENCE_KEY = 'deliveries:live_position_seq'
+
+
+def get_live_position_ttl():
+    return getattr(settings, 'LIVE_POSITION_TTL', 900)
+
+
+def _next_sequence():
+    try:
+        if cache.add(LIVE_POSITION_SEQUENCE_KEY, 1, timeout=None):
+            return 1
+        return cache.incr(LIVE_POSITION_SEQUENCE_KEY)
+    except ValueError:
+        # Key evicted between add and incr
+        cache.set(LIVE_POSITION_SEQUENCE_KEY, 1, timeout=None)
+        return 1
+
+
+def get_current_sequence():
+    return cache.get(LIVE_POSITION_SEQUENCE_KEY, 0)
+
+
+def update_live_position(user_id, location):
+    """
+    Record a driver's latest sample, unless a newer one is already known
+    (offline replays). Cache failures never break ingestion.
+    """
+    sampled_at = location.client_timestamp or location.created_at
+    key = LIVE_POSITION_KEY.format(driver_id=user_id)
+    try:
+        current = cache.get(key)
+        if current and sampled_at and current['timestamp'] and parse_datetime(current['timestamp']) > sampled_at:
+            return
+        cache.set(key, {
+            'driverId': str(user_id),
+            'tripId': location.trip_id,
+            'latitude': float(location.latitude),
+            'longitude': float(location.longitude),
+            'speed': location.speed or 0,
+            'heading': location.heading or None,
+            'timestamp': sampled_at.isoformat() if sampled_at else None,
+            'seq': _next_sequence(),
+        }, get_live_position_ttl())
+    except Exception:
+        logger.warning(f'Failed to update live position of driver {user_id}', exc_info=True)
+
+
+def get_active_driver_ids():
+    User = get_user_model()
+    return list(User.objects.filter(
+        is_driver=True,
+        is_active=True,
+        is_active_driver=True,
+    ).values_list('id', flat=True))
+
+
+def get_live_positions(bbox=None, since=None, driver_ids=None):
+    """
+    Latest known positions of active drivers (positions older than
+    LIVE_POSITION_TTL have expired).
+
+    Args:
+        bbox: Optional (min_lat, min_lng, max_lat, max_lng).
+        since: Only return positions updated after this sequence number.
+        driver_ids: Driver ids to read; defaults to all active drivers.
+    """
+    if driver_ids is None:
+        driver_ids = get_active_driver_ids()
+    keys = [LIVE_POSITION_KEY.format(driver_id=driver_id) for driver_id in driver_ids]
+    positions = []
+    for position in cache.get_many(keys).values():
+        if since is not None and position['seq'] <= since:
+            continue
+        if bbox is not None:
+            min_lat, min_lng, max_lat, max_lng = bbox
+            if not (min_lat <= position['latitude'] <= max_lat and min_lng <= position['longitude'] <= max_lng):
+                continue
+        positions.append(position)
+    positions.sort(key=lambda position: position['seq'])
+    return positions
+
+
+def parse_bbox(value):
+    """Parse 'minLat,minLng,maxLat,maxLng'. Raises ValueError."""
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox must be minLat,minLng,maxLat,maxLng')
+    min_lat, min_lng, max_lat, max_lng = parts
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValueError('bbox minimums must not exceed maximums')
+    return min_lat, min_lng, max_lat, max_lng
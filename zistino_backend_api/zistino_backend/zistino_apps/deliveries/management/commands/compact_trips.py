@@ -0,0 +1,38 @@
+"""
+Django management command to pack the GPS samples of finished trips into
+compact TripTrack blobs.
+
+Usage:
+    python manage.py compact_trips
+    python manage.py compact_trips --age-hours 6 --limit 1000
+"""
+from django.core.management.base import BaseCommand
+
+from zistino_apps.deliveries.tracks import compact_finished_trips
+
+
+class Command(BaseCommand):
+    help = 'Compact location updates of finished trips into packed trip tracks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--age-hours',
+            type=int,
+            help='Compact trips without samples for this many hours. Defaults to TRIP_COMPACTION_AGE_HOURS.',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Maximum number of trips to compact in this run',
+        )
+
+    def handle(self, *args, **options):
+        summary = compact_finished_trips(
+            age_hours=options.get('age_hours'),
+            limit=options.get('limit'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted {summary['trips']} trips ({summary['rows']} location rows)"
+        ))
+        if summary['failed']:
+            self.stdout.write(self.style.WARNING(f"Failed: {summary['failed']}"))
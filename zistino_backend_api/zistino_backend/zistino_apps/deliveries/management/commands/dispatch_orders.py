@@ -0,0 +1,70 @@
+"""
+Django management command to batch-assign unassigned orders to drivers.
+
+Usage:
+    python manage.py dispatch_orders
+    python manage.py dispatch_orders --slot-start 2024-01-15T12:00 --slot-end 2024-01-15T16:00
+    python manage.py dispatch_orders --capacity 15 --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from zistino_apps.deliveries.dispatch import dispatch_pending_orders
+
+
+def _parse_slot_datetime(value, option):
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise CommandError(f'Invalid datetime for {option}: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Batch-assign unassigned orders of a time slot to drivers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--slot-start',
+            type=str,
+            help='Slot start (ISO datetime). Defaults to the nearest delivery time slot.',
+        )
+        parser.add_argument(
+            '--slot-end',
+            type=str,
+            help='Slot end (ISO datetime). Required with --slot-start.',
+        )
+        parser.add_argument(
+            '--capacity',
+            type=int,
+            help='Maximum pending deliveries per driver (0 = unlimited). Defaults to DELIVERY_DRIVER_CAPACITY.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Plan assignments without creating deliveries',
+        )
+
+    def handle(self, *args, **options):
+        slot_start = _parse_slot_datetime(options.get('slot_start'), '--slot-start')
+        slot_end = _parse_slot_datetime(options.get('slot_end'), '--slot-end')
+        if bool(slot_start) != bool(slot_end):
+            raise CommandError('--slot-start and --slot-end must be used together')
+
+        summary = dispatch_pending_orders(
+            slot_start=slot_start,
+            slot_end=slot_end,
+            capacity=options.get('capacity'),
+            dry_run=options.get('dry_run', False),
+        )
+
+        self.stdout.write(f"Orders in slot: {summary['orders']}")
+        self.stdout.write(self.style.SUCCESS(f"Assigned: {summary['assigned']}"))
+        if summary['unassigned']:
+            self.stdout.write(self.style.WARNING(f"Unassigned (no zone/driver capacity): {summary['unassigned']}"))
+        if summary.get('dry_run'):
+            self.stdout.write(self.style.WARNING('Dry run - no deliveries were created'))
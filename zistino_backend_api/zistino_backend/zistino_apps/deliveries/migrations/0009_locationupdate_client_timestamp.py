@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0008_surveyquestion_surveyanswer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='locationupdate',
+            name='client_timestamp',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='locationupdate',
+            constraint=models.UniqueConstraint(fields=('trip', 'client_timestamp'), name='location_updates_trip_client_ts_uniq'),
+        ),
+    ]
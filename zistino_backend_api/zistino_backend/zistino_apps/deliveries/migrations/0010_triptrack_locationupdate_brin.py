@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:19
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0009_locationupdate_client_timestamp'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripTrack',
+            fields=[
+                ('trip', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='track', serialize=False, to='deliveries.trip')),
+                ('point_count', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('min_latitude', models.FloatField(blank=True, null=True)),
+                ('min_longitude', models.FloatField(blank=True, null=True)),
+                ('max_latitude', models.FloatField(blank=True, null=True)),
+                ('max_longitude', models.FloatField(blank=True, null=True)),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trip_tracks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trip Track',
+                'verbose_name_plural': 'Trip Tracks',
+                'db_table': 'trip_tracks',
+                'indexes': [models.Index(fields=['user', 'started_at'], name='trip_tracks_user_id_bb6a91_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='locationupdate',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='location_updates_created_brin'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0010_triptrack_locationupdate_brin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripStatsState',
+            fields=[
+                ('trip', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats_state', serialize=False, to='deliveries.trip')),
+                ('point_count', models.IntegerField(default=0)),
+                ('distance_m', models.FloatField(default=0)),
+                ('speed_sum', models.BigIntegerField(default=0)),
+                ('max_speed', models.IntegerField(default=0)),
+                ('altitude_sum', models.FloatField(default=0)),
+                ('first_at', models.DateTimeField(blank=True, null=True)),
+                ('last_at', models.DateTimeField(blank=True, null=True)),
+                ('last_latitude', models.FloatField(blank=True, null=True)),
+                ('last_longitude', models.FloatField(blank=True, null=True)),
+                ('version', models.IntegerField(default=0)),
+                ('dirty', models.BooleanField(db_index=True, default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Trip Stats State',
+                'verbose_name_plural': 'Trip Stats States',
+                'db_table': 'trip_stats_states',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0011_tripstatsstate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='locationupdate',
+            index=models.Index(fields=['-created_at', '-id'], name='location_updates_recent_idx'),
+        ),
+    ]
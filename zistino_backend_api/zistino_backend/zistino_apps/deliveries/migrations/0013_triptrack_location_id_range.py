@@ -0,0 +1,61 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:20
+
+import struct
+import sys
+import zlib
+from array import array
+
+from django.db import migrations, models
+
+
+# Snapshot of the blob header and id column of deliveries.tracks (format LTK1 v1)
+TRACK_HEADER = struct.Struct('<4sBIq')
+
+
+def track_id_range(blob):
+    payload = zlib.decompress(bytes(blob))
+    _, _, count, _ = TRACK_HEADER.unpack_from(payload)
+    if not count:
+        return None, None
+    deltas = array('i')
+    deltas.frombytes(payload[TRACK_HEADER.size:TRACK_HEADER.size + deltas.itemsize * count])
+    if sys.byteorder == 'big':
+        deltas.byteswap()
+    ids = []
+    current = 0
+    for delta in deltas:
+        current += delta
+        ids.append(current)
+    return min(ids), max(ids)
+
+
+def fill_location_id_range(apps, schema_editor):
+    TripTrack = apps.get_model('deliveries', 'TripTrack')
+    for track in TripTrack.objects.filter(first_location_id__isnull=True).iterator(chunk_size=100):
+        first_id, last_id = track_id_range(track.data)
+        TripTrack.objects.filter(pk=track.pk).update(first_location_id=first_id, last_location_id=last_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0012_locationupdate_recent_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='triptrack',
+            name='first_location_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='triptrack',
+            name='last_location_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='triptrack',
+            index=models.Index(fields=['first_location_id', 'last_location_id'], name='trip_tracks_first_l_c9852e_idx'),
+        ),
+        migrations.RunPython(fill_location_id_range, migrations.RunPython.noop),
+    ]
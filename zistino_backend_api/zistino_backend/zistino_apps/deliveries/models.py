@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.indexes import BrinIndex
 from django.contrib.auth import get_user_model
 from zistino_apps.orders.models import Order
 from zistino_apps.products.models import Category
@@ -93,12 +94,93 @@ class LocationUpdate(models.Model):
     hdop = models.IntegerField(default=0)
     gsm_signal = models.IntegerField(default=0)
     odometer = models.IntegerField(default=0)
+    # Device time of the sample; makes batch uploads idempotent per trip
+    client_timestamp = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'location_updates'
         verbose_name = 'Location Update'
         verbose_name_plural = 'Location Updates'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['trip', 'client_timestamp'],
+                name='location_updates_trip_client_ts_uniq',
+            ),
+        ]
+        indexes = [
+            # Rows are appended in time order, so a BRIN index keeps time-range
+            # scans and archiving cheap at a tiny fraction of a B-tree's size
+            BrinIndex(fields=['created_at'], name='location_updates_created_brin'),
+            # Serves the newest-first keyset pages of the locations listings
+            # (ORDER BY created_at DESC, id DESC LIMIT n), which BRIN cannot
+            models.Index(fields=['-created_at', '-id'], name='location_updates_recent_idx'),
+        ]
+
+
+class TripStatsState(models.Model):
+    """
+    Running accumulators of a trip's statistics, updated as samples arrive
+    and periodically flushed into the Trip summary columns (see deliveries.trip_stats).
+    """
+    trip = models.OneToOneField(Trip, on_delete=models.CASCADE, primary_key=True, related_name='stats_state')
+    point_count = models.IntegerField(default=0)
+    distance_m = models.FloatField(default=0)
+    speed_sum = models.BigIntegerField(default=0)
+    max_speed = models.IntegerField(default=0)
+    altitude_sum = models.FloatField(default=0)
+    first_at = models.DateTimeField(null=True, blank=True)
+    last_at = models.DateTimeField(null=True, blank=True)
+    last_latitude = models.FloatField(null=True, blank=True)
+    last_longitude = models.FloatField(null=True, blank=True)
+    # Bumped on every update; a flush only clears `dirty` if nothing changed meanwhile
+    version = models.IntegerField(default=0)
+    dirty = models.BooleanField(default=False, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'trip_stats_states'
+        verbose_name = 'Trip Stats State'
+        verbose_name_plural = 'Trip Stats States'
+
+    def __str__(self):
+        return f"Stats for Trip {self.trip_id} ({self.point_count} points)"
+
+
+class TripTrack(models.Model):
+    """
+    Compacted GPS track of a finished trip.
+
+    Replaces the trip's LocationUpdate rows with one packed, delta-encoded
+    blob (see deliveries.tracks) plus a few summary columns.
+    """
+    trip = models.OneToOneField(Trip, on_delete=models.CASCADE, primary_key=True, related_name='track')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='trip_tracks')
+    point_count = models.IntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    ended_at = models.DateTimeField(null=True, blank=True)
+    min_latitude = models.FloatField(null=True, blank=True)
+    min_longitude = models.FloatField(null=True, blank=True)
+    max_latitude = models.FloatField(null=True, blank=True)
+    max_longitude = models.FloatField(null=True, blank=True)
+    # Range of the original LocationUpdate ids packed in the blob, to find a point by id
+    first_location_id = models.IntegerField(null=True, blank=True)
+    last_location_id = models.IntegerField(null=True, blank=True)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'trip_tracks'
+        verbose_name = 'Trip Track'
+        verbose_name_plural = 'Trip Tracks'
+        indexes = [
+            models.Index(fields=['user', 'started_at']),
+            models.Index(fields=['first_location_id', 'last_location_id']),
+        ]
+
+    def __str__(self):
+        return f"Track for Trip {self.trip_id} ({self.point_count} points)"
 
 
 class DeliverySurvey(models.Model):
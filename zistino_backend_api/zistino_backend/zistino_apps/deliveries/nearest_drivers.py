@@ -0,0 +1,286 @@
+"""
+Nearest-driver lookups.
+
+The latest positions of active drivers (the live position cache fed by every
+stored LocationUpdate, see live_positions.py) are loaded into a process-local
+grid snapshot, rebuilt at most every NEAREST_DRIVER_INDEX_REFRESH seconds.
+A query walks the grid in rings of cells around the point and yields drivers
+in increasing distance, so "k nearest drivers with fewer than N open
+deliveries" only looks at the drivers around the point and counts open
+deliveries for them with one grouped query per batch of candidates.
+
+Drivers without a live position (no sample within LIVE_POSITION_TTL) are not
+in the index; assignment falls back to zone round-robin for them.
+"""
+import heapq
+import logging
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from itertools import islice
+from math import radians, cos, sin, asin, sqrt, floor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+
+from zistino_apps.deliveries.geo import EARTH_RADIUS_KM
+from zistino_apps.deliveries.live_positions import get_live_positions
+from zistino_apps.deliveries.models import Delivery
+from zistino_apps.deliveries.utils import PENDING_DELIVERY_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Grid cell size in degrees (~2 km of latitude)
+GRID_CELL_DEGREES = 0.02
+DEFAULT_NEAREST_DRIVERS = 5
+# Drivers considered (and locked) per automatic assignment
+ASSIGNMENT_CANDIDATES = 5
+
+
+def _cell(lat, lng):
+    return floor(lat / GRID_CELL_DEGREES), floor(lng / GRID_CELL_DEGREES)
+
+
+@dataclass
+class NearestDriver:
+    driver_id: str
+    distance_km: float
+    open_deliveries: int
+    latitude: float
+    longitude: float
+    timestamp: str = None
+
+
+class DriverGeoIndex:
+    """Immutable snapshot of driver positions bucketed into a lat/lng grid."""
+
+    def __init__(self, positions):
+        self.positions = []
+        self.lat_rad = array('d')
+        self.lng_rad = array('d')
+        self.cos_lat = array('d')
+        self.grid = {}
+
+        for position in positions:
+            lat = float(position['latitude'])
+            lng = float(position['longitude'])
+            slot = len(self.positions)
+            self.positions.append(position)
+            self.lat_rad.append(radians(lat))
+            self.lng_rad.append(radians(lng))
+            self.cos_lat.append(cos(radians(lat)))
+            self.grid.setdefault(_cell(lat, lng), []).append(slot)
+
+        if self.grid:
+            rows = [row for row, _ in self.grid]
+            cols = [col for _, col in self.grid]
+            self.bounds = (min(rows), min(cols), max(rows), max(cols))
+        else:
+            self.bounds = None
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _distance_km(self, slot, lat_rad, lng_rad, cos_lat):
+        dlat = lat_rad - self.lat_rad[slot]
+        dlng = lng_rad - self.lng_rad[slot]
+        a = sin(dlat / 2) ** 2 + self.cos_lat[slot] * cos_lat * sin(dlng / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * asin(sqrt(min(a, 1.0)))
+
+    @staticmethod
+    def _covered_km(latitude, ring):
+        """
+        Lower bound of the distance from the point to any position outside
+        the first `ring` rings of cells around it (conservative: measured
+        along the parallel at the far edge of the searched block).
+        """
+        if ring == 0:
+            return 0.0
+        far_lat = min(abs(latitude) + (ring + 1) * GRID_CELL_DEGREES, 90.0)
+        return 0.99 * EARTH_RADIUS_KM * radians(ring * GRID_CELL_DEGREES) * cos(radians(far_lat))
+
+    def _ring_cells(self, row, col, ring):
+        if ring == 0:
+            return [(row, col)]
+        cells = []
+        for d_col in range(-ring, ring + 1):
+            cells.append((row - ring, col + d_col))
+            cells.append((row + ring, col + d_col))
+        for d_row in range(-ring + 1, ring):
+            cells.append((row + d_row, col - ring))
+            cells.append((row + d_row, col + ring))
+        return cells
+
+    def iter_nearest(self, latitude, longitude, max_distance_km=None):
+        """
+        Yield (distance_km, position) for every indexed driver, nearest first,
+        stopping beyond max_distance_km.
+        """
+        if not self.positions:
+            return
+        lat = float(latitude)
+        lng = float(longitude)
+        lat_rad = radians(lat)
+        lng_rad = radians(lng)
+        cos_lat = cos(lat_rad)
+        row, col = _cell(lat, lng)
+        min_row, min_col, max_row, max_col = self.bounds
+        max_ring = max(row - min_row, max_row - row, col - min_col, max_col - col, 0)
+
+        heap = []
+        ring = 0
+        while ring <= max_ring:
+            if 8 * ring > len(self.grid):
+                # Sparse grid: the remaining rings hold fewer drivers than cells to probe
+                for (cell_row, cell_col), slots in self.grid.items():
+                    if max(abs(cell_row - row), abs(cell_col - col)) >= ring:
+                        for slot in slots:
+                            heapq.heappush(heap, (self._distance_km(slot, lat_rad, lng_rad, cos_lat), slot))
+                break
+
+            for cell in self._ring_cells(row, col, ring):
+                for slot in self.grid.get(cell, ()):
+                    heapq.heappush(heap, (self._distance_km(slot, lat_rad, lng_rad, cos_lat), slot))
+
+            covered = self._covered_km(lat, ring)
+            while heap and heap[0][0] <= covered:
+                distance, slot = heapq.heappop(heap)
+                if max_distance_km is not None and distance > max_distance_km:
+                    return
+                yield distance, self.positions[slot]
+            if max_distance_km is not None and covered >= max_distance_km:
+                return
+            ring += 1
+
+        while heap:
+            distance, slot = heapq.heappop(heap)
+            if max_distance_km is not None and distance > max_distance_km:
+                return
+            yield distance, self.positions[slot]
+
+
+_lock = threading.Lock()
+_index = None
+_index_built_at = None
+
+
+def get_index_refresh_seconds():
+    return getattr(settings, 'NEAREST_DRIVER_INDEX_REFRESH', 5)
+
+
+def build_driver_geo_index():
+    """Load the live positions of active drivers into a new DriverGeoIndex."""
+    return DriverGeoIndex(get_live_positions())
+
+
+def get_driver_geo_index():
+    """Return the process-local DriverGeoIndex, rebuilding it when it is older than the refresh interval."""
+    global _index, _index_built_at
+    now = time.monotonic()
+    if _index is not None and now - _index_built_at < get_index_refresh_seconds():
+        return _index
+    with _lock:
+        if _index is None or now - _index_built_at >= get_index_refresh_seconds():
+            try:
+                _index = build_driver_geo_index()
+            except Exception:
+                # Cache unavailable: keep serving the previous snapshot
+                logger.warning('Driver geo index rebuild failed; using previous snapshot', exc_info=True)
+                if _index is None:
+                    _index = DriverGeoIndex([])
+            _index_built_at = now
+        return _index
+
+
+def get_open_delivery_counts(driver_ids):
+    """Return {driver_id (str): number of pending deliveries} in one query."""
+    return {
+        str(row['driver_id']): row['count']
+        for row in Delivery.objects.filter(
+            driver_id__in=list(driver_ids),
+            status__in=PENDING_DELIVERY_STATUSES,
+        ).values('driver_id').annotate(count=Count('id'))
+    }
+
+
+def find_nearest_drivers(latitude, longitude, k=DEFAULT_NEAREST_DRIVERS, max_open_deliveries=None,
+                         max_distance_km=None, driver_ids=None):
+    """
+    The k nearest active drivers to a point, nearest first.
+
+    Args:
+        max_open_deliveries: Only drivers with fewer pending deliveries than this.
+        max_distance_km: Ignore drivers further away.
+        driver_ids: Restrict the search to these drivers (e.g. the drivers of a zone).
+
+    Returns a list of NearestDriver.
+    """
+    allowed = {str(driver_id) for driver_id in driver_ids} if driver_ids is not None else None
+    candidates = (
+        (distance, position)
+        for distance, position in get_driver_geo_index().iter_nearest(latitude, longitude, max_distance_km)
+        if allowed is None or position['driverId'] in allowed
+    )
+
+    results = []
+    batch_size = max(k * 2, 16)
+    while len(results) < k:
+        batch = list(islice(candidates, batch_size))
+        if not batch:
+            break
+        counts = get_open_delivery_counts(position['driverId'] for _, position in batch)
+        for distance, position in batch:
+            open_deliveries = counts.get(position['driverId'], 0)
+            if max_open_deliveries is not None and open_deliveries >= max_open_deliveries:
+                continue
+            results.append(NearestDriver(
+                driver_id=position['driverId'],
+                distance_km=distance,
+                open_deliveries=open_deliveries,
+                latitude=position['latitude'],
+                longitude=position['longitude'],
+                timestamp=position.get('timestamp'),
+            ))
+            if len(results) == k:
+                break
+    return results
+
+
+def select_nearest_driver(latitude, longitude, capacity=None, max_distance_km=None):
+    """
+    Pick and lock the nearest active driver under capacity.
+    Must be called inside a transaction.
+
+    The ASSIGNMENT_CANDIDATES nearest drivers are locked with FOR NO KEY
+    UPDATE SKIP LOCKED and their open deliveries are recounted under the
+    lock, so concurrent assignments never push a driver over capacity.
+    Returns None if no candidate is available.
+    """
+    nearest = find_nearest_drivers(
+        latitude,
+        longitude,
+        k=ASSIGNMENT_CANDIDATES,
+        max_open_deliveries=capacity or None,
+        max_distance_km=max_distance_km,
+    )
+    if not nearest:
+        return None
+
+    User = get_user_model()
+    locked = {
+        str(driver.id): driver
+        for driver in User.objects.filter(
+            id__in=[candidate.driver_id for candidate in nearest],
+            is_driver=True,
+            is_active=True,
+            is_active_driver=True,
+        ).select_for_update(skip_locked=True, no_key=True, of=('self',))
+    }
+    counts = get_open_delivery_counts(locked.keys()) if capacity and locked else {}
+    for candidate in nearest:
+        driver = locked.get(candidate.driver_id)
+        if driver is not None and (not capacity or counts.get(candidate.driver_id, 0) < capacity):
+            return driver
+    return None
@@ -0,0 +1,95 @@
+"""
+Delivery reminder SMS, sent about an hour before the delivery period starts.
+
+Each run claims due deliveries in batches of REMINDER_BATCH_SIZE with
+SELECT ... FOR UPDATE SKIP LOCKED, queues all their reminders in the SMS
+outbox with one INSERT and flags the batch with one UPDATE, in the same
+transaction. Overlapping runs on several workers therefore never remind a
+customer twice, and the messages themselves are sent concurrently by the
+outbox workers (see payments.sms_outbox), which also retry failed sends.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from zistino_apps.deliveries.models import Delivery
+from zistino_apps.payments.sms_outbox import enqueue_sms_many
+from zistino_apps.payments.sms_service import format_delivery_reminder
+
+logger = logging.getLogger(__name__)
+
+REMINDER_BATCH_SIZE = 200
+# Deliveries starting between 45 and 75 minutes from now are reminded
+REMINDER_WINDOW_START = timedelta(minutes=45)
+REMINDER_WINDOW_END = timedelta(minutes=75)
+
+
+def get_due_reminders(now):
+    return Delivery.objects.filter(
+        delivery_date__isnull=False,
+        delivery_date__gte=now + REMINDER_WINDOW_START,
+        delivery_date__lte=now + REMINDER_WINDOW_END,
+        reminder_sms_sent=False,
+    ).exclude(
+        status='cancelled'
+    )
+
+
+def get_reminder_phone_number(delivery):
+    order = delivery.order
+    return delivery.phone_number or order.phone1 or order.phone2 or order.user_phone_number or ''
+
+
+def _queue_reminder_batch(now, batch_size, skipped_ids):
+    """Claim, queue and flag one batch. Returns (claimed, queued, skipped ids)."""
+    with transaction.atomic():
+        deliveries = list(
+            get_due_reminders(now)
+            .exclude(id__in=skipped_ids)
+            .select_related('order')
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('delivery_date')[:batch_size]
+        )
+        messages = []
+        queued_ids = []
+        skipped = []
+        for delivery in deliveries:
+            phone_number = get_reminder_phone_number(delivery)
+            if not phone_number:
+                logger.warning(f"Delivery {delivery.id} has no phone number, skipping SMS")
+                skipped.append(delivery.id)
+                continue
+            # A reminder is pointless once the delivery period has started
+            messages.append((phone_number, format_delivery_reminder(delivery.delivery_date), delivery.delivery_date))
+            queued_ids.append(delivery.id)
+
+        if queued_ids:
+            enqueue_sms_many(messages, purpose='delivery_reminder')
+            Delivery.objects.filter(id__in=queued_ids).update(reminder_sms_sent=True)
+    return len(deliveries), len(queued_ids), skipped
+
+
+def send_due_reminders(now=None, batch_size=REMINDER_BATCH_SIZE):
+    """Queue reminder SMS for all due deliveries. Returns a summary dict."""
+    now = now or timezone.now()
+    logger.info(f"Checking for deliveries needing reminder SMS between {now + REMINDER_WINDOW_START} and {now + REMINDER_WINDOW_END}")
+
+    checked = sent = 0
+    skipped_ids = []
+    while True:
+        claimed, queued, skipped = _queue_reminder_batch(now, batch_size, skipped_ids)
+        checked += claimed
+        sent += queued
+        skipped_ids.extend(skipped)
+        if claimed < batch_size:
+            break
+
+    logger.info(f"Reminder SMS check completed: {sent} queued, {len(skipped_ids)} without phone number")
+    return {
+        'checked': checked,
+        'sent': sent,
+        'failed': len(skipped_ids),
+        'timestamp': now.isoformat(),
+    }
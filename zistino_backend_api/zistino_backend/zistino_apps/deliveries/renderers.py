@@ -0,0 +1,22 @@
+"""
+Renderers for streaming endpoints.
+"""
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets content negotiation accept `Accept: text/event-stream` (sent by
+    EventSource). Views using it return a StreamingHttpResponse themselves,
+    so this renderer only formats error payloads.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return f"event: error\ndata: {json.dumps(data, default=str)}\n\n".encode(self.charset)
@@ -0,0 +1,315 @@
+"""
+Driver route analysis for the manager routes view.
+
+Points of every trip of the day are loaded at once (raw rows and compacted
+tracks, see deliveries.tracks) and converted once into packed float arrays.
+Consecutive slow points form dwell clusters (stops); each stop is reduced to
+its bounding box and registered in a grid of PICKUP_RADIUS_DEGREES cells, so
+a delivery is only compared with the stops around it instead of with every
+point of the day.
+
+Routes can be returned as per-point dicts (default), as Google encoded
+polylines or as parallel arrays, optionally simplified with Douglas-Peucker
+(see ROUTE_FORMATS). Pickups are always matched on the full route.
+
+Reports for past days cannot change any more and are cached per
+(driver, date, format, tolerance).
+"""
+from array import array
+from datetime import datetime, timedelta
+from math import floor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from zistino_apps.deliveries.geo import encode_polyline, simplify_indexes
+from zistino_apps.deliveries.models import Delivery, Trip
+from zistino_apps.deliveries.tracks import get_trip_points
+
+# A delivery was picked up where the driver stood still within ~100 meters of it
+PICKUP_RADIUS_DEGREES = 0.001
+STOP_MAX_SPEED = 5
+
+ROUTE_FORMAT_POINTS = 'points'
+ROUTE_FORMAT_POLYLINE = 'polyline'
+ROUTE_FORMAT_ARRAYS = 'arrays'
+ROUTE_FORMATS = (ROUTE_FORMAT_POINTS, ROUTE_FORMAT_POLYLINE, ROUTE_FORMAT_ARRAYS)
+
+DRIVER_ROUTE_CACHE_KEY = 'deliveries:driver_route:{driver_id}:{date}:{route_format}:{tolerance}'
+
+
+class PackedRoute:
+    """Points of one trip as parallel float/int arrays plus their timestamps."""
+
+    def __init__(self, points):
+        self.latitudes = array('d', [float(point.latitude) for point in points])
+        self.longitudes = array('d', [float(point.longitude) for point in points])
+        self.speeds = array('i', [point.speed or 0 for point in points])
+        self.timestamps = [point.created_at for point in points]
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def route_points(self, indexes=None):
+        if indexes is None:
+            indexes = range(len(self))
+        return [
+            {
+                'latitude': self.latitudes[i],
+                'longitude': self.longitudes[i],
+                'timestamp': self.timestamps[i].isoformat(),
+                'speed': self.speeds[i],
+            }
+            for i in indexes
+        ]
+
+    def serialize(self, route_format=ROUTE_FORMAT_POINTS, tolerance=0):
+        """
+        Return the trip fields describing the route in the requested format,
+        simplified to tolerance meters when tolerance > 0.
+
+            points:   {'routePoints': [{latitude, longitude, timestamp, speed}, ...]}
+            polyline: {'routePolyline': str, 'routeTimestamps': [epoch seconds], 'routePointCount': n}
+            arrays:   {'route': {'latitudes': [...], 'longitudes': [...], 'timestamps': [...], 'speeds': [...]}}
+        """
+        indexes = simplify_indexes(self.latitudes, self.longitudes, tolerance) if tolerance else None
+        if route_format == ROUTE_FORMAT_POINTS:
+            return {'routePoints': self.route_points(indexes)}
+
+        if indexes is None:
+            indexes = range(len(self))
+        latitudes = [self.latitudes[i] for i in indexes]
+        longitudes = [self.longitudes[i] for i in indexes]
+        timestamps = [int(self.timestamps[i].timestamp()) for i in indexes]
+        if route_format == ROUTE_FORMAT_POLYLINE:
+            return {
+                'routePolyline': encode_polyline(latitudes, longitudes),
+                'routeTimestamps': timestamps,
+                'routePointCount': len(latitudes),
+            }
+        return {
+            'route': {
+                'latitudes': latitudes,
+                'longitudes': longitudes,
+                'timestamps': timestamps,
+                'speeds': [self.speeds[i] for i in indexes],
+            }
+        }
+
+
+class Stop:
+    """Dwell cluster: a run of consecutive slow points and their bounding box."""
+    __slots__ = ('route', 'indexes', 'min_lat', 'min_lng', 'max_lat', 'max_lng')
+
+    def __init__(self, route, indexes):
+        self.route = route
+        self.indexes = indexes
+        lats = [route.latitudes[i] for i in indexes]
+        lngs = [route.longitudes[i] for i in indexes]
+        self.min_lat, self.max_lat = min(lats), max(lats)
+        self.min_lng, self.max_lng = min(lngs), max(lngs)
+
+    def points_near(self, latitude, longitude, threshold):
+        """Indexes of the stop's points strictly within threshold degrees on both axes."""
+        if (self.min_lat - threshold >= latitude or latitude >= self.max_lat + threshold
+                or self.min_lng - threshold >= longitude or longitude >= self.max_lng + threshold):
+            return []
+        lats = self.route.latitudes
+        lngs = self.route.longitudes
+        return [
+            i for i in self.indexes
+            if abs(lats[i] - latitude) < threshold and abs(lngs[i] - longitude) < threshold
+        ]
+
+
+def detect_stops(route, max_speed=STOP_MAX_SPEED, radius=PICKUP_RADIUS_DEGREES):
+    """
+    Split a route into dwell clusters: runs of consecutive points slower than
+    max_speed that stay within radius degrees of the run's first point.
+    Every slow point belongs to exactly one stop.
+    """
+    lats = route.latitudes
+    lngs = route.longitudes
+    stops = []
+    current = []
+    for i, speed in enumerate(route.speeds):
+        if speed >= max_speed:
+            if current:
+                stops.append(Stop(route, current))
+                current = []
+            continue
+        if current and (abs(lats[i] - lats[current[0]]) > radius or abs(lngs[i] - lngs[current[0]]) > radius):
+            stops.append(Stop(route, current))
+            current = []
+        current.append(i)
+    if current:
+        stops.append(Stop(route, current))
+    return stops
+
+
+class StopIndex:
+    """Grid of stops keyed by PICKUP_RADIUS_DEGREES cells of their bounding box."""
+
+    def __init__(self, stops, cell_degrees=PICKUP_RADIUS_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.grid = {}
+        for stop in stops:
+            min_row, min_col = self._cell(stop.min_lat, stop.min_lng)
+            max_row, max_col = self._cell(stop.max_lat, stop.max_lng)
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    self.grid.setdefault((row, col), []).append(stop)
+
+    def _cell(self, lat, lng):
+        return floor(lat / self.cell_degrees), floor(lng / self.cell_degrees)
+
+    def candidates(self, latitude, longitude):
+        """Stops whose cells touch the cells around the point (no duplicates, index order)."""
+        row, col = self._cell(latitude, longitude)
+        seen = {}
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                for stop in self.grid.get((row + d_row, col + d_col), ()):
+                    seen[id(stop)] = stop
+        return list(seen.values())
+
+
+def format_time_spent(seconds):
+    minutes = int(seconds // 60)
+    seconds = int(seconds % 60)
+    if minutes > 0:
+        formatted = f"{minutes} minute{'s' if minutes != 1 else ''}"
+        if seconds > 0:
+            formatted += f" {seconds} second{'s' if seconds != 1 else ''}"
+        return formatted
+    return f"{seconds} second{'s' if seconds != 1 else ''}"
+
+
+def match_pickups(route, deliveries, matched_deliveries):
+    """
+    Find the deliveries picked up during a route.
+
+    A delivery matches the slow points of the route within
+    PICKUP_RADIUS_DEGREES of it; arrival/departure are the first and last of
+    those points. Deliveries already matched to an earlier trip are skipped
+    and newly matched ones are added to matched_deliveries.
+
+    Returns (pickups, total seconds spent at pickups).
+    """
+    stop_index = StopIndex(detect_stops(route))
+    pickups = []
+    total_time = 0
+    for delivery, delivery_lat, delivery_lng in deliveries:
+        if delivery.id in matched_deliveries:
+            continue
+        indexes = []
+        for stop in stop_index.candidates(delivery_lat, delivery_lng):
+            indexes.extend(stop.points_near(delivery_lat, delivery_lng, PICKUP_RADIUS_DEGREES))
+        if not indexes:
+            continue
+
+        matched_deliveries.add(delivery.id)
+        arrival = min(route.timestamps[i] for i in indexes)
+        departure = max(route.timestamps[i] for i in indexes)
+        time_spent = (departure - arrival).total_seconds()
+        total_time += time_spent
+        pickups.append({
+            'deliveryId': str(delivery.id),
+            'customerAddress': delivery.address,
+            'customerPhone': delivery.phone_number,
+            'latitude': delivery_lat,
+            'longitude': delivery_lng,
+            'arrivalTime': arrival.isoformat(),
+            'departureTime': departure.isoformat(),
+            'timeSpentSeconds': int(time_spent),
+            'timeSpentFormatted': format_time_spent(time_spent),
+            'deliveredWeight': f"{delivery.delivered_weight:.2f}" if delivery.delivered_weight else "0.00"
+        })
+    return pickups, total_time
+
+
+def build_driver_route(driver, target_date, route_format=ROUTE_FORMAT_POINTS, tolerance=0):
+    """Build the routes report of a driver for one day."""
+    date_start = timezone.make_aware(datetime.combine(target_date, datetime.min.time()))
+    date_end = timezone.make_aware(datetime.combine(target_date, datetime.max.time()))
+
+    trips = list(Trip.objects.filter(
+        user=driver,
+        created_at__gte=date_start,
+        created_at__lte=date_end
+    ).order_by('created_at'))
+    trip_points = get_trip_points(trips)
+
+    # Deliveries with coordinates, converted to float once
+    deliveries = [
+        (delivery, float(delivery.latitude), float(delivery.longitude))
+        for delivery in Delivery.objects.filter(
+            driver=driver,
+            delivery_date__gte=date_start,
+            delivery_date__lte=date_end
+        )
+        if delivery.latitude and delivery.longitude
+    ]
+
+    trips_data = []
+    total_distance = 0
+    total_duration = 0
+    total_pickups = 0
+    total_pickup_time = 0
+    matched_deliveries = set()
+
+    for trip in trips:
+        route = PackedRoute(trip_points[trip.id])
+        pickup_locations, pickup_time = match_pickups(route, deliveries, matched_deliveries)
+        total_pickups += len(pickup_locations)
+        total_pickup_time += pickup_time
+
+        trip_data = {
+            'tripId': trip.id,
+            'startTime': trip.created_at.isoformat(),
+            'endTime': (trip.created_at + timedelta(seconds=trip.duration)).isoformat() if trip.duration else None,
+            'distance': float(trip.distance / 1000) if trip.distance else 0.0,  # Convert to km
+            'duration': trip.duration,
+            'averageSpeed': float(trip.average_speed) if trip.average_speed else 0.0,
+        }
+        trip_data.update(route.serialize(route_format, tolerance))
+        trip_data['pickupLocations'] = pickup_locations
+        trips_data.append(trip_data)
+
+        total_distance += float(trip.distance / 1000) if trip.distance else 0.0
+        total_duration += trip.duration or 0
+
+    avg_pickup_time = total_pickup_time / total_pickups if total_pickups > 0 else 0
+
+    return {
+        'driverId': str(driver.id),
+        'driverPhone': driver.phone_number,
+        'date': target_date.isoformat(),
+        'trips': trips_data,
+        'summary': {
+            'totalTrips': len(trips_data),
+            'totalDistance': round(total_distance, 2),
+            'totalDuration': total_duration,
+            'totalPickups': total_pickups,
+            'averageTimePerPickup': int(avg_pickup_time)
+        }
+    }
+
+
+def get_driver_route(driver, target_date, route_format=ROUTE_FORMAT_POINTS, tolerance=0):
+    """Return the routes report, served from cache for days that are over."""
+    if target_date >= timezone.localdate():
+        return build_driver_route(driver, target_date, route_format, tolerance)
+
+    key = DRIVER_ROUTE_CACHE_KEY.format(
+        driver_id=driver.id,
+        date=target_date.isoformat(),
+        route_format=route_format,
+        tolerance=tolerance,
+    )
+    report = cache.get(key)
+    if report is None:
+        report = build_driver_route(driver, target_date, route_format, tolerance)
+        cache.set(key, report, getattr(settings, 'DRIVER_ROUTE_CACHE_TIMEOUT', 86400))
+    return report
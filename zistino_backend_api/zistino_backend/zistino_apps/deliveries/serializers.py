@@ -147,7 +147,7 @@ class LocationUpdateSerializer(serializers.ModelSerializer):
         model = LocationUpdate
         fields = [
             'id', 'user', 'trip', 'latitude', 'longitude', 'speed', 'heading', 'altitude',
-            'satellites', 'hdop', 'gsm_signal', 'odometer', 'created_at'
+            'satellites', 'hdop', 'gsm_signal', 'odometer', 'client_timestamp', 'created_at'
         ]
         read_only_fields = ['id', 'user', 'created_at']
 
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from zistino_apps.users.models import Zone
+from zistino_apps.deliveries.models import LocationUpdate
+from zistino_apps.deliveries.trip_stats import update_trip_stats
+from zistino_apps.deliveries.live_positions import update_live_position
+from zistino_apps.deliveries.zone_index import invalidate_zone_index
+
+
+@receiver(post_save, sender=Zone)
+@receiver(post_delete, sender=Zone)
+def rebuild_zone_index_on_change(sender, instance, **kwargs):
+    """Rebuild the zone index in every worker when a zone is created, edited or deleted."""
+    invalidate_zone_index()
+
+
+@receiver(post_save, sender=LocationUpdate)
+def update_trip_stats_on_location(sender, instance, created, **kwargs):
+    """Fold single location creations into the trip stats (batches are handled in deliveries.ingest)."""
+    if created and instance.trip_id:
+        update_trip_stats(instance.trip_id, [instance])
+
+
+@receiver(post_save, sender=LocationUpdate)
+def update_live_position_on_location(sender, instance, created, **kwargs):
+    """Keep the driver's live position current for single location creations."""
+    if created:
+        update_live_position(instance.user_id, instance)
@@ -0,0 +1,453 @@
+"""
+Compact storage for finished trip tracks.
+
+Once a trip has had no new samples for TRIP_COMPACTION_AGE_HOURS its
+LocationUpdate rows are packed into a single TripTrack blob and deleted.
+
+Blob layout (little-endian, zlib-compressed):
+    header   magic b'LTK1', version (u8), point count (u32), first timestamp ms (i64)
+    int32 columns, count values each:
+        ids            delta-encoded
+        latitude       microdegrees, delta-encoded
+        longitude      microdegrees, delta-encoded
+        created_at     milliseconds from the header timestamp, delta-encoded
+        altitude       centimeters, delta-encoded
+        odometer       delta-encoded
+        speed, satellites, hdop, gsm_signal
+    uint16 column:
+        created_at sub-millisecond part in microseconds
+    int64 column:
+        client_timestamp microseconds (0 = unknown)
+    headings, UTF-8, newline separated
+
+Reads go through get_trip_points(), iter_points_desc()/LocationHistory and
+get_track_point(), which return raw rows and decoded points with the same
+attributes, so callers do not care where a trip is stored.
+"""
+import heapq
+import logging
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import groupby, islice
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from zistino_apps.deliveries.models import LocationUpdate, Trip, TripTrack
+
+logger = logging.getLogger(__name__)
+
+TRACK_MAGIC = b'LTK1'
+TRACK_VERSION = 1
+_HEADER = struct.Struct('<4sBIq')
+_INT32_MIN, _INT32_MAX = -2 ** 31, 2 ** 31 - 1
+
+_DELTA_COLUMNS = ('id', 'latitude', 'longitude', 'created_at', 'altitude', 'odometer')
+_PLAIN_COLUMNS = ('speed', 'satellites', 'hdop', 'gsm_signal')
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class TrackPoint:
+    """Decoded sample of a compacted track; mirrors the LocationUpdate attributes used by readers."""
+    __slots__ = (
+        'id', 'user', 'user_id', 'trip', 'trip_id', 'latitude', 'longitude', 'speed', 'heading',
+        'altitude', 'satellites', 'hdop', 'gsm_signal', 'odometer', 'client_timestamp', 'created_at',
+    )
+
+
+def _to_us(value):
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_us(value):
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _pack(column):
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _unpack(typecode, payload, offset, count):
+    column = array(typecode)
+    end = offset + column.itemsize * count
+    column.frombytes(payload[offset:end])
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column, end
+
+
+def _delta_encode(values):
+    column = array('i')
+    previous = 0
+    for value in values:
+        delta = value - previous
+        if not _INT32_MIN <= delta <= _INT32_MAX:
+            raise ValueError('delta does not fit in int32')
+        column.append(delta)
+        previous = value
+    return column
+
+
+def _delta_decode(column):
+    values = []
+    current = 0
+    for delta in column:
+        current += delta
+        values.append(current)
+    return values
+
+
+def encode_track(points):
+    """
+    Pack points (LocationUpdate rows or TrackPoints, sorted by id) into a blob.
+    Raises ValueError if a value does not fit the format.
+    """
+    count = len(points)
+    timestamps = [_to_us(point.created_at) for point in points]
+    first_ms = timestamps[0] // 1000 if timestamps else 0
+    values = {
+        'id': [point.id for point in points],
+        'latitude': [round(float(point.latitude) * 1e6) for point in points],
+        'longitude': [round(float(point.longitude) * 1e6) for point in points],
+        'created_at': [us // 1000 - first_ms for us in timestamps],
+        'altitude': [round(float(point.altitude or 0) * 100) for point in points],
+        'odometer': [point.odometer or 0 for point in points],
+    }
+
+    parts = [_HEADER.pack(TRACK_MAGIC, TRACK_VERSION, count, first_ms)]
+    for name in _DELTA_COLUMNS:
+        parts.append(_pack(_delta_encode(values[name])))
+    for name in _PLAIN_COLUMNS:
+        parts.append(_pack(array('i', [getattr(point, name) or 0 for point in points])))
+    parts.append(_pack(array('H', [us % 1000 for us in timestamps])))
+    parts.append(_pack(array('q', [
+        _to_us(point.client_timestamp) if point.client_timestamp else 0 for point in points
+    ])))
+    parts.append('\n'.join(
+        (point.heading or '').replace('\n', ' ') for point in points
+    ).encode('utf-8'))
+    return zlib.compress(b''.join(parts), 6)
+
+
+def decode_track(blob, user=None, trip=None):
+    """Unpack a blob produced by encode_track() into a list of TrackPoints."""
+    payload = zlib.decompress(bytes(blob))
+    magic, version, count, first_ms = _HEADER.unpack_from(payload)
+    if magic != TRACK_MAGIC or version != TRACK_VERSION:
+        raise ValueError('Unsupported track format')
+
+    offset = _HEADER.size
+    columns = {}
+    for name in _DELTA_COLUMNS:
+        column, offset = _unpack('i', payload, offset, count)
+        columns[name] = _delta_decode(column)
+    for name in _PLAIN_COLUMNS:
+        columns[name], offset = _unpack('i', payload, offset, count)
+    created_us, offset = _unpack('H', payload, offset, count)
+    client_us, offset = _unpack('q', payload, offset, count)
+    headings = payload[offset:].decode('utf-8').split('\n') if count else []
+
+    points = []
+    for i in range(count):
+        point = TrackPoint()
+        point.id = columns['id'][i]
+        point.user = user
+        point.user_id = user.id if user is not None else None
+        point.trip = trip
+        point.trip_id = trip.id if trip is not None else None
+        point.latitude = columns['latitude'][i] / 1e6
+        point.longitude = columns['longitude'][i] / 1e6
+        point.created_at = _from_us((first_ms + columns['created_at'][i]) * 1000 + created_us[i])
+        point.altitude = columns['altitude'][i] / 100
+        point.odometer = columns['odometer'][i]
+        point.speed = columns['speed'][i]
+        point.satellites = columns['satellites'][i]
+        point.hdop = columns['hdop'][i]
+        point.gsm_signal = columns['gsm_signal'][i]
+        point.client_timestamp = _from_us(client_us[i]) if client_us[i] else None
+        point.heading = headings[i]
+        points.append(point)
+    return points
+
+
+def get_trip_points(trips):
+    """
+    Return {trip_id: [points ordered by created_at]} for the given trips,
+    merging raw LocationUpdate rows with decoded TripTrack blobs.
+    Uses two queries regardless of the number of trips.
+    """
+    trips = list(trips)
+    trips_by_id = {trip.id: trip for trip in trips}
+    points = {trip.id: [] for trip in trips}
+
+    for track in TripTrack.objects.filter(trip_id__in=trips_by_id.keys()).select_related('user'):
+        points[track.trip_id].extend(decode_track(track.data, user=track.user, trip=trips_by_id[track.trip_id]))
+
+    for location in LocationUpdate.objects.filter(
+        trip_id__in=trips_by_id.keys()
+    ).select_related('user').order_by('created_at', 'id'):
+        location.trip = trips_by_id[location.trip_id]
+        points[location.trip_id].append(location)
+
+    for trip_points in points.values():
+        trip_points.sort(key=lambda point: (point.created_at, point.id))
+    return points
+
+
+def _point_key(point):
+    return _to_us(point.created_at), point.id
+
+
+def iter_trip_points_desc(trips, before=None, chunk_size=2000):
+    """
+    Yield the points of the given trips newest first, ordered by
+    (created_at, id) descending, optionally starting strictly before the
+    (created_at, id) keyset `before`.
+    """
+    return iter_points_desc(
+        LocationUpdate.objects.filter(trip__in=trips),
+        TripTrack.objects.filter(trip__in=trips),
+        before=before,
+        chunk_size=chunk_size,
+    )
+
+
+def iter_points_desc(rows, tracks, before=None, chunk_size=2000, match=None):
+    """
+    Yield the points selected by a LocationUpdate queryset and a TripTrack
+    queryset newest first, ordered by (created_at, id) descending,
+    optionally starting strictly before the (created_at, id) keyset `before`.
+    `match` filters decoded points; rows must already be filtered the same way.
+
+    Raw rows are streamed with .iterator(chunk_size); a compacted track is
+    only decoded once the stream reaches its ended_at, so memory stays
+    bounded by the tracks overlapping the current position.
+    """
+    rows = rows.select_related('user', 'trip')
+    tracks = tracks.select_related('user', 'trip')
+    if before is not None:
+        before_at, before_id = before
+        rows = rows.filter(Q(created_at__lt=before_at) | Q(created_at=before_at, id__lt=before_id))
+        tracks = tracks.filter(started_at__lte=before_at)
+        before_key = (_to_us(before_at), before_id)
+    rows = rows.order_by('-created_at', '-id').iterator(chunk_size=chunk_size)
+    tracks = tracks.order_by('-ended_at').iterator(chunk_size=50)
+
+    # Max-heap on (created_at, id) through negated keys; the counter breaks ties
+    heap = []
+    counter = 0
+
+    def push(source):
+        nonlocal counter
+        point = next(source, None)
+        if point is not None:
+            created_us, point_id = _point_key(point)
+            heapq.heappush(heap, (-created_us, -point_id, counter, point, source))
+            counter += 1
+
+    push(rows)
+    next_track = next(tracks, None)
+    while heap or next_track is not None:
+        if next_track is not None and (not heap or _to_us(next_track.ended_at) >= -heap[0][0]):
+            points = decode_track(next_track.data, user=next_track.user, trip=next_track.trip)
+            if before is not None:
+                points = [point for point in points if _point_key(point) < before_key]
+            if match is not None:
+                points = [point for point in points if match(point)]
+            points.sort(key=_point_key, reverse=True)
+            push(iter(points))
+            next_track = next(tracks, None)
+            continue
+        _, _, _, point, source = heapq.heappop(heap)
+        yield point
+        push(source)
+
+
+class LocationHistory:
+    """
+    Newest-first sequence over raw rows and compacted tracks, usable as the
+    object list of Django/DRF paginators: count() does not decode blobs
+    unless `match` is given, and slicing merges lazily with iter_points_desc().
+    """
+
+    def __init__(self, rows, tracks, match=None):
+        self.rows = rows
+        self.tracks = tracks
+        self.match = match
+
+    def count(self):
+        if self.match is not None:
+            compacted = sum(
+                1 for track in self.tracks.select_related('user', 'trip')
+                for point in decode_track(track.data, user=track.user, trip=track.trip)
+                if self.match(point)
+            )
+        else:
+            compacted = self.tracks.aggregate(total=Sum('point_count'))['total'] or 0
+        return self.rows.count() + compacted
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter_points_desc(self.rows, self.tracks, match=self.match)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop = index.start or 0, index.stop
+            if index.step not in (None, 1) or start < 0 or (stop is not None and stop < 0):
+                raise ValueError('LocationHistory only supports forward slices')
+            # Do not let the row cursor fetch far past the requested page
+            chunk_size = min(stop, 2000) if stop else 2000
+            points = iter_points_desc(self.rows, self.tracks, chunk_size=max(chunk_size, 1), match=self.match)
+            return list(islice(points, start, stop))
+        if index < 0:
+            raise IndexError('LocationHistory does not support negative indexing')
+        points = self[index:index + 1]
+        if not points:
+            raise IndexError('LocationHistory index out of range')
+        return points[0]
+
+
+def iter_points_by_trip(rows, tracks, chunk_size=2000):
+    """
+    Yield (trip_id, points ordered by (created_at, id)) for every trip with
+    samples in the LocationUpdate queryset `rows` or the TripTrack queryset
+    `tracks`, in trip id order. One trip is held in memory at a time.
+    """
+    groups = groupby(
+        rows.order_by('trip_id', 'created_at', 'id').iterator(chunk_size=chunk_size),
+        key=attrgetter('trip_id'),
+    )
+    tracks = tracks.select_related('user').order_by('trip_id').iterator(chunk_size=50)
+    group = next(groups, None)
+    track = next(tracks, None)
+    while group is not None or track is not None:
+        if track is None or (group is not None and group[0] < track.trip_id):
+            yield group[0], list(group[1])
+            group = next(groups, None)
+            continue
+        points = decode_track(track.data, user=track.user)
+        for point in points:
+            point.trip_id = track.trip_id
+        if group is not None and group[0] == track.trip_id:
+            # Samples that arrived after the trip was compacted
+            points.extend(group[1])
+            points.sort(key=lambda point: (point.created_at, point.id))
+            group = next(groups, None)
+        yield track.trip_id, points
+        track = next(tracks, None)
+
+
+def get_track_point(location_id, tracks=None):
+    """
+    Find the compacted point that was LocationUpdate `location_id`, or None.
+    `tracks` optionally narrows the TripTrack queryset searched (e.g. to a user).
+    """
+    if tracks is None:
+        tracks = TripTrack.objects.all()
+    tracks = tracks.filter(
+        first_location_id__lte=location_id, last_location_id__gte=location_id
+    ).select_related('user', 'trip')
+    for track in tracks:
+        for point in decode_track(track.data, user=track.user, trip=track.trip):
+            if point.id == location_id:
+                return point
+    return None
+
+
+def compact_trip(trip):
+    """
+    Pack the raw samples of a trip into its TripTrack (merging with an
+    existing track) and delete the raw rows. Returns the number of rows compacted.
+    """
+    with transaction.atomic():
+        trip = Trip.objects.select_for_update(of=('self',)).select_related('user').get(pk=trip.pk)
+        rows = list(LocationUpdate.objects.filter(trip=trip).order_by('id'))
+        if not rows:
+            return 0
+        if any(row.user_id != trip.user_id for row in rows):
+            logger.warning(f"Trip {trip.id} has samples from several users; not compacted")
+            return 0
+
+        track = TripTrack.objects.filter(trip=trip).first()
+        points = decode_track(track.data) if track else []
+        # Late replays of already compacted samples are dropped here
+        known_timestamps = {point.client_timestamp for point in points if point.client_timestamp}
+        points.extend(row for row in rows if row.client_timestamp not in known_timestamps)
+        points.sort(key=lambda point: point.id)
+
+        latitudes = [float(point.latitude) for point in points]
+        longitudes = [float(point.longitude) for point in points]
+        created = [point.created_at for point in points]
+        TripTrack.objects.update_or_create(
+            trip=trip,
+            defaults={
+                'user': trip.user,
+                'point_count': len(points),
+                'started_at': min(created),
+                'ended_at': max(created),
+                'min_latitude': min(latitudes),
+                'min_longitude': min(longitudes),
+                'max_latitude': max(latitudes),
+                'max_longitude': max(longitudes),
+                'first_location_id': points[0].id,
+                'last_location_id': points[-1].id,
+                'data': encode_track(points),
+            },
+        )
+        LocationUpdate.objects.filter(id__in=[row.id for row in rows]).delete()
+    return len(rows)
+
+
+def get_compactable_trip_ids(age_hours=None):
+    """Trips whose newest raw sample is older than age_hours."""
+    if age_hours is None:
+        age_hours = getattr(settings, 'TRIP_COMPACTION_AGE_HOURS', 24)
+    cutoff = timezone.now() - timedelta(hours=age_hours)
+    return list(
+        LocationUpdate.objects.values('trip_id')
+        .annotate(last_sample=Max('created_at'))
+        .filter(last_sample__lt=cutoff)
+        .values_list('trip_id', flat=True)
+    )
+
+
+def compact_finished_trips(age_hours=None, limit=None):
+    """Compact every finished trip. Returns a summary dict."""
+    trip_ids = get_compactable_trip_ids(age_hours)
+    if limit:
+        trip_ids = trip_ids[:limit]
+
+    compacted_trips = 0
+    compacted_rows = 0
+    failed = 0
+    for trip in Trip.objects.filter(id__in=trip_ids):
+        try:
+            rows = compact_trip(trip)
+        except ValueError as e:
+            failed += 1
+            logger.warning(f"Could not compact trip {trip.id}: {e}")
+            continue
+        if rows:
+            compacted_trips += 1
+            compacted_rows += rows
+
+    summary = {
+        'trips': compacted_trips,
+        'rows': compacted_rows,
+        'failed': failed,
+        'timestamp': timezone.now().isoformat(),
+    }
+    logger.info(f"Compacted trip tracks: {summary}")
+    return summary
@@ -0,0 +1,139 @@
+"""
+Server-side trip statistics.
+
+Every stored sample updates a per-trip TripStatsState row (running
+Haversine distance, speed/altitude sums, max speed, first/last time and the
+last position). A periodic task flushes dirty states into the Trip summary
+columns, so trip summaries only rescan the trip's points when samples
+arrive out of time order (offline replays), and no longer depend on
+client-supplied numbers.
+"""
+import logging
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from zistino_apps.deliveries.geo import haversine_km
+from zistino_apps.deliveries.models import Trip, TripStatsState
+from zistino_apps.deliveries.tracks import get_trip_points
+
+logger = logging.getLogger(__name__)
+
+# Segments implying a faster movement are GPS jumps and do not count as distance
+MAX_SEGMENT_SPEED_KMH = 250
+
+TRIP_STAT_FIELDS = ['distance', 'duration', 'max_speed', 'average_speed', 'average_altitude']
+
+
+def _sample_time(location):
+    return location.client_timestamp or location.created_at
+
+
+def accumulate(state, locations):
+    """
+    Add locations (in time order) to a TripStatsState in memory.
+
+    A sample older than state.last_at would be measured from the last
+    processed point instead of its neighbour in time, so it adds no distance
+    and leaves the last position alone; update_trip_stats() rebuilds the state
+    from all points when a batch holds such samples.
+    """
+    for location in locations:
+        latitude = float(location.latitude)
+        longitude = float(location.longitude)
+        sampled_at = _sample_time(location)
+        out_of_order = bool(sampled_at and state.last_at and sampled_at < state.last_at)
+
+        if state.last_latitude is not None and state.last_longitude is not None and not out_of_order:
+            segment_km = haversine_km(state.last_latitude, state.last_longitude, latitude, longitude)
+            hours = (sampled_at - state.last_at).total_seconds() / 3600 if state.last_at and sampled_at else 0
+            if hours == 0 or segment_km / hours <= MAX_SEGMENT_SPEED_KMH:
+                state.distance_m += segment_km * 1000
+
+        speed = location.speed or 0
+        state.point_count += 1
+        state.speed_sum += speed
+        state.max_speed = max(state.max_speed, speed)
+        state.altitude_sum += float(location.altitude or 0)
+        if sampled_at:
+            state.first_at = min(state.first_at, sampled_at) if state.first_at else sampled_at
+            state.last_at = max(state.last_at, sampled_at) if state.last_at else sampled_at
+        if not out_of_order:
+            state.last_latitude = latitude
+            state.last_longitude = longitude
+    return state
+
+
+def reset_stats(state):
+    """Clear the accumulators of a TripStatsState in memory."""
+    state.point_count = 0
+    state.distance_m = 0
+    state.speed_sum = 0
+    state.max_speed = 0
+    state.altitude_sum = 0
+    state.first_at = state.last_at = None
+    state.last_latitude = state.last_longitude = None
+    return state
+
+
+def update_trip_stats(trip_id, locations):
+    """
+    Fold newly stored locations of one trip into its stats state.
+
+    Offline replays can deliver samples older than the last one folded in;
+    the state is then recomputed from all the trip's stored points in time
+    order, so distances and the jump filter use the true neighbouring points.
+    """
+    if not locations:
+        return
+    if any(location.created_at is None for location in locations):
+        now = timezone.now()
+        for location in locations:
+            location.created_at = location.created_at or now
+    locations = sorted(locations, key=_sample_time)
+
+    with transaction.atomic():
+        state, _ = TripStatsState.objects.select_for_update().get_or_create(trip_id=trip_id)
+        if state.last_at and _sample_time(locations[0]) < state.last_at:
+            trip = Trip.objects.get(pk=trip_id)
+            reset_stats(state)
+            accumulate(state, sorted(get_trip_points([trip])[trip_id], key=_sample_time))
+        else:
+            accumulate(state, locations)
+        state.version += 1
+        state.dirty = True
+        state.save()
+
+
+def apply_stats(trip, state):
+    """Copy a stats state into the Trip summary columns (distance in meters, duration in seconds)."""
+    trip.distance = int(round(state.distance_m))
+    trip.duration = int((state.last_at - state.first_at).total_seconds()) if state.first_at and state.last_at else 0
+    trip.max_speed = state.max_speed
+    trip.average_speed = int(round(state.speed_sum / state.point_count)) if state.point_count else 0
+    trip.average_altitude = int(round(state.altitude_sum / state.point_count)) if state.point_count else 0
+    return trip
+
+
+def flush_trip_stats(batch_size=500):
+    """Write every dirty stats state into its Trip. Returns a summary dict."""
+    trip_ids = list(TripStatsState.objects.filter(dirty=True).values_list('trip_id', flat=True))
+    for start in range(0, len(trip_ids), batch_size):
+        states = list(TripStatsState.objects.filter(
+            trip_id__in=trip_ids[start:start + batch_size]
+        ).select_related('trip'))
+        if not states:
+            continue
+        Trip.objects.bulk_update([apply_stats(state.trip, state) for state in states], TRIP_STAT_FIELDS)
+        # States updated again since they were read stay dirty for the next run
+        TripStatsState.objects.filter(
+            reduce(or_, (Q(pk=state.pk, version=state.version) for state in states))
+        ).update(dirty=False)
+
+    summary = {'trips': len(trip_ids), 'timestamp': timezone.now().isoformat()}
+    if trip_ids:
+        logger.info(f"Flushed trip stats: {summary}")
+    return summary
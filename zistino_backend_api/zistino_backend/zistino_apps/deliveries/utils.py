@@ -2,9 +2,14 @@
 Utility functions for driver assignment and zone detection.
 """
 from zistino_apps.users.models import Zone, UserZone
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from zistino_apps.deliveries.models import Delivery
+from zistino_apps.deliveries.zone_index import get_zone_index
 from django.utils import timezone
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from datetime import datetime, timedelta
 
 User = get_user_model()
@@ -17,86 +22,120 @@ def find_zone_for_location(latitude, longitude):
     
     Uses distance-based matching: finds the closest zone within its radius.
     If multiple zones contain the point, returns the closest one.
+    If no zone contains the point, returns the nearest zone.
+    
+    Lookups are served from the process-local zone index (see zone_index.py).
     """
     if not latitude or not longitude:
         return None
     
-    # Find all active zones
-    zones = Zone.objects.filter(is_active=True, center_latitude__isnull=False, center_longitude__isnull=False)
+    return get_zone_index().resolve(latitude, longitude)
+
+
+def find_zones_for_locations(coordinates):
+    """
+    Batch version of find_zone_for_location.
+    
+    Args:
+        coordinates: Iterable of (latitude, longitude) pairs.
+    
+    Returns:
+        List of Zone objects (or None) in the same order as the input.
+    """
+    return get_zone_index().resolve_many(coordinates)
+
+
+PENDING_DELIVERY_STATUSES = ['assigned', 'in_progress']
+
+
+def get_zone_drivers(zone):
+    """
+    Active drivers in the zone, annotated with their pending delivery count
+    and their UserZone priority for this zone.
     
-    # Find zones that contain this point
-    containing_zones = []
-    for zone in zones:
-        if zone.contains_point(latitude, longitude):
-            distance = zone.calculate_distance_km(latitude, longitude)
-            containing_zones.append((zone, distance))
+    Ordered for assignment: least loaded first, then higher priority.
+    """
+    pending_count = Delivery.objects.filter(
+        driver=OuterRef('pk'),
+        status__in=PENDING_DELIVERY_STATUSES
+    ).order_by().values('driver').annotate(count=Count('id')).values('count')
+    zone_priority = UserZone.objects.filter(
+        user=OuterRef('pk'),
+        zone=zone
+    ).values('priority')[:1]
     
-    if not containing_zones:
-        # If no zone contains the point, find the nearest zone
-        min_distance = float('inf')
-        nearest_zone = None
-        for zone in zones:
-            distance = zone.calculate_distance_km(latitude, longitude)
-            if distance is not None and distance < min_distance:
-                min_distance = distance
-                nearest_zone = zone
-        return nearest_zone
+    return User.objects.filter(
+        user_zones__zone=zone,
+        is_driver=True,
+        is_active=True,
+        is_active_driver=True
+    ).annotate(
+        pending_count=Coalesce(Subquery(pending_count), 0),
+        zone_priority=Coalesce(Subquery(zone_priority), 0),
+    ).order_by('pending_count', '-zone_priority', 'id')
+
+
+def select_driver_for_zone(zone):
+    """
+    Pick and lock the least loaded driver in the zone in a single query.
+    Must be called inside a transaction.
     
-    # Return the closest zone that contains the point
-    containing_zones.sort(key=lambda x: x[1])
-    return containing_zones[0][0]
+    The chosen driver row is locked with FOR NO KEY UPDATE SKIP LOCKED, so
+    concurrent assignments in the same zone each get a different driver
+    instead of all picking the same "least loaded" one. If every candidate is
+    locked, waits for the least loaded one instead.
+    """
+    drivers = get_zone_drivers(zone)
+    driver = drivers.select_for_update(skip_locked=True, no_key=True, of=('self',)).first()
+    if driver is None:
+        driver = drivers.select_for_update(no_key=True, of=('self',)).first()
+    return driver
 
 
 def assign_driver_to_order(order, zone):
     """
-    Automatically assign a driver from the given zone to the order.
-    Uses round-robin strategy: assigns to driver with least pending deliveries.
+    Automatically assign a driver to the order.
+    
+    With DELIVERY_ASSIGNMENT_STRATEGY = 'nearest' the nearest driver with a
+    live position and free capacity is chosen (see nearest_drivers.py).
+    Otherwise, or when no such driver is found, uses the zone round-robin
+    strategy: assigns to the driver of the zone with least pending deliveries,
+    preferring higher UserZone priority on ties.
     
     Returns the created Delivery object or None if no driver found.
     """
-    if not zone:
-        return None
-    
-    # Find all active drivers in this zone
-    user_zones = UserZone.objects.filter(
-        zone=zone,
-        user__is_driver=True,
-        user__is_active=True,
-        user__is_active_driver=True
-    ).select_related('user')
-    
-    if not user_zones.exists():
+    use_nearest = (
+        getattr(settings, 'DELIVERY_ASSIGNMENT_STRATEGY', 'zone') == 'nearest'
+        and order.latitude and order.longitude
+    )
+    if not zone and not use_nearest:
         return None
     
-    # Get driver IDs
-    driver_ids = [uz.user.id for uz in user_zones]
-    
-    # Find driver with least pending/assigned deliveries (round-robin / least loaded)
-    drivers_with_counts = []
-    for driver_id in driver_ids:
-        pending_count = Delivery.objects.filter(
-            driver_id=driver_id,
-            status__in=['assigned', 'in_progress']
-        ).count()
-        drivers_with_counts.append((driver_id, pending_count))
-    
-    # Sort by pending count (ascending) - least loaded first
-    drivers_with_counts.sort(key=lambda x: x[1])
-    selected_driver_id = drivers_with_counts[0][0]
-    
-    # Get the selected driver
-    selected_driver = User.objects.get(id=selected_driver_id)
-    
-    # Create delivery
-    delivery = Delivery.objects.create(
-        driver=selected_driver,
-        order=order,
-        status='assigned',
-        address=order.address1 or order.address2 or '',
-        phone_number=order.phone1 or order.phone2 or order.user_phone_number or '',
-        latitude=order.latitude,
-        longitude=order.longitude,
-    )
+    with transaction.atomic():
+        selected_driver = None
+        if use_nearest:
+            from zistino_apps.deliveries.nearest_drivers import select_nearest_driver
+            selected_driver = select_nearest_driver(
+                order.latitude,
+                order.longitude,
+                capacity=getattr(settings, 'DELIVERY_DRIVER_CAPACITY', 0),
+                max_distance_km=getattr(settings, 'NEAREST_DRIVER_MAX_DISTANCE_KM', 0) or None,
+            )
+        if selected_driver is None and zone:
+            selected_driver = select_driver_for_zone(zone)
+        if selected_driver is None:
+            return None
+        
+        # Create delivery
+        delivery = Delivery.objects.create(
+            driver=selected_driver,
+            order=order,
+            status='assigned',
+            address=order.address1 or order.address2 or '',
+            phone_number=order.phone1 or order.phone2 or order.user_phone_number or '',
+            latitude=order.latitude,
+            longitude=order.longitude,
+        )
     
     return delivery
 
@@ -1,16 +1,21 @@
-from rest_framework import viewsets, status
+from rest_framework import viewsets, status, serializers
 from rest_framework.permissions import IsAuthenticated
 from zistino_apps.users.permissions import IsManager
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.views import APIView
-from drf_spectacular.utils import extend_schema, OpenApiExample
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
+from django.db import IntegrityError, transaction
 from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
 from django.utils import timezone
 from datetime import timedelta
+import json
 from zistino_apps.orders.models import Order
 
-from .models import Delivery, Trip, LocationUpdate, DeliverySurvey, DeliveryItem, WeightShortfall, SurveyQuestion, SurveyAnswer
+from .models import Delivery, Trip, LocationUpdate, TripTrack, DeliverySurvey, DeliveryItem, WeightShortfall, SurveyQuestion, SurveyAnswer
 from .serializers import (
     DeliverySerializer, TripSerializer, LocationUpdateSerializer, 
     DeliveryFollowupRequestSerializer, DeliverySearchRequestSerializer,
@@ -24,6 +29,21 @@ from .serializers import (
     SurveyQuestionUpdateSerializer, ManagerDriverSatisfactionRequestSerializer
 )
 from .tasks import check_and_send_delivery_reminders
+from .ingest import extract_batch_payload, ingest_location_batch, get_max_batch_size
+from .parsers import NDJSONParser
+from .routes import get_driver_route, ROUTE_FORMATS, ROUTE_FORMAT_POINTS
+from .tracks import LocationHistory, get_track_point
+from .renderers import EventStreamRenderer
+from .live_positions import (
+    get_active_driver_ids,
+    get_current_sequence,
+    get_live_positions,
+    parse_bbox,
+)
+
+# Live positions: suggested client poll interval. The endpoints never wait
+# server-side, so they do not hold one of the sync gunicorn workers.
+LIVE_POLL_INTERVAL_MS = 3000
 
 
 @extend_schema(tags=['Driver'], exclude=True)  # Excluded: using compatibility layer instead
@@ -1379,8 +1399,39 @@ class TripViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
+class CompactedLocationsMixin:
+    """
+    Location viewset reads that include the samples of compacted trips
+    (TripTrack blobs, see deliveries.tracks). Compacted samples are read-only.
+    """
+
+    def get_track_queryset(self):
+        return TripTrack.objects.all()
+
+    def list(self, request, *args, **kwargs):
+        history = LocationHistory(self.get_queryset(), self.get_track_queryset())
+        page = self.paginate_queryset(history)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(history, many=True).data)
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            pk = str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, ''))
+            point = get_track_point(int(pk), tracks=self.get_track_queryset()) if pk.isdigit() else None
+            if point is None:
+                raise
+            if self.action != 'retrieve':
+                raise serializers.ValidationError(
+                    {'detail': 'This location belongs to a compacted trip track and cannot be modified.'}
+                )
+            return point
+
+
 @extend_schema(tags=['Deliveries'])
-class LocationUpdateViewSet(viewsets.ModelViewSet):
+class LocationUpdateViewSet(CompactedLocationsMixin, viewsets.ModelViewSet):
     queryset = LocationUpdate.objects.all()
     serializer_class = LocationUpdateSerializer
     permission_classes = [IsAuthenticated]
@@ -1388,8 +1439,61 @@ class LocationUpdateViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return LocationUpdate.objects.filter(user=self.request.user)
 
+    def get_track_queryset(self):
+        return TripTrack.objects.filter(user=self.request.user)
+
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        try:
+            with transaction.atomic():
+                serializer.save(user=self.request.user)
+        except IntegrityError:
+            # Replay of a sample already stored for this trip (same client_timestamp)
+            existing = LocationUpdate.objects.filter(
+                user=self.request.user,
+                trip=serializer.validated_data.get('trip'),
+                client_timestamp=serializer.validated_data.get('client_timestamp'),
+            ).first()
+            if existing is None:
+                raise serializers.ValidationError(
+                    {'client_timestamp': ['A location with this timestamp already exists for this trip.']}
+                )
+            serializer.instance = existing
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {'client_timestamp': ['A location with this timestamp already exists for this trip.']}
+            )
+
+    @extend_schema(
+        tags=['Deliveries'],
+        operation_id='deliveries_locations_batch',
+        description=(
+            'Upload many GPS samples for one of your trips. Body: {"trip": id, "locations": [...]} '
+            'or NDJSON (one sample per line) with ?trip=<id>. Duplicate samples (same timestamp) are skipped.'
+        ),
+        request=dict,
+    )
+    @action(detail=False, methods=['post'], url_path='batch', parser_classes=[JSONParser, NDJSONParser])
+    def batch(self, request):
+        trip_id, samples = extract_batch_payload(request.data, request.query_params)
+        if not isinstance(samples, list) or not samples:
+            return Response({'detail': 'locations must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+        max_size = get_max_batch_size()
+        if len(samples) > max_size:
+            return Response(
+                {'detail': f'A batch may contain at most {max_size} locations.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            trip = Trip.objects.get(id=int(trip_id), user=request.user)
+        except (TypeError, ValueError, Trip.DoesNotExist):
+            return Response({'detail': 'Trip not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(ingest_location_batch(trip, request.user, samples))
 
 
 @extend_schema(
@@ -1614,6 +1718,10 @@ class ManagerTelephoneRequestView(APIView):
         if bulk_items:
             OrderItem.objects.bulk_create(bulk_items)
 
+            # bulk_create does not send post_save, so register legacy integer IDs explicitly
+            from zistino_apps.compatibility.legacyids.utils import sync_legacy_ids
+            sync_legacy_ids(OrderItem, [item.id for item in bulk_items])
+
         # Optionally create delivery
         delivery_id = None
         if create_delivery:
@@ -2122,12 +2230,19 @@ class ManagerDisapprovalsView(APIView):
             'type': 'object',
             'properties': {
                 'date': {'type': 'string', 'format': 'date', 'description': 'Date to analyze routes (YYYY-MM-DD). Defaults to today if not provided.'},
+                'routeFormat': {
+                    'type': 'string',
+                    'enum': list(ROUTE_FORMATS),
+                    'description': 'Route encoding: "points" (routePoints dicts, default), "polyline" (routePolyline Google encoded polyline + routeTimestamps) or "arrays" (route with parallel latitudes/longitudes/timestamps/speeds arrays).'
+                },
+                'tolerance': {'type': 'number', 'description': 'Douglas-Peucker simplification tolerance in meters (0 = full route, default).'},
             }
         }
     },
     examples=[
         OpenApiExample('Routes for specific date', value={'date': '2025-11-03'}),
-        OpenApiExample('Routes for today', value={})
+        OpenApiExample('Routes for today', value={}),
+        OpenApiExample('Simplified polyline for map rendering', value={'date': '2025-11-03', 'routeFormat': 'polyline', 'tolerance': 10})
     ],
     responses={
         200: {
@@ -2185,7 +2300,6 @@ class ManagerDriverRouteView(APIView):
     def post(self, request, driver_id):
         from django.contrib.auth import get_user_model
         from django.utils.dateparse import parse_date
-        from datetime import datetime, timedelta
 
         User = get_user_model()
         
@@ -2205,138 +2319,125 @@ class ManagerDriverRouteView(APIView):
         else:
             target_date = timezone.now().date()
 
-        # Date range for the day (timezone-aware)
-        date_start = timezone.make_aware(datetime.combine(target_date, datetime.min.time()))
-        date_end = timezone.make_aware(datetime.combine(target_date, datetime.max.time()))
+        route_format = request.data.get('routeFormat') or ROUTE_FORMAT_POINTS
+        if route_format not in ROUTE_FORMATS:
+            return Response({'detail': f'routeFormat must be one of: {", ".join(ROUTE_FORMATS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            tolerance = float(request.data.get('tolerance') or 0)
+        except (TypeError, ValueError):
+            return Response({'detail': 'tolerance must be a number of meters'}, status=status.HTTP_400_BAD_REQUEST)
+        if tolerance < 0:
+            return Response({'detail': 'tolerance must be a number of meters'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Get trips for this driver on this date
-        trips = Trip.objects.filter(
-            user=driver,
-            created_at__gte=date_start,
-            created_at__lte=date_end
-        ).order_by('created_at')
+        return Response(get_driver_route(driver, target_date, route_format, tolerance))
 
-        # Get deliveries for this driver on this date
-        deliveries = Delivery.objects.filter(
-            driver=driver,
-            delivery_date__gte=date_start,
-            delivery_date__lte=date_end
-        ).select_related('order', 'order__user')
-
-        # Build response
-        trips_data = []
-        total_distance = 0
-        total_duration = 0
-        total_pickups = 0
-        total_pickup_time = 0
-        matched_deliveries = set()  # Track deliveries already matched to avoid duplicates
 
-        for trip in trips:
-            # Get location updates for this trip
-            locations = LocationUpdate.objects.filter(
-                trip=trip
-            ).order_by('created_at')
-
-            route_points = []
-            for loc in locations:
-                route_points.append({
-                    'latitude': float(loc.latitude),
-                    'longitude': float(loc.longitude),
-                    'timestamp': loc.created_at.isoformat(),
-                    'speed': loc.speed
-                })
+@extend_schema(
+    tags=['Admin'],
+    operation_id='manager_drivers_live_positions',
+    summary='Live positions of active drivers',
+    description=(
+        'Latest known position of every active driver, read from the live position cache '
+        '(positions older than LIVE_POSITION_TTL are omitted). Optionally restricted to a bounding box. '
+        'To poll for changes pass the returned seq as `since` on the next request (every few seconds, '
+        'see pollIntervalMs): only positions updated afterwards are returned. The request answers '
+        'immediately and never waits for new positions.'
+    ),
+    parameters=[
+        OpenApiParameter('bbox', str, location=OpenApiParameter.QUERY, description='minLat,minLng,maxLat,maxLng'),
+        OpenApiParameter('since', int, location=OpenApiParameter.QUERY, description='Only positions updated after this sequence number'),
+    ],
+    responses={
+        200: {
+            'description': 'Live driver positions',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'seq': 1042,
+                        'pollIntervalMs': 3000,
+                        'count': 1,
+                        'drivers': [
+                            {
+                                'driverId': 'driver-uuid',
+                                'tripId': 12,
+                                'latitude': 35.6892,
+                                'longitude': 51.3890,
+                                'speed': 32,
+                                'heading': '110',
+                                'timestamp': '2025-11-03T08:15:00+00:00',
+                                'seq': 1042
+                            }
+                        ]
+                    }
+                }
+            }
+        }
+    }
+)
+class ManagerDriverLivePositionsView(APIView):
+    permission_classes = [IsAuthenticated, IsManager]
 
-            # Find pickup locations by matching deliveries to location updates
-            pickup_locations = []
-            for delivery in deliveries:
-                if not delivery.latitude or not delivery.longitude:
-                    continue
-                
-                # Skip if already matched to another trip
-                if delivery.id in matched_deliveries:
-                    continue
+    def get(self, request):
+        try:
+            bbox = parse_bbox(request.query_params['bbox']) if request.query_params.get('bbox') else None
+            since = int(request.query_params['since']) if request.query_params.get('since') else None
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-                # Find location updates where driver stopped near delivery location
-                # Threshold: within 100 meters (approx 0.001 degrees)
-                delivery_lat = float(delivery.latitude)
-                delivery_lng = float(delivery.longitude)
-                threshold = 0.001  # ~100 meters
+        # Read the sequence first so nothing updated during the read is missed next time
+        seq = get_current_sequence()
+        positions = get_live_positions(bbox=bbox, since=since, driver_ids=get_active_driver_ids())
 
-                pickup_locs = []
-                for loc in locations:
-                    lat_diff = abs(float(loc.latitude) - delivery_lat)
-                    lng_diff = abs(float(loc.longitude) - delivery_lng)
-                    
-                    # If stopped near delivery location (speed < 5 km/h or 0)
-                    if lat_diff < threshold and lng_diff < threshold and loc.speed < 5:
-                        pickup_locs.append(loc)
+        return Response({
+            'seq': max([seq] + [position['seq'] for position in positions]),
+            'pollIntervalMs': LIVE_POLL_INTERVAL_MS,
+            'count': len(positions),
+            'drivers': positions
+        })
 
-                if pickup_locs:
-                    # Mark as matched
-                    matched_deliveries.add(delivery.id)
-                    
-                    # Calculate arrival and departure times
-                    arrival = min(pickup_locs, key=lambda x: x.created_at)
-                    departure = max(pickup_locs, key=lambda x: x.created_at)
-                    
-                    time_spent = (departure.created_at - arrival.created_at).total_seconds()
-                    
-                    # Format time spent
-                    minutes = int(time_spent // 60)
-                    seconds = int(time_spent % 60)
-                    if minutes > 0:
-                        time_formatted = f"{minutes} minute{'s' if minutes != 1 else ''}"
-                        if seconds > 0:
-                            time_formatted += f" {seconds} second{'s' if seconds != 1 else ''}"
-                    else:
-                        time_formatted = f"{seconds} second{'s' if seconds != 1 else ''}"
-
-                    pickup_locations.append({
-                        'deliveryId': str(delivery.id),
-                        'customerAddress': delivery.address,
-                        'customerPhone': delivery.phone_number,
-                        'latitude': delivery_lat,
-                        'longitude': delivery_lng,
-                        'arrivalTime': arrival.created_at.isoformat(),
-                        'departureTime': departure.created_at.isoformat(),
-                        'timeSpentSeconds': int(time_spent),
-                        'timeSpentFormatted': time_formatted,
-                        'deliveredWeight': f"{delivery.delivered_weight:.2f}" if delivery.delivered_weight else "0.00"
-                    })
-                    
-                    total_pickup_time += time_spent
-                    total_pickups += 1
-
-            trips_data.append({
-                'tripId': trip.id,
-                'startTime': trip.created_at.isoformat(),
-                'endTime': (trip.created_at + timedelta(seconds=trip.duration)).isoformat() if trip.duration else None,
-                'distance': float(trip.distance / 1000) if trip.distance else 0.0,  # Convert to km
-                'duration': trip.duration,
-                'averageSpeed': float(trip.average_speed) if trip.average_speed else 0.0,
-                'routePoints': route_points,
-                'pickupLocations': pickup_locations
-            })
 
-            total_distance += float(trip.distance / 1000) if trip.distance else 0.0
-            total_duration += trip.duration or 0
+@extend_schema(
+    tags=['Admin'],
+    operation_id='manager_drivers_live_positions_stream',
+    summary='Stream live driver positions (server-sent events)',
+    description=(
+        'Server-sent events of driver position changes, one `position` event per driver (event id = sequence '
+        'number). Each response sends the changes since Last-Event-ID (all current positions on the first '
+        'request) and closes; EventSource reconnects after the `retry` interval and resumes from the last id, '
+        'so the connection polls without holding a server worker between updates.'
+    ),
+    parameters=[
+        OpenApiParameter('bbox', str, location=OpenApiParameter.QUERY, description='minLat,minLng,maxLat,maxLng'),
+    ],
+    responses={200: {'description': 'text/event-stream of position events'}}
+)
+class ManagerDriverLivePositionsStreamView(APIView):
+    permission_classes = [IsAuthenticated, IsManager]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
 
-        # Calculate summary
-        avg_pickup_time = total_pickup_time / total_pickups if total_pickups > 0 else 0
+    def get(self, request):
+        try:
+            bbox = parse_bbox(request.query_params['bbox']) if request.query_params.get('bbox') else None
+            last_event_id = request.META.get('HTTP_LAST_EVENT_ID')
+            since = int(last_event_id) if last_event_id else None
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({
-            'driverId': str(driver.id),
-            'driverPhone': driver.phone_number,
-            'date': target_date.isoformat(),
-            'trips': trips_data,
-            'summary': {
-                'totalTrips': len(trips_data),
-                'totalDistance': round(total_distance, 2),
-                'totalDuration': total_duration,
-                'totalPickups': total_pickups,
-                'averageTimePerPickup': int(avg_pickup_time)
-            }
-        })
+        seq = get_current_sequence()
+        positions = get_live_positions(bbox=bbox, since=since, driver_ids=get_active_driver_ids())
+
+        def events():
+            yield f"retry: {LIVE_POLL_INTERVAL_MS}\n\n"
+            for position in positions:
+                yield f"id: {position['seq']}\nevent: position\ndata: {json.dumps(position)}\n\n"
+            if since is None and not positions:
+                # Give the client a Last-Event-ID to resume from even with no drivers online
+                yield f"id: {seq}\n\n"
+
+        response = StreamingHttpResponse(events(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 
 @extend_schema(
@@ -2645,7 +2746,7 @@ class ManagerDriverAvailableDatesView(APIView):
 
     def get(self, request, driver_id):
         from django.contrib.auth import get_user_model
-        from django.db.models import Count
+        from django.db.models import Count, Sum
 
         User = get_user_model()
         
@@ -2717,6 +2818,24 @@ class ManagerDriverAvailableDatesView(APIView):
                     }
                 dates_dict[date_str]['locationUpdateCount'] = loc['location_count']
 
+        # Add samples of compacted trips (counted on the day the track starts)
+        compacted_tracks = TripTrack.objects.filter(
+            user=driver,
+            started_at__isnull=False
+        ).values('started_at__date').annotate(
+            location_count=Sum('point_count')
+        )
+        for track in compacted_tracks:
+            date_str = track['started_at__date'].isoformat()
+            if date_str not in dates_dict:
+                dates_dict[date_str] = {
+                    'date': date_str,
+                    'tripCount': 0,
+                    'deliveryCount': 0,
+                    'locationUpdateCount': 0
+                }
+            dates_dict[date_str]['locationUpdateCount'] += track['location_count'] or 0
+
         # Convert to sorted list (most recent first)
         available_dates = sorted(dates_dict.values(), key=lambda x: x['date'], reverse=True)
 
@@ -2957,7 +3076,7 @@ class ManagerTripViewSet(viewsets.ModelViewSet):
 
 
 @extend_schema(tags=['Manager'])
-class ManagerLocationViewSet(viewsets.ReadOnlyModelViewSet):
+class ManagerLocationViewSet(CompactedLocationsMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for managers to view all location updates - Manager-only."""
     queryset = LocationUpdate.objects.all()
     serializer_class = LocationUpdateSerializer
@@ -3547,7 +3666,7 @@ class DeliveryReminderCheckView(APIView):
         
         This will:
         - Find deliveries scheduled between 45-75 minutes from now
-        - Send reminder SMS to customers
+        - Queue reminder SMS to customers in the SMS outbox
         - Mark deliveries as having reminder sent
         
         Returns task execution results.
@@ -0,0 +1,227 @@
+"""
+Process-local spatial index for zone lookups.
+
+Zones are loaded once into packed float arrays (radians, cosines and
+containment thresholds precomputed) and bucketed into a lat/lng grid by their
+bounding box. Zones whose zonepath holds a polygon are matched by
+point-in-polygon; the others by their radius circle. A point lookup only
+evaluates the zones registered in its grid cell, and the nearest-zone
+fallback is a single pass over the packed arrays - no ORM query or Decimal
+conversion per call.
+
+The index is rebuilt lazily when a Zone is saved or deleted: once the
+transaction commits, the signal bumps a version number in the shared cache
+so every worker process picks up the change on its next lookup.
+"""
+import logging
+import threading
+from array import array
+from math import radians, cos, sin, floor
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from zistino_apps.deliveries.geo import EARTH_RADIUS_KM, parse_zonepath
+
+logger = logging.getLogger(__name__)
+
+# Grid cell size in degrees (~11 km of latitude)
+GRID_CELL_DEGREES = 0.1
+# Zones whose bounding box spans more cells than this are checked for every point
+MAX_CELLS_PER_ZONE = 400
+
+ZONE_INDEX_VERSION_KEY = 'deliveries:zone_index_version'
+
+# Parsed polygons keyed by (zone id, zonepath) so rebuilds do not re-parse unchanged zones
+_polygon_cache = {}
+
+
+def _cell(lat, lng):
+    return floor(lat / GRID_CELL_DEGREES), floor(lng / GRID_CELL_DEGREES)
+
+
+def get_zone_polygon(zone):
+    """Return the parsed (cached) polygon for a zone, or None if zonepath is not a polygon."""
+    key = (zone.id, zone.zonepath)
+    if key not in _polygon_cache:
+        _polygon_cache[key] = parse_zonepath(zone.zonepath)
+    return _polygon_cache[key]
+
+
+class ZoneIndex:
+    """Immutable snapshot of active zones, laid out for fast point lookups."""
+
+    def __init__(self, zones):
+        self.zones = []
+        self.polygons = []
+        self.lat_rad = array('d')
+        self.lng_rad = array('d')
+        self.cos_lat = array('d')
+        # Haversine "a" term at the zone radius: point is inside when a <= threshold
+        self.threshold = array('d')
+        self.circle_grid = {}
+        self.circle_oversized = []
+        self.polygon_grid = {}
+        self.polygon_oversized = []
+
+        for zone in zones:
+            polygon = get_zone_polygon(zone)
+            if zone.center_latitude is not None and zone.center_longitude is not None:
+                lat = float(zone.center_latitude)
+                lng = float(zone.center_longitude)
+            elif polygon is not None:
+                lat, lng = polygon.centroid()
+            else:
+                continue
+            radius_km = float(zone.radius_km or 0)
+            position = len(self.zones)
+
+            self.zones.append(zone)
+            self.polygons.append(polygon)
+            self.lat_rad.append(radians(lat))
+            self.lng_rad.append(radians(lng))
+            self.cos_lat.append(cos(radians(lat)))
+            half_angle = min(radius_km / EARTH_RADIUS_KM, 3.141592653589793) / 2
+            self.threshold.append(sin(half_angle) ** 2)
+
+            if polygon is not None:
+                self._register(self.polygon_grid, self.polygon_oversized, position,
+                               polygon.min_lat, polygon.min_lng, polygon.max_lat, polygon.max_lng)
+            else:
+                lat_delta = radius_km / 111.32
+                cos_lat = cos(radians(lat))
+                lng_delta = radius_km / (111.32 * cos_lat) if cos_lat > 1e-6 else 360.0
+                self._register(self.circle_grid, self.circle_oversized, position,
+                               lat - lat_delta, lng - lng_delta, lat + lat_delta, lng + lng_delta)
+
+    @staticmethod
+    def _register(grid, oversized, position, min_lat, min_lng, max_lat, max_lng):
+        """Add a zone to every grid cell touched by its bounding box."""
+        min_row, min_col = _cell(min_lat, min_lng)
+        max_row, max_col = _cell(max_lat, max_lng)
+
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > MAX_CELLS_PER_ZONE:
+            oversized.append(position)
+            return
+
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                grid.setdefault((row, col), []).append(position)
+
+    def __len__(self):
+        return len(self.zones)
+
+    def _haversine_a(self, position, lat_rad, lng_rad, cos_lat):
+        dlat = lat_rad - self.lat_rad[position]
+        dlng = lng_rad - self.lng_rad[position]
+        return sin(dlat / 2) ** 2 + self.cos_lat[position] * cos_lat * sin(dlng / 2) ** 2
+
+    def resolve(self, latitude, longitude):
+        """
+        Return the zone containing the point, or the nearest zone when no zone
+        contains it. Returns None if there are no zones.
+
+        Polygon zones are matched first; zones without a polygon fall back to
+        their radius. Among several matches the closest center wins.
+        """
+        if not self.zones:
+            return None
+
+        lat = float(latitude)
+        lng = float(longitude)
+        lat_rad = radians(lat)
+        lng_rad = radians(lng)
+        cos_lat = cos(lat_rad)
+        cell = _cell(lat, lng)
+
+        best_position = None
+        best_a = None
+        for position in self.polygon_grid.get(cell, []) + self.polygon_oversized:
+            if self.polygons[position].contains(lat, lng):
+                a = self._haversine_a(position, lat_rad, lng_rad, cos_lat)
+                if best_a is None or a < best_a:
+                    best_position, best_a = position, a
+        if best_position is not None:
+            return self.zones[best_position]
+
+        for position in self.circle_grid.get(cell, []) + self.circle_oversized:
+            a = self._haversine_a(position, lat_rad, lng_rad, cos_lat)
+            if a <= self.threshold[position] and (best_a is None or a < best_a):
+                best_position, best_a = position, a
+        if best_position is not None:
+            return self.zones[best_position]
+
+        # No containing zone: nearest center over the packed arrays
+        for position in range(len(self.zones)):
+            a = self._haversine_a(position, lat_rad, lng_rad, cos_lat)
+            if best_a is None or a < best_a:
+                best_position, best_a = position, a
+        return self.zones[best_position]
+
+    def resolve_many(self, coordinates):
+        """Resolve zones for an iterable of (latitude, longitude) pairs in one call."""
+        results = []
+        for latitude, longitude in coordinates:
+            if not latitude or not longitude:
+                results.append(None)
+            else:
+                results.append(self.resolve(latitude, longitude))
+        return results
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def _current_version():
+    try:
+        return cache.get(ZONE_INDEX_VERSION_KEY, 0)
+    except Exception:
+        # Cache unavailable: keep serving the local snapshot
+        logger.warning('Zone index version check failed; using local snapshot', exc_info=True)
+        return _index_version
+
+
+def build_zone_index():
+    """Load active zones from the database into a new ZoneIndex."""
+    from zistino_apps.users.models import Zone
+
+    zones = Zone.objects.filter(
+        Q(center_latitude__isnull=False, center_longitude__isnull=False) | ~Q(zonepath=''),
+        is_active=True,
+    ).order_by('id')
+    return ZoneIndex(zones)
+
+
+def get_zone_index():
+    """Return the process-local ZoneIndex, rebuilding it if a Zone changed."""
+    global _index, _index_version
+    version = _current_version()
+    if _index is not None and version == _index_version:
+        return _index
+    with _lock:
+        if _index is None or version != _index_version:
+            _index = build_zone_index()
+            _index_version = version
+        return _index
+
+
+def invalidate_zone_index():
+    """
+    Mark the zone index stale in every process (called on Zone save/delete).
+    The version is bumped after commit, so no worker keeps an index built from
+    uncommitted zones under the new version.
+    """
+    def bump():
+        global _index
+        _index = None
+        try:
+            if cache.add(ZONE_INDEX_VERSION_KEY, 1, timeout=None):
+                return
+            cache.incr(ZONE_INDEX_VERSION_KEY)
+        except Exception:
+            logger.warning('Failed to broadcast zone index invalidation', exc_info=True)
+
+    transaction.on_commit(bump)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification, Comment
+from .models import Notification, Comment, SmsBroadcast
 
 
 # Temporarily hide notifications from admin by not registering
@@ -67,3 +67,13 @@ class CommentAdmin(admin.ModelAdmin):
         }),
     )
 
+
+@admin.register(SmsBroadcast)
+class SmsBroadcastAdmin(admin.ModelAdmin):
+    """Admin for SMS broadcasts (read-only progress)"""
+    list_display = ('id', 'status', 'total_recipients', 'sent_count', 'failed_count', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('message', 'id')
+    readonly_fields = ('id', 'message', 'created_by', 'status', 'total_recipients', 'sent_count', 'failed_count',
+                       'failed_numbers', 'last_user_id', 'error', 'created_at', 'started_at', 'finished_at')
+    ordering = ('-created_at',)
@@ -0,0 +1,141 @@
+"""
+SMS broadcasts to all active users.
+
+The endpoint only stores an SmsBroadcast and returns its id; a Celery worker
+streams the recipients ordered by id in chunks of BROADCAST_CHUNK_SIZE and
+sends each chunk through the concurrent, rate-limited provider pool
+(payments.sms_http.send_many). Counters and the last processed user id are
+written after every chunk, so the status endpoint shows progress and a
+redelivered task resumes where the previous worker stopped.
+
+An error mid-run marks the broadcast failed and is re-raised; the task
+retries with exponential backoff (up to BROADCAST_MAX_RETRIES times) and a
+failed broadcast resumes after its last processed recipient.
+"""
+import logging
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from zistino_apps.notifications.models import SmsBroadcast
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_CHUNK_SIZE = 500
+BROADCAST_MAX_RETRIES = 5
+MAX_FAILED_NUMBERS = 10
+
+
+def get_broadcast_recipients():
+    User = get_user_model()
+    return User.objects.filter(
+        is_active=True,
+        phone_number__isnull=False
+    ).exclude(phone_number='')
+
+
+def create_broadcast(message, created_by=None):
+    """
+    Store a broadcast for all active users and schedule it after commit.
+    Returns the SmsBroadcast, or None if there are no recipients.
+    """
+    from zistino_apps.notifications.tasks import send_broadcast_task
+
+    total = get_broadcast_recipients().count()
+    if total == 0:
+        return None
+    broadcast = SmsBroadcast.objects.create(
+        message=message,
+        created_by=created_by,
+        total_recipients=total,
+    )
+    transaction.on_commit(lambda: send_broadcast_task.delay(str(broadcast.id)))
+    return broadcast
+
+
+def run_broadcast(broadcast_id, chunk_size=BROADCAST_CHUNK_SIZE):
+    """
+    Send a broadcast, or the rest of a running or failed one. Returns a
+    summary dict; errors are re-raised after marking the broadcast failed.
+    """
+    from zistino_apps.payments.sms_http import send_many
+    from zistino_apps.payments.sms_service import _send_sms_melipayamak
+
+    SmsBroadcast.objects.filter(pk=broadcast_id, status__in=['queued', 'failed']).update(
+        status='running',
+        error='',
+        finished_at=None,
+        started_at=Coalesce(F('started_at'), Value(timezone.now())),
+    )
+    broadcast = SmsBroadcast.objects.get(pk=broadcast_id)
+    if broadcast.status != 'running':
+        return {'broadcast': str(broadcast_id), 'status': broadcast.status}
+
+    recipients = get_broadcast_recipients().order_by('id')
+    if broadcast.last_user_id:
+        recipients = recipients.filter(id__gt=broadcast.last_user_id)
+    rows = recipients.values_list('id', 'phone_number').iterator(chunk_size=chunk_size)
+
+    failed_numbers = list(broadcast.failed_numbers)
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            # Free-form messages go through MeliPayamak, as for single notifications
+            results = send_many(
+                [(phone_number, broadcast.message) for _, phone_number in chunk],
+                send=_send_sms_melipayamak,
+            )
+            sent = sum(1 for _, success, _ in results if success)
+            failed = len(results) - sent
+            if len(failed_numbers) < MAX_FAILED_NUMBERS:
+                failed_numbers.extend(
+                    phone_number for phone_number, success, _ in results if not success
+                )
+                failed_numbers = failed_numbers[:MAX_FAILED_NUMBERS]
+            SmsBroadcast.objects.filter(pk=broadcast_id).update(
+                sent_count=F('sent_count') + sent,
+                failed_count=F('failed_count') + failed,
+                failed_numbers=failed_numbers,
+                last_user_id=chunk[-1][0],
+            )
+    except Exception as e:
+        logger.error(f"SMS broadcast {broadcast_id} failed: {str(e)}", exc_info=True)
+        SmsBroadcast.objects.filter(pk=broadcast_id).update(
+            status='failed', error=str(e), finished_at=timezone.now(),
+        )
+        raise
+
+    SmsBroadcast.objects.filter(pk=broadcast_id).update(status='completed', finished_at=timezone.now())
+    broadcast.refresh_from_db()
+    summary = {
+        'broadcast': str(broadcast_id),
+        'status': broadcast.status,
+        'sent': broadcast.sent_count,
+        'failed': broadcast.failed_count,
+    }
+    logger.info(f"SMS broadcast finished: {summary}")
+    return summary
+
+
+def serialize_broadcast(broadcast):
+    processed = broadcast.sent_count + broadcast.failed_count
+    return {
+        'broadcastId': str(broadcast.id),
+        'status': broadcast.status,
+        'message': broadcast.message,
+        'totalUsers': broadcast.total_recipients,
+        'successful': broadcast.sent_count,
+        'failed': broadcast.failed_count,
+        'pending': max(broadcast.total_recipients - processed, 0) if broadcast.status in ('queued', 'running') else 0,
+        'failedNumbers': broadcast.failed_numbers,
+        'error': broadcast.error or None,
+        'createdAt': broadcast.created_at.isoformat(),
+        'startedAt': broadcast.started_at.isoformat() if broadcast.started_at else None,
+        'finishedAt': broadcast.finished_at.isoformat() if broadcast.finished_at else None,
+    }
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:35
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SmsBroadcast',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('message', models.TextField()),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('total_recipients', models.PositiveIntegerField(default=0)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('failed_numbers', models.JSONField(blank=True, default=list, help_text='First failed phone numbers')),
+                ('last_user_id', models.UUIDField(blank=True, help_text='Last recipient processed; a restarted job resumes after it', null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sms_broadcasts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'SMS Broadcast',
+                'verbose_name_plural': 'SMS Broadcasts',
+                'db_table': 'sms_broadcasts',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -55,3 +55,36 @@ class Comment(models.Model):
 
     def __str__(self):
         return f"Comment {self.id} on {self.product_id}"
+
+
+class SmsBroadcast(models.Model):
+    """SMS sent to every active user as a background job (see notifications.broadcasts)."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    message = models.TextField()
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='sms_broadcasts')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    failed_numbers = models.JSONField(default=list, blank=True, help_text='First failed phone numbers')
+    last_user_id = models.UUIDField(blank=True, null=True, help_text='Last recipient processed; a restarted job resumes after it')
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'sms_broadcasts'
+        verbose_name = 'SMS Broadcast'
+        verbose_name_plural = 'SMS Broadcasts'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"SMS Broadcast {self.id} - {self.status}"
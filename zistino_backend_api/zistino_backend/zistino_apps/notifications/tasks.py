@@ -0,0 +1,32 @@
+"""
+Celery tasks for notifications.
+"""
+import logging
+from celery import shared_task
+
+from .broadcasts import BROADCAST_MAX_RETRIES, run_broadcast
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    acks_late=True,
+    autoretry_for=(Exception,),
+    retry_backoff=30,
+    retry_backoff_max=600,
+    max_retries=BROADCAST_MAX_RETRIES,
+)
+def send_broadcast_task(broadcast_id):
+    """
+    Send an SMS broadcast to all active users (see notifications.broadcasts).
+    Acknowledged late, so a broadcast interrupted by a worker crash is
+    redelivered, and retried with backoff after an error; either way it
+    resumes after the last processed recipient.
+    """
+    try:
+        summary = run_broadcast(broadcast_id)
+    except Exception as e:
+        logger.error(f"❌ Error in send_broadcast_task: {str(e)}", exc_info=True)
+        raise
+    summary['success'] = True
+    return summary
@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema, OpenApiExample
+from django.conf import settings
 from django.db import models
 
 from .models import Order, OrderItem
@@ -283,6 +284,10 @@ class CustomerOrdersViewSet(viewsets.ViewSet):
             ))
         OrderItem.objects.bulk_create(bulk_items)
         
+        # bulk_create does not send post_save, so register legacy integer IDs explicitly
+        from zistino_apps.compatibility.legacyids.utils import sync_legacy_ids
+        sync_legacy_ids(OrderItem, [item.id for item in bulk_items])
+        
         # mark coupon usage and clear discount if present
         bd = getattr(basket, 'discount', None)
         if bd:
@@ -297,7 +302,8 @@ class CustomerOrdersViewSet(viewsets.ViewSet):
         response_data = {'id': str(order.id)}
         
         # Automatic driver assignment based on location
-        if latitude and longitude:
+        # (in batch mode orders are dispatched by the dispatch_pending_orders_task instead)
+        if latitude and longitude and settings.DELIVERY_ASSIGNMENT_MODE != 'batch':
             from zistino_apps.deliveries.utils import find_zone_for_location, assign_driver_to_order, find_nearest_time_slot
             zone = find_zone_for_location(latitude, longitude)
             if zone:
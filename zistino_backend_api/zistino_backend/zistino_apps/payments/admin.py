@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Wallet, Transaction, Coupon, BasketDiscount, DepositRequest
+from .models import Wallet, Transaction, Coupon, BasketDiscount, DepositRequest, SmsMessage
+from .sms_outbox import SECRET_PURPOSES, requeue_sms
 
 
 class TransactionInline(admin.TabularInline):
@@ -119,3 +120,41 @@ class DepositRequestAdmin(admin.ModelAdmin):
             return self.readonly_fields + ('status',)
         return self.readonly_fields
 
+
+@admin.register(SmsMessage)
+class SmsMessageAdmin(admin.ModelAdmin):
+    """Admin for the SMS outbox"""
+    list_display = ('phone_number', 'purpose', 'status', 'attempts', 'next_attempt_at', 'expires_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'purpose', 'created_at')
+    search_fields = ('phone_number', 'id')
+    readonly_fields = ('id', 'phone_number', 'purpose', 'masked_message', 'attempts', 'last_error', 'sent_at', 'expires_at', 'created_at', 'updated_at')
+    ordering = ('-created_at',)
+    actions = ['requeue_messages']
+    
+    fieldsets = (
+        ('Message', {
+            'fields': ('id', 'phone_number', 'purpose', 'masked_message')
+        }),
+        ('Delivery', {
+            'fields': ('status', 'attempts', 'max_attempts', 'next_attempt_at', 'expires_at', 'sent_at', 'last_error')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'updated_at')
+        }),
+    )
+    
+    @admin.display(description='Message')
+    def masked_message(self, obj):
+        """Message text, with verification and password-reset codes hidden."""
+        if obj.purpose in SECRET_PURPOSES:
+            return '••••••' if obj.message else '(cleared)'
+        return obj.message
+    
+    def has_add_permission(self, request):
+        # Messages are queued by the application (sms_outbox.enqueue_sms)
+        return False
+    
+    @admin.action(description='Requeue selected messages')
+    def requeue_messages(self, request, queryset):
+        count = requeue_sms(queryset.exclude(status='sent'))
+        self.message_user(request, f'{count} message(s) requeued.')
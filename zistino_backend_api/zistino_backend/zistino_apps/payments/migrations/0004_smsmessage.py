@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:33
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_depositrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SmsMessage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('phone_number', models.CharField(max_length=20)),
+                ('message', models.TextField()),
+                ('purpose', models.CharField(blank=True, help_text='What the SMS is for, e.g. otp, deposit, lottery', max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('retrying', 'Retrying'), ('sent', 'Sent'), ('dead', 'Dead letter')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('last_error', models.TextField(blank=True)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time of the next send attempt')),
+                ('sent_at', models.DateTimeField(blank=True, help_text='When the provider accepted the message', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'SMS Message',
+                'verbose_name_plural': 'SMS Messages',
+                'db_table': 'sms_messages',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='sms_messages_status_next_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated manually - Clear the codes of verification SMS already sent
+
+from django.db import migrations
+
+SECRET_PURPOSES = ['otp', 'password_reset']
+
+
+def clear_sent_codes(apps, schema_editor):
+    """Verification and password-reset codes are no longer kept once sent or dead"""
+    SmsMessage = apps.get_model('payments', 'SmsMessage')
+    SmsMessage.objects.filter(
+        purpose__in=SECRET_PURPOSES,
+        status__in=['sent', 'dead'],
+    ).exclude(message='').update(message='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_smsmessage'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_sent_codes, migrations.RunPython.noop),
+    ]
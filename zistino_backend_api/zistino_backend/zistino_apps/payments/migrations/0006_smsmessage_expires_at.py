@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_clear_sent_sms_codes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smsmessage',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, help_text='Send-by deadline; later the message is dead-lettered unsent', null=True),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 import uuid
 
@@ -138,4 +139,43 @@ class DepositRequest(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"Deposit Request {self.id} - {self.user.phone_number} - {self.amount} Rials - {self.status}"
\ No newline at end of file
+        return f"Deposit Request {self.id} - {self.user.phone_number} - {self.amount} Rials - {self.status}"
+
+class SmsMessage(models.Model):
+    """
+    Outgoing SMS queued by request handlers and sent by Celery workers
+    (see payments.sms_outbox).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('retrying', 'Retrying'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead letter'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    phone_number = models.CharField(max_length=20)
+    message = models.TextField()
+    purpose = models.CharField(max_length=50, blank=True, help_text='What the SMS is for, e.g. otp, deposit, lottery')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text='Earliest time of the next send attempt')
+    sent_at = models.DateTimeField(blank=True, null=True, help_text='When the provider accepted the message')
+    expires_at = models.DateTimeField(blank=True, null=True, help_text='Send-by deadline; later the message is dead-lettered unsent')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'sms_messages'
+        verbose_name = 'SMS Message'
+        verbose_name_plural = 'SMS Messages'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='sms_messages_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"SMS {self.id} - {self.phone_number} - {self.status}"
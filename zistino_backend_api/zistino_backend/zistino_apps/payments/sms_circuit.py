@@ -0,0 +1,176 @@
+"""
+Circuit breakers for the SMS providers.
+
+Every provider call (see sms_http.provider_post) records its outcome and
+latency in per-provider counters in the shared cache, bucketed by
+CIRCUIT_BUCKET_SECONDS, so all workers see the same rolling window of
+SMS_CIRCUIT_WINDOW_SECONDS. Network errors, HTTP 5xx and calls slower than
+SMS_CIRCUIT_SLOW_CALL_SECONDS count as failures.
+
+    closed     calls go through
+    open       the error rate over the window reached SMS_CIRCUIT_ERROR_RATE
+               (with at least SMS_CIRCUIT_MIN_CALLS calls); calls fail
+               immediately for SMS_CIRCUIT_COOLDOWN_SECONDS
+    half_open  cool-down over; a single probe call is let through - success
+               closes the circuit, failure opens it again
+
+send_sms() checks the state to route straight to the healthy provider.
+Cache failures never block sending (the breaker fails open).
+"""
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_BUCKET_SECONDS = 10
+CIRCUIT_KEY = 'payments:sms_circuit:{provider}:{name}'
+CIRCUIT_BUCKET_KEY = 'payments:sms_circuit:{provider}:{bucket}:{field}'
+_FIELDS = ('calls', 'failures', 'latency_ms')
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _window_buckets(now=None):
+    current = int((now or time.time()) // CIRCUIT_BUCKET_SECONDS)
+    count = max(_setting('SMS_CIRCUIT_WINDOW_SECONDS', 60) // CIRCUIT_BUCKET_SECONDS, 1)
+    return range(current - count + 1, current + 1)
+
+
+def _bucket_keys(provider, buckets):
+    return [
+        CIRCUIT_BUCKET_KEY.format(provider=provider, bucket=bucket, field=field)
+        for bucket in buckets for field in _FIELDS
+    ]
+
+
+def _incr(key, delta, timeout):
+    cache.add(key, 0, timeout=timeout)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Expired between add and incr
+        cache.set(key, delta, timeout=timeout)
+
+
+def get_stats(provider):
+    """Rolling-window counters: calls, failures, errorRate, averageLatencyMs."""
+    buckets = _window_buckets()
+    values = cache.get_many(_bucket_keys(provider, buckets))
+    totals = dict.fromkeys(_FIELDS, 0)
+    for bucket in buckets:
+        for field in _FIELDS:
+            totals[field] += values.get(CIRCUIT_BUCKET_KEY.format(provider=provider, bucket=bucket, field=field), 0)
+    calls = totals['calls']
+    return {
+        'calls': calls,
+        'failures': totals['failures'],
+        'errorRate': round(totals['failures'] / calls, 3) if calls else 0.0,
+        'averageLatencyMs': int(totals['latency_ms'] / calls) if calls else 0,
+    }
+
+
+def get_state(provider):
+    """Return (state, open_until timestamp or None)."""
+    open_until = cache.get(CIRCUIT_KEY.format(provider=provider, name='open_until'))
+    if open_until is None:
+        return STATE_CLOSED, None
+    if time.time() < open_until:
+        return STATE_OPEN, open_until
+    return STATE_HALF_OPEN, open_until
+
+
+def is_available(provider):
+    """True unless the provider's circuit is open (half-open counts as available)."""
+    try:
+        return get_state(provider)[0] != STATE_OPEN
+    except Exception:
+        logger.warning(f'SMS circuit state unavailable for {provider}', exc_info=True)
+        return True
+
+
+def allow_request(provider):
+    """Whether a call to the provider may be made now; in half-open state only one probe passes."""
+    try:
+        state, _ = get_state(provider)
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_OPEN:
+            return False
+        probe_timeout = int(_setting('SMS_HTTP_CONNECT_TIMEOUT', 5) + _setting('SMS_HTTP_READ_TIMEOUT', 30)) + 1
+        return cache.add(CIRCUIT_KEY.format(provider=provider, name='probe'), 1, timeout=probe_timeout)
+    except Exception:
+        logger.warning(f'SMS circuit state unavailable for {provider}', exc_info=True)
+        return True
+
+
+def open_circuit(provider):
+    cooldown = _setting('SMS_CIRCUIT_COOLDOWN_SECONDS', 30)
+    # Kept well past the cool-down so the half-open state is visible
+    cache.set(CIRCUIT_KEY.format(provider=provider, name='open_until'), time.time() + cooldown, timeout=cooldown * 20)
+    cache.delete(CIRCUIT_KEY.format(provider=provider, name='probe'))
+    logger.warning(f'SMS circuit for {provider} opened for {cooldown}s')
+
+
+def reset_circuit(provider):
+    """Close the circuit and forget the rolling window."""
+    cache.delete_many(
+        [CIRCUIT_KEY.format(provider=provider, name=name) for name in ('open_until', 'probe')]
+        + _bucket_keys(provider, _window_buckets())
+    )
+
+
+def record_result(provider, success, latency_seconds):
+    """Record one provider call and open or close the circuit accordingly."""
+    try:
+        if latency_seconds > _setting('SMS_CIRCUIT_SLOW_CALL_SECONDS', 10):
+            success = False
+        timeout = _setting('SMS_CIRCUIT_WINDOW_SECONDS', 60) + CIRCUIT_BUCKET_SECONDS
+        bucket = _window_buckets()[-1]
+        _incr(CIRCUIT_BUCKET_KEY.format(provider=provider, bucket=bucket, field='calls'), 1, timeout)
+        _incr(CIRCUIT_BUCKET_KEY.format(provider=provider, bucket=bucket, field='latency_ms'), int(latency_seconds * 1000), timeout)
+        if not success:
+            _incr(CIRCUIT_BUCKET_KEY.format(provider=provider, bucket=bucket, field='failures'), 1, timeout)
+
+        state, _ = get_state(provider)
+        if state == STATE_HALF_OPEN:
+            if success:
+                reset_circuit(provider)
+                logger.info(f'SMS circuit for {provider} closed after a successful probe')
+            else:
+                open_circuit(provider)
+        elif state == STATE_CLOSED and not success:
+            stats = get_stats(provider)
+            if (stats['calls'] >= _setting('SMS_CIRCUIT_MIN_CALLS', 5)
+                    and stats['errorRate'] >= _setting('SMS_CIRCUIT_ERROR_RATE', 0.5)):
+                open_circuit(provider)
+    except Exception:
+        logger.warning(f'Failed to record SMS circuit result for {provider}', exc_info=True)
+
+
+def get_circuit_states(providers):
+    """State and rolling statistics of each provider, for the manager endpoint."""
+    states = []
+    for provider in providers:
+        state, open_until = get_state(provider)
+        states.append({
+            'provider': provider,
+            'state': state,
+            'openUntil': datetime.fromtimestamp(open_until, tz=dt_timezone.utc).isoformat() if state == STATE_OPEN else None,
+            **get_stats(provider),
+        })
+    return states
@@ -0,0 +1,140 @@
+"""
+HTTP client layer for the SMS providers.
+
+All provider calls go through provider_post(), which
+    - reuses keep-alive connections from one pooled requests.Session per
+      process (rebuilt after a fork, so Celery prefork children never share
+      sockets), with separate connect and read timeouts;
+    - waits for a slot of the provider's rate limit. Limits are messages per
+      second per provider (SMS_PROVIDER_RATE_LIMITS), counted in one-second
+      windows in the shared cache so they hold across all workers;
+    - feeds the provider's circuit breaker and fails fast while it is open.
+
+send_many() pushes many messages through a bounded thread pool; the rate
+limiter keeps the pool within what each provider accepts.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+from .sms_circuit import CircuitOpenError, allow_request, record_result
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_MELIPAYAMAK = 'melipayamak'
+PROVIDER_PAYAMAK_BASE = 'payamak_base'
+
+RATE_LIMIT_KEY = 'payments:sms_rate:{provider}:{window}'
+
+_session_lock = threading.Lock()
+_session = None
+_session_pid = None
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=getattr(settings, 'SMS_HTTP_POOL_CONNECTIONS', 4),
+        pool_maxsize=getattr(settings, 'SMS_HTTP_POOL_SIZE', 32),
+        max_retries=0,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide pooled session."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session = _build_session()
+            _session_pid = pid
+        return _session
+
+
+def get_timeout():
+    """(connect, read) timeout in seconds."""
+    return (
+        getattr(settings, 'SMS_HTTP_CONNECT_TIMEOUT', 5),
+        getattr(settings, 'SMS_HTTP_READ_TIMEOUT', 30),
+    )
+
+
+def wait_for_rate_limit(provider):
+    """Block until the provider's per-second limit has room. Cache failures do not block sending."""
+    limit = getattr(settings, 'SMS_PROVIDER_RATE_LIMITS', {}).get(provider)
+    if not limit:
+        return
+    while True:
+        now = time.time()
+        key = RATE_LIMIT_KEY.format(provider=provider, window=int(now))
+        try:
+            cache.add(key, 0, timeout=5)
+            count = cache.incr(key)
+        except Exception:
+            logger.warning(f'SMS rate limiter unavailable for {provider}; sending without limit', exc_info=True)
+            return
+        if count <= limit:
+            return
+        time.sleep(max(int(now) + 1 - now, 0.01))
+
+
+def provider_post(provider, url, **kwargs):
+    """
+    POST to an SMS provider over the pooled session, within its rate limit.
+    Raises CircuitOpenError (a RequestException) without calling the
+    provider while its circuit is open (see sms_circuit).
+    """
+    if not allow_request(provider):
+        raise CircuitOpenError(f'{provider} is unavailable (circuit open)')
+    wait_for_rate_limit(provider)
+    kwargs.setdefault('timeout', get_timeout())
+    started = time.monotonic()
+    try:
+        response = get_session().post(url, **kwargs)
+    except requests.exceptions.RequestException:
+        record_result(provider, False, time.monotonic() - started)
+        raise
+    record_result(provider, response.status_code < 500, time.monotonic() - started)
+    return response
+
+
+def send_many(messages, send=None, max_workers=None):
+    """
+    Send (phone_number, message) pairs concurrently.
+
+    Args:
+        messages: Iterable of (phone_number, message); submitted at once, so
+                  pass large recipient lists in chunks.
+        send: Function (phone_number, message) -> (success, error_message);
+              defaults to sms_service.send_sms.
+        max_workers: Concurrent sends; defaults to SMS_SEND_CONCURRENCY.
+
+    Returns a list of (phone_number, success, error_message) in input order.
+    """
+    if send is None:
+        from zistino_apps.payments.sms_service import send_sms as send
+    if max_workers is None:
+        max_workers = getattr(settings, 'SMS_SEND_CONCURRENCY', 8)
+
+    def send_one(item):
+        phone_number, message = item
+        try:
+            success, error_message = send(phone_number, message)
+        except Exception as e:
+            success, error_message = False, f"Unexpected error: {str(e)}"
+        return phone_number, success, error_message
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(send_one, messages))
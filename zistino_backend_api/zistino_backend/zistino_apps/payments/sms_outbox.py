@@ -0,0 +1,239 @@
+"""
+Persistent SMS outbox.
+
+Request handlers call enqueue_sms(), which stores an SmsMessage row and hands
+its id to a Celery worker once the surrounding transaction commits, so request
+latency no longer depends on the SMS providers.
+
+A worker claims the row with a conditional UPDATE (only one worker can move it
+to 'sending'), calls the providers through sms_service.send_sms() and records
+the outcome:
+
+    sent      provider accepted the message
+    retrying  failed; next attempt after SMS_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+              capped at SMS_RETRY_MAX_SECONDS
+    dead      failed max_attempts times, or its send-by deadline (expires_at)
+              passed first; kept for inspection and manual requeue
+
+Each message may carry a send-by deadline: callers pass expires_at (e.g. the
+expiry of the code being sent), otherwise SMS_PURPOSE_TTL_SECONDS gives a
+default per purpose. A message is never sent or retried past its deadline, so
+a verification code is not delivered after it stopped working.
+
+process_sms_outbox() runs periodically, dead-letters expired messages and
+re-schedules due messages whose task was lost (broker outage, worker crash
+mid-send).
+
+Messages carrying secrets (SECRET_PURPOSES: verification and password-reset
+codes) have their text cleared once they are sent or dead, so codes do not
+stay readable in the sms_messages table.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from zistino_apps.payments.models import SmsMessage
+
+logger = logging.getLogger(__name__)
+
+DELIVERABLE_STATUSES = ['pending', 'retrying']
+# Purposes whose message text is a one-time code
+SECRET_PURPOSES = ['otp', 'password_reset']
+
+
+def get_max_attempts():
+    return getattr(settings, 'SMS_MAX_ATTEMPTS', 5)
+
+
+def get_retry_delay(attempts):
+    """Seconds to wait after the given number of failed attempts."""
+    base = getattr(settings, 'SMS_RETRY_BASE_SECONDS', 30)
+    cap = getattr(settings, 'SMS_RETRY_MAX_SECONDS', 3600)
+    return min(cap, base * 2 ** max(attempts - 1, 0))
+
+
+def get_expires_at(purpose, expires_at=None):
+    """Send-by deadline of a new message: the caller's, else the purpose's default TTL, else none."""
+    if expires_at is not None:
+        return expires_at
+    ttl = getattr(settings, 'SMS_PURPOSE_TTL_SECONDS', {}).get(purpose)
+    return timezone.now() + timedelta(seconds=ttl) if ttl else None
+
+
+def expire_sms(queryset, now=None):
+    """Dead-letter the deliverable messages of queryset whose deadline has passed. Returns the count."""
+    now = now or timezone.now()
+    expired = queryset.filter(status__in=DELIVERABLE_STATUSES, expires_at__lte=now)
+    expired.filter(purpose__in=SECRET_PURPOSES).update(message='')
+    return expired.update(status='dead', last_error='Expired before it could be sent', updated_at=now)
+
+
+def schedule_sms(message_id, countdown=None):
+    """Hand a queued message to a worker. Broker failures are left to the sweeper."""
+    from zistino_apps.payments.tasks import send_sms_message_task
+
+    try:
+        send_sms_message_task.apply_async(args=[str(message_id)], countdown=countdown)
+    except Exception:
+        logger.warning(f'Could not schedule SMS {message_id}; the outbox sweeper will send it', exc_info=True)
+
+
+def enqueue_sms(phone_number, message, purpose='', expires_at=None):
+    """
+    Queue an SMS for asynchronous delivery and return the SmsMessage.
+    The worker is only notified after the current transaction commits.
+    expires_at is the send-by deadline (see get_expires_at()).
+    """
+    sms = SmsMessage.objects.create(
+        phone_number=phone_number,
+        message=message,
+        purpose=purpose,
+        max_attempts=get_max_attempts(),
+        expires_at=get_expires_at(purpose, expires_at),
+    )
+    transaction.on_commit(lambda: schedule_sms(sms.id))
+    return sms
+
+
+def enqueue_sms_many(messages, purpose=''):
+    """
+    Queue many (phone_number, message) or (phone_number, message, expires_at)
+    tuples with a single INSERT and return the SmsMessage rows. Workers are
+    notified after the transaction commits.
+    """
+    max_attempts = get_max_attempts()
+    rows = SmsMessage.objects.bulk_create(
+        [
+            SmsMessage(
+                phone_number=phone_number,
+                message=message,
+                purpose=purpose,
+                max_attempts=max_attempts,
+                expires_at=get_expires_at(purpose, expires_at[0] if expires_at else None),
+            )
+            for phone_number, message, *expires_at in messages
+        ],
+        batch_size=500,
+    )
+    ids = [sms.id for sms in rows]
+    transaction.on_commit(lambda: [schedule_sms(message_id) for message_id in ids])
+    return rows
+
+
+def deliver_sms(message_id):
+    """
+    Send one queued message. Returns its new status, or None if the message
+    is not due or another worker already claimed it. Messages past their
+    send-by deadline are dead-lettered without being sent.
+    """
+    from zistino_apps.payments.sms_service import send_sms
+
+    now = timezone.now()
+    if expire_sms(SmsMessage.objects.filter(pk=message_id), now):
+        logger.warning(f"SMS {message_id} expired before it could be sent; moved to dead letters")
+        return 'dead'
+    claimed = SmsMessage.objects.filter(
+        pk=message_id,
+        status__in=DELIVERABLE_STATUSES,
+        next_attempt_at__lte=now,
+    ).update(status='sending', attempts=F('attempts') + 1, updated_at=now)
+    if not claimed:
+        return None
+
+    sms = SmsMessage.objects.get(pk=message_id)
+    try:
+        success, error_message = send_sms(sms.phone_number, sms.message)
+    except Exception as e:
+        success, error_message = False, f"Unexpected error: {str(e)}"
+
+    countdown = None
+    retry_delay = get_retry_delay(sms.attempts)
+    if success:
+        sms.status = 'sent'
+        sms.sent_at = timezone.now()
+        sms.last_error = ''
+    elif sms.attempts >= sms.max_attempts:
+        sms.status = 'dead'
+        sms.last_error = error_message or ''
+        logger.error(f"SMS {sms.id} to {sms.phone_number} failed {sms.attempts} times; moved to dead letters: {error_message}")
+    elif sms.expires_at is not None and timezone.now() + timedelta(seconds=retry_delay) >= sms.expires_at:
+        sms.status = 'dead'
+        sms.last_error = error_message or ''
+        logger.error(f"SMS {sms.id} to {sms.phone_number} failed and would expire before the next attempt; moved to dead letters: {error_message}")
+    else:
+        countdown = retry_delay
+        sms.status = 'retrying'
+        sms.last_error = error_message or ''
+        sms.next_attempt_at = timezone.now() + timedelta(seconds=countdown)
+        logger.warning(f"SMS {sms.id} to {sms.phone_number} failed (attempt {sms.attempts}); retrying in {countdown}s: {error_message}")
+    if sms.status in ('sent', 'dead') and sms.purpose in SECRET_PURPOSES:
+        sms.message = ''
+    sms.save(update_fields=['status', 'message', 'sent_at', 'last_error', 'next_attempt_at', 'updated_at'])
+
+    if countdown is not None:
+        schedule_sms(sms.id, countdown=countdown)
+    return sms.status
+
+
+def requeue_sms(messages):
+    """
+    Give dead or stuck messages a fresh set of attempts and schedule them.
+    Messages whose code was already cleared or whose deadline passed are skipped.
+    """
+    now = timezone.now()
+    ids = [sms.id for sms in messages if sms.message and (sms.expires_at is None or sms.expires_at > now)]
+    SmsMessage.objects.filter(id__in=ids).update(
+        status='pending',
+        attempts=0,
+        next_attempt_at=now,
+        updated_at=now,
+    )
+    for message_id in ids:
+        transaction.on_commit(lambda message_id=message_id: schedule_sms(message_id))
+    return len(ids)
+
+
+def process_sms_outbox(limit=500):
+    """
+    Recover messages whose task was lost. Returns a summary dict.
+
+    Deliverable messages past their send-by deadline are dead-lettered. Messages stuck in 'sending' for longer than SMS_SENDING_TIMEOUT (the
+    worker died mid-send) count as a failed attempt; due messages not
+    picked up within SMS_SWEEP_GRACE_SECONDS are scheduled again.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'SMS_SENDING_TIMEOUT', 300))
+    stuck = SmsMessage.objects.filter(status='sending', updated_at__lt=stale)
+    stuck_dead = stuck.filter(attempts__gte=F('max_attempts'))
+    stuck_dead.filter(purpose__in=SECRET_PURPOSES).update(message='')
+    dead = stuck_dead.update(
+        status='dead', last_error='Sending timed out', updated_at=now,
+    )
+    recovered = stuck.update(
+        status='retrying', last_error='Sending timed out', next_attempt_at=now, updated_at=now,
+    )
+
+    expired = expire_sms(SmsMessage.objects.all(), now)
+
+    grace = now - timedelta(seconds=getattr(settings, 'SMS_SWEEP_GRACE_SECONDS', 60))
+    due_ids = list(SmsMessage.objects.filter(
+        status__in=DELIVERABLE_STATUSES,
+        next_attempt_at__lte=grace,
+    ).order_by('next_attempt_at').values_list('id', flat=True)[:limit])
+    for message_id in due_ids:
+        schedule_sms(message_id)
+
+    summary = {
+        'scheduled': len(due_ids),
+        'recovered': recovered,
+        'dead': dead,
+        'expired': expired,
+        'timestamp': now.isoformat(),
+    }
+    if due_ids or recovered or dead or expired:
+        logger.info(f"Processed SMS outbox: {summary}")
+    return summary
@@ -1,12 +1,21 @@
 """
 SMS Service Module
 Handles SMS sending via Payamak BaseServiceNumber and MeliPayamak APIs.
+
+The functions here call the providers synchronously over the pooled,
+rate-limited client in sms_http. Request handlers queue
+messages with sms_outbox.enqueue_sms() instead; the notification helpers
+below (deposit, delivery reminder) already do.
 """
 import logging
 import json
 import requests
 from django.conf import settings
 
+from .sms_circuit import is_available
+from .sms_http import PROVIDER_MELIPAYAMAK, PROVIDER_PAYAMAK_BASE, provider_post
+from .sms_outbox import enqueue_sms
+
 logger = logging.getLogger(__name__)
 
 
@@ -110,11 +119,11 @@ def _send_sms_melipayamak(phone_number, message):
         logger.info(f"Message length: {len(message)} characters")
         
         # Send POST request
-        response = requests.post(
+        response = provider_post(
+            PROVIDER_MELIPAYAMAK,
             send_endpoint,
             data=payload,
-            headers=headers,
-            timeout=30
+            headers=headers
         )
         
         logger.info(f"MeliPayamak API Response Status: {response.status_code}")
@@ -294,11 +303,11 @@ def send_payamak_base_service_sms(phone_number, text_code):
         logger.info(f"Using endpoint: {send_endpoint}")
         logger.info(f"BodyId: {body_id}, Text: {text_code}")
         
-        response = requests.post(
+        response = provider_post(
+            PROVIDER_PAYAMAK_BASE,
             send_endpoint,
             data=payload,
             headers=headers,
-            timeout=30,
             verify=False
         )
         
@@ -374,7 +383,10 @@ def send_sms(phone_number, message):
     Priority order:
     0. Payamak BaseServiceNumber (single approved pattern – temporary global usage)
     1. MeliPayamak (if MELIPAYAMAK_USERNAME and MELIPAYAMAK_API_KEY are configured)
-    2. Development mode (log to console only)
+    2. Development mode (log to console only, when no provider is configured)
+    
+    Providers whose circuit breaker is open (see sms_circuit) are skipped
+    without a network call.
     
     Args:
         phone_number (str): Phone number to send SMS to
@@ -390,7 +402,12 @@ def send_sms(phone_number, message):
         payamak_password = settings.PAYAMAK_PASSWORD
         payamak_body_id = settings.PAYAMAK_BODY_ID
 
-        if payamak_username and payamak_password and payamak_body_id:
+        payamak_configured = bool(payamak_username and payamak_password and payamak_body_id)
+        payamak_error = None
+        if payamak_configured and not is_available(PROVIDER_PAYAMAK_BASE):
+            payamak_error = "Payamak BaseServiceNumber is unavailable (circuit open)"
+            logger.warning(f"{payamak_error}. Routing to MeliPayamak.")
+        elif payamak_configured:
             if is_free_form:
                 logger.warning(f"⚠️ WARNING: Attempting to send free-form message via Payamak BaseServiceNumber to {phone_number}")
                 logger.warning("⚠️ BaseServiceNumber is for pattern-based OTPs only. Message may not be delivered!")
@@ -403,6 +420,7 @@ def send_sms(phone_number, message):
                     logger.warning(f"⚠️ BaseServiceNumber returned success, but free-form messages may not be delivered to {phone_number}")
                 return True, None
             else:
+                payamak_error = error_message
                 logger.warning(f"Payamak BaseServiceNumber failed: {error_message}. Falling back to MeliPayamak.")
 
         melipayamak_username = settings.MELIPAYAMAK_USERNAME
@@ -412,6 +430,10 @@ def send_sms(phone_number, message):
             logger.info("Using MeliPayamak SMS service (fallback provider)")
             return _send_sms_melipayamak(phone_number, message)
         
+        if payamak_configured:
+            # Payamak failed or is unavailable and there is no fallback provider
+            return False, payamak_error
+        
         # No SMS credentials configured - log to console (development mode)
         logger.warning("No SMS credentials configured. SMS will be logged only.")
         logger.info(f"[SMS] To: {phone_number}")
@@ -429,23 +451,23 @@ def send_sms(phone_number, message):
 
 def send_deposit_request_confirmation(phone_number, amount):
     """
-    Send SMS confirmation when customer creates deposit request.
+    Queue SMS confirmation when customer creates deposit request.
     
     Args:
         phone_number (str): Customer phone number
         amount (Decimal): Deposit amount
         
     Returns:
-        bool: True if SMS was sent successfully
+        bool: True if SMS was queued for sending
     """
     message = f"Your deposit request of {amount:,.0f} Rials has been registered. Please deposit the money and wait for verification."
-    success, _ = send_sms(phone_number, message)
-    return success
+    enqueue_sms(phone_number, message, purpose='deposit')
+    return True
 
 
 def send_deposit_confirmation(phone_number, amount, balance):
     """
-    Send SMS confirmation when deposit is approved and money is added to wallet.
+    Queue SMS confirmation when deposit is approved and money is added to wallet.
     
     Args:
         phone_number (str): Customer phone number
@@ -453,16 +475,16 @@ def send_deposit_confirmation(phone_number, amount, balance):
         balance (Decimal): New wallet balance
         
     Returns:
-        bool: True if SMS was sent successfully
+        bool: True if SMS was queued for sending
     """
     message = f"{amount:,.0f} Rials have been deposited into your account. Your current balance is {balance:,.0f} Rials."
-    success, _ = send_sms(phone_number, message)
-    return success
+    enqueue_sms(phone_number, message, purpose='deposit')
+    return True
 
 
 def send_deposit_rejection(phone_number, amount, reason=None):
     """
-    Send SMS notification when deposit request is rejected.
+    Queue SMS notification when deposit request is rejected.
     
     Args:
         phone_number (str): Customer phone number
@@ -470,18 +492,18 @@ def send_deposit_rejection(phone_number, amount, reason=None):
         reason (str, optional): Reason for rejection
         
     Returns:
-        bool: True if SMS was sent successfully
+        bool: True if SMS was queued for sending
     """
     message = f"Your deposit request of {amount:,.0f} Rials has been rejected."
     if reason:
         message += f" Reason: {reason}"
-    success, _ = send_sms(phone_number, message)
-    return success
+    enqueue_sms(phone_number, message, purpose='deposit')
+    return True
 
 
 def send_delivery_reminder(phone_number, delivery_date, delivery_id=None):
     """
-    Send SMS reminder 1 hour before delivery time period.
+    Queue SMS reminder 1 hour before delivery time period.
     
     Args:
         phone_number (str): Customer phone number
@@ -489,10 +511,20 @@ def send_delivery_reminder(phone_number, delivery_date, delivery_id=None):
         delivery_id (str, optional): Delivery ID for reference
         
     Returns:
-        bool: True if SMS was sent successfully
+        bool: True if SMS was queued for sending
     """
-    from datetime import datetime, timedelta
-    from django.utils import timezone
+    enqueue_sms(
+        phone_number,
+        format_delivery_reminder(delivery_date),
+        purpose='delivery_reminder',
+        expires_at=delivery_date,
+    )
+    return True
+
+
+def format_delivery_reminder(delivery_date):
+    """Reminder text for a delivery in the 2-hour period starting at delivery_date."""
+    from datetime import timedelta
     
     delivery_start = delivery_date
     delivery_end = delivery_date + timedelta(hours=2)
@@ -501,10 +533,7 @@ def send_delivery_reminder(phone_number, delivery_date, delivery_id=None):
     end_time = delivery_end.strftime('%H:%M')
     delivery_date_str = delivery_start.strftime('%Y/%m/%d')
     
-    message = f"یادآوری: راننده در بازه زمانی {start_time} تا {end_time} امروز ({delivery_date_str}) به آدرس شما خواهد آمد. لطفا آماده باشید."
-    
-    success, _ = send_sms(phone_number, message)
-    return success
+    return f"یادآوری: راننده در بازه زمانی {start_time} تا {end_time} امروز ({delivery_date_str}) به آدرس شما خواهد آمد. لطفا آماده باشید."
 
 
 def send_sms_with_pattern(phone_number, pattern_id, pattern_args):
@@ -559,11 +588,11 @@ def send_sms_with_pattern(phone_number, pattern_id, pattern_args):
         logger.info(f"Pattern ID: {pattern_id}")
         logger.info(f"Pattern args: {pattern_args}")
         
-        response = requests.post(
+        response = provider_post(
+            PROVIDER_MELIPAYAMAK,
             rest_endpoint,
             json=payload,
-            headers=headers,
-            timeout=30
+            headers=headers
         )
         
         logger.info(f"MeliPayamak Smart API Response Status: {response.status_code}")
@@ -695,11 +724,11 @@ def add_melipayamak_pattern(title, body, black_list_id=1):
         logger.info(f"Adding MeliPayamak pattern: {title}")
         logger.info(f"Pattern body: {body}")
         
-        response = requests.post(
+        response = provider_post(
+            PROVIDER_MELIPAYAMAK,
             endpoint,
             data=payload,
-            headers=headers,
-            timeout=30
+            headers=headers
         )
         
         logger.info(f"MeliPayamak Pattern API Response Status: {response.status_code}")
@@ -0,0 +1,39 @@
+"""
+Celery tasks for outgoing SMS.
+"""
+import logging
+from celery import shared_task
+from django.utils import timezone
+
+from .sms_outbox import deliver_sms, process_sms_outbox
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def send_sms_message_task(message_id):
+    """Send one queued SmsMessage (retries are scheduled by the outbox, see payments.sms_outbox)."""
+    try:
+        return deliver_sms(message_id)
+    except Exception as e:
+        logger.error(f"❌ Error in send_sms_message_task for {message_id}: {str(e)}", exc_info=True)
+        return None
+
+
+@shared_task
+def process_sms_outbox_task():
+    """
+    Periodic task that re-schedules queued SMS whose task was lost and
+    recovers messages stuck in 'sending'.
+    """
+    try:
+        summary = process_sms_outbox()
+        summary['success'] = True
+        return summary
+    except Exception as e:
+        logger.error(f"❌ Error in process_sms_outbox_task: {str(e)}", exc_info=True)
+        return {
+            'success': False,
+            'error': str(e),
+            'timestamp': timezone.now().isoformat()
+        }
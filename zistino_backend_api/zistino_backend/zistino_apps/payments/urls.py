@@ -25,4 +25,6 @@ urlpatterns = [
     path('manager/driver-credits', views.ManagerDriverCreditsView.as_view(), name='manager-driver-credits'),
     # Manager manual payment record
     path('manager/payments/record', views.ManagerPaymentRecordView.as_view(), name='manager-payments-record'),
+    # Manager SMS provider health (circuit breakers)
+    path('manager/sms-providers', views.ManagerSmsProvidersView.as_view(), name='manager-sms-providers'),
 ]
@@ -18,6 +18,8 @@ from .serializers import (
     DepositRequestSerializer, DepositRequestCreateSerializer,
     DepositRequestSearchSerializer, DepositApproveSerializer, DepositRejectSerializer
 )
+from .sms_circuit import get_circuit_states, reset_circuit
+from .sms_http import PROVIDER_MELIPAYAMAK, PROVIDER_PAYAMAK_BASE
 from .sms_service import send_deposit_request_confirmation, send_deposit_confirmation, send_deposit_rejection, send_sms, add_melipayamak_pattern, send_sms_with_pattern, send_verification_code_pattern
 from django.utils import timezone
 
@@ -1208,3 +1210,37 @@ class ManagerPaymentRecordView(APIView):
                 'status': tx.status
             }
         }, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    tags=['Admin'],
+    operation_id='manager_sms_providers',
+    summary='SMS provider health',
+    description='Circuit breaker state and rolling error rate / latency of each SMS provider. POST {"provider": ...} closes a circuit manually.',
+    responses={
+        200: {
+            'description': 'Provider states',
+            'content': {'application/json': {'example': {
+                'providers': [
+                    {'provider': 'payamak_base', 'state': 'open', 'openUntil': '2025-11-01T12:00:30+00:00',
+                     'calls': 12, 'failures': 9, 'errorRate': 0.75, 'averageLatencyMs': 5012},
+                    {'provider': 'melipayamak', 'state': 'closed', 'openUntil': None,
+                     'calls': 40, 'failures': 0, 'errorRate': 0.0, 'averageLatencyMs': 180}
+                ]
+            }}}
+        }
+    }
+)
+class ManagerSmsProvidersView(APIView):
+    permission_classes = [IsAuthenticated, IsManager]
+    providers = (PROVIDER_PAYAMAK_BASE, PROVIDER_MELIPAYAMAK)
+
+    def get(self, request):
+        return Response({'providers': get_circuit_states(self.providers)}, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        provider = request.data.get('provider')
+        if provider not in self.providers:
+            return Response({'detail': f"provider must be one of: {', '.join(self.providers)}"}, status=status.HTTP_400_BAD_REQUEST)
+        reset_circuit(provider)
+        return Response({'providers': get_circuit_states(self.providers)}, status=status.HTTP_200_OK)
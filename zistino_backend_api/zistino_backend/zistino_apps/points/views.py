@@ -1521,16 +1521,13 @@ class AdminLotteryViewSet(viewsets.ModelViewSet):
         lottery.drawn_at = timezone.now()
         lottery.save()
         
-        # Send SMS notification to winner
+        # Queue SMS notification to winner (sent by a Celery worker)
         sms_success = False
         try:
-            from zistino_apps.payments.sms_service import send_sms
-            winner_name = f"{winner_user.first_name} {winner_user.last_name}".strip() or winner_user.phone_number
+            from zistino_apps.payments.sms_outbox import enqueue_sms
             message = f"شما برنده هستید! قرعه کشی: {lottery.title}"
-            sms_success, sms_error = send_sms(winner_user.phone_number, message)
-            if not sms_success:
-                # Log error but don't fail the draw
-                logger.warning(f"Failed to send SMS to lottery winner {winner_user.phone_number}: {sms_error}")
+            enqueue_sms(winner_user.phone_number, message, purpose='lottery')
+            sms_success = True
         except Exception as e:
             # Log error but don't fail the draw
             logger.error(f"Error sending SMS to lottery winner: {str(e)}", exc_info=True)
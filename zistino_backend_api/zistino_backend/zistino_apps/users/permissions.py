@@ -1,3 +1,4 @@
+from django.core.exceptions import ImproperlyConfigured
 from rest_framework import permissions
 
 
@@ -11,3 +12,33 @@ class IsManager(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated and request.user.is_staff
 
+
+class HasClaims(permissions.BasePermission):
+    """
+    Permission class to check role claims (RoleClaim values such as
+    'Permissions.Orders.View'). The view lists the claims it needs in
+    `required_claims`; all of them must be granted by the user's roles.
+    A view without claims is a configuration error, never an open door.
+    Claims are precompiled per role set, so the check runs without queries
+    (see compatibility.claims).
+    """
+    message = 'You do not have the required permissions to access this endpoint.'
+    required_claims = ()
+
+    def has_permission(self, request, view):
+        from zistino_apps.compatibility.claims import user_has_claims
+
+        claims = self.required_claims or getattr(view, 'required_claims', ())
+        if not claims:
+            raise ImproperlyConfigured(
+                f'{view.__class__.__name__} uses HasClaims but does not set required_claims.'
+            )
+        return bool(request.user and request.user.is_authenticated
+                    and user_has_claims(request.user, *claims))
+
+
+def require_claims(*claim_values):
+    """HasClaims for a fixed set of claims: permission_classes = [IsAuthenticated, require_claims('Permissions.Orders.View')]"""
+    if not claim_values:
+        raise ImproperlyConfigured('require_claims() needs at least one claim.')
+    return type('HasClaims', (HasClaims,), {'required_claims': tuple(claim_values)})
@@ -303,6 +303,10 @@ class ManagerUserByRoleView(APIView):
             'type': 'object',
             'properties': {
                 'zoneId': {'type': 'integer', 'description': 'Zone ID to filter drivers (optional)'},
+                'latitude': {'type': 'number', 'description': 'With longitude: return the nearest drivers to this point by live position (optional)'},
+                'longitude': {'type': 'number', 'description': 'With latitude: return the nearest drivers to this point by live position (optional)'},
+                'limit': {'type': 'integer', 'description': 'Number of nearest drivers to return (default 5, max 50)'},
+                'maxOpenDeliveries': {'type': 'integer', 'description': 'Only drivers with fewer pending deliveries than this (optional)'},
             }
         }
     },
@@ -324,6 +328,16 @@ class ManagerUserByRoleView(APIView):
             value={
                 'zoneId': 2
             }
+        ),
+        OpenApiExample(
+            'Get nearest drivers',
+            description='Get the 3 drivers nearest to a point that have fewer than 5 pending deliveries',
+            value={
+                'latitude': 35.7219,
+                'longitude': 51.3347,
+                'limit': 3,
+                'maxOpenDeliveries': 5
+            }
         )
     ],
     responses={
@@ -343,7 +357,9 @@ class ManagerUserByRoleView(APIView):
                                 'id': '46e818ce-0518-4c64-8438-27bc7163a706',
                                 'name': 'Jane Smith',
                                 'phone_number': '+989121234568',
-                                'zones': ['North Tehran']
+                                'zones': ['North Tehran'],
+                                'distanceKm': 1.42,
+                                'openDeliveries': 2
                             }
                         ]
                     }
@@ -357,27 +373,65 @@ class DriversByZoneView(APIView):
     permission_classes = [IsAuthenticated, IsManager]
     
     def post(self, request):
-        """Get drivers list for dropdown. Optionally filter by zoneId."""
-        from .serializers import UserSerializer
+        """Get drivers list for dropdown. Optionally filter by zoneId or order by distance to a point."""
+        from zistino_apps.deliveries.nearest_drivers import DEFAULT_NEAREST_DRIVERS, find_nearest_drivers
         
         zone_id = request.data.get('zoneId')
+        latitude = request.data.get('latitude')
+        longitude = request.data.get('longitude')
         
         # Start with all active drivers
         queryset = User.objects.filter(is_driver=True, is_active=True, is_active_driver=True)
         
         # Filter by zone if provided
         if zone_id:
-            user_zones = UserZone.objects.filter(zone_id=zone_id, user__is_driver=True, user__is_active=True)
-            driver_ids = [uz.user.id for uz in user_zones]
-            queryset = queryset.filter(id__in=driver_ids)
-        
-        # Return simplified driver list for dropdown
-        drivers_data = [{
-            'id': str(driver.id),
-            'name': f"{driver.first_name} {driver.last_name}".strip() or driver.phone_number,
-            'phone_number': driver.phone_number,
-            'zones': [uz.zone.zone for uz in driver.user_zones.all()]
-        } for driver in queryset.order_by('first_name', 'last_name')]
+            queryset = queryset.filter(id__in=UserZone.objects.filter(zone_id=zone_id).values('user_id'))
+        queryset = queryset.prefetch_related('user_zones__zone')
+        
+        def driver_data(driver):
+            return {
+                'id': str(driver.id),
+                'name': f"{driver.first_name} {driver.last_name}".strip() or driver.phone_number,
+                'phone_number': driver.phone_number,
+                'zones': [uz.zone.zone for uz in driver.user_zones.all()]
+            }
+        
+        if latitude is None or longitude is None:
+            # Return simplified driver list for dropdown
+            drivers_data = [driver_data(driver) for driver in queryset.order_by('first_name', 'last_name')]
+            return Response({
+                'drivers': drivers_data
+            }, status=status.HTTP_200_OK)
+        
+        # Nearest drivers by live position
+        try:
+            latitude = float(latitude)
+            longitude = float(longitude)
+            limit = min(int(request.data.get('limit') or DEFAULT_NEAREST_DRIVERS), 50)
+            max_open = request.data.get('maxOpenDeliveries')
+            max_open = int(max_open) if max_open is not None else None
+        except (TypeError, ValueError):
+            return Response({'detail': 'latitude, longitude, limit and maxOpenDeliveries must be numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'detail': 'limit must be a positive integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        nearest = find_nearest_drivers(
+            latitude,
+            longitude,
+            k=limit,
+            max_open_deliveries=max_open,
+            driver_ids=queryset.values_list('id', flat=True) if zone_id else None,
+        )
+        drivers = {str(driver.id): driver for driver in queryset.filter(id__in=[n.driver_id for n in nearest])}
+        drivers_data = []
+        for candidate in nearest:
+            driver = drivers.get(candidate.driver_id)
+            if driver is None:
+                continue
+            data = driver_data(driver)
+            data['distanceKm'] = round(candidate.distance_km, 2)
+            data['openDeliveries'] = candidate.open_deliveries
+            drivers_data.append(data)
         
         return Response({
             'drivers': drivers_data
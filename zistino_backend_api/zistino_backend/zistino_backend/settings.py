@@ -197,6 +197,14 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'zistino_apps.compatibility.exceptions.compatibility_exception_handler',
 }
 
+# JWT authentication user cache (see zistino_apps.compatibility.auth_cache)
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60, cast=int)
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=1024, cast=int)
+
+# Full-text search backend (see zistino_apps.compatibility.search.backends).
+# Use 'zistino_apps.compatibility.search.backends.LocalSearchBackend' for tests without PostgreSQL.
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='zistino_apps.compatibility.search.backends.PostgresSearchBackend')
+
 # drf-spectacular settings (ترکیب نسخه‌ی قدیمی + نیازهای جدید)
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Zistino Backend API',
@@ -339,7 +347,98 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULE = {
     'check-delivery-reminders': {
         'task': 'zistino_apps.deliveries.tasks.check_and_send_delivery_reminders',
-        'schedule': 15.0,  # Run every 15 minutes
-        # 'schedule': crontab(minute='*/15'),  # Alternative: every 15 minutes using crontab
+        'schedule': 60.0,  # Run every minute (the reminder window is 30 minutes wide)
     },
 }
+
+# SMS outbox
+# Failed sends are retried after SMS_RETRY_BASE_SECONDS * 2 ** (attempt - 1), capped at SMS_RETRY_MAX_SECONDS
+SMS_MAX_ATTEMPTS = config('SMS_MAX_ATTEMPTS', default=5, cast=int)
+SMS_RETRY_BASE_SECONDS = config('SMS_RETRY_BASE_SECONDS', default=30, cast=int)
+SMS_RETRY_MAX_SECONDS = config('SMS_RETRY_MAX_SECONDS', default=3600, cast=int)
+# Messages in 'sending' for longer than this (seconds) are treated as a failed attempt
+SMS_SENDING_TIMEOUT = config('SMS_SENDING_TIMEOUT', default=300, cast=int)
+# Send-by deadline (seconds after queueing) per purpose, used when the caller gives none.
+# Messages past their deadline are dead-lettered instead of sent (e.g. expired codes).
+SMS_PURPOSE_TTL_SECONDS = {
+    'otp': config('SMS_OTP_TTL_SECONDS', default=300, cast=int),
+    'password_reset': config('SMS_PASSWORD_RESET_TTL_SECONDS', default=600, cast=int),
+    'delivery_reminder': config('SMS_DELIVERY_REMINDER_TTL_SECONDS', default=3600, cast=int),
+}
+
+# SMS provider HTTP client (pooled keep-alive connections, see payments.sms_http)
+SMS_HTTP_POOL_SIZE = config('SMS_HTTP_POOL_SIZE', default=32, cast=int)
+SMS_HTTP_CONNECT_TIMEOUT = config('SMS_HTTP_CONNECT_TIMEOUT', default=5, cast=float)
+SMS_HTTP_READ_TIMEOUT = config('SMS_HTTP_READ_TIMEOUT', default=30, cast=float)
+# Concurrent sends for bulk notifications
+SMS_SEND_CONCURRENCY = config('SMS_SEND_CONCURRENCY', default=8, cast=int)
+# Messages per second per provider, shared by all workers (0 = unlimited)
+SMS_PROVIDER_RATE_LIMITS = {
+    'melipayamak': config('SMS_RATE_LIMIT_MELIPAYAMAK', default=20, cast=int),
+    'payamak_base': config('SMS_RATE_LIMIT_PAYAMAK_BASE', default=20, cast=int),
+}
+
+# SMS provider circuit breakers: a provider failing SMS_CIRCUIT_ERROR_RATE of at least
+# SMS_CIRCUIT_MIN_CALLS calls within SMS_CIRCUIT_WINDOW_SECONDS is skipped for
+# SMS_CIRCUIT_COOLDOWN_SECONDS. Calls slower than SMS_CIRCUIT_SLOW_CALL_SECONDS count as failures.
+SMS_CIRCUIT_WINDOW_SECONDS = config('SMS_CIRCUIT_WINDOW_SECONDS', default=60, cast=int)
+SMS_CIRCUIT_MIN_CALLS = config('SMS_CIRCUIT_MIN_CALLS', default=5, cast=int)
+SMS_CIRCUIT_ERROR_RATE = config('SMS_CIRCUIT_ERROR_RATE', default=0.5, cast=float)
+SMS_CIRCUIT_SLOW_CALL_SECONDS = config('SMS_CIRCUIT_SLOW_CALL_SECONDS', default=10, cast=float)
+SMS_CIRCUIT_COOLDOWN_SECONDS = config('SMS_CIRCUIT_COOLDOWN_SECONDS', default=30, cast=int)
+
+CELERY_BEAT_SCHEDULE['process-sms-outbox'] = {
+    'task': 'zistino_apps.payments.tasks.process_sms_outbox_task',
+    'schedule': 60.0,  # Run every minute
+}
+
+# Driver assignment
+# 'inline': assign a driver while the order is created (default)
+# 'batch': orders are left unassigned and dispatched in batches by Celery beat
+DELIVERY_ASSIGNMENT_MODE = config('DELIVERY_ASSIGNMENT_MODE', default='inline')
+# Maximum pending deliveries per driver for batch dispatch and nearest-driver assignment (0 = unlimited)
+DELIVERY_DRIVER_CAPACITY = config('DELIVERY_DRIVER_CAPACITY', default=20, cast=int)
+# Inline assignment strategy
+# 'zone': round-robin among the drivers of the order's zone (default)
+# 'nearest': nearest driver by live position, falling back to 'zone'
+DELIVERY_ASSIGNMENT_STRATEGY = config('DELIVERY_ASSIGNMENT_STRATEGY', default='zone')
+# Drivers further away are not considered by the 'nearest' strategy (0 = unlimited)
+NEAREST_DRIVER_MAX_DISTANCE_KM = config('NEAREST_DRIVER_MAX_DISTANCE_KM', default=15, cast=float)
+# Seconds a process reuses its nearest-driver index before reloading live positions
+NEAREST_DRIVER_INDEX_REFRESH = config('NEAREST_DRIVER_INDEX_REFRESH', default=5, cast=int)
+
+if DELIVERY_ASSIGNMENT_MODE == 'batch':
+    CELERY_BEAT_SCHEDULE['dispatch-pending-orders'] = {
+        'task': 'zistino_apps.deliveries.tasks.dispatch_pending_orders_task',
+        'schedule': 60.0,  # Run every minute
+    }
+
+# Location tracking
+# Maximum GPS samples accepted in one batch upload
+LOCATION_BATCH_MAX_SIZE = config('LOCATION_BATCH_MAX_SIZE', default=1000, cast=int)
+# Trips without new samples for this many hours are packed into TripTrack blobs
+TRIP_COMPACTION_AGE_HOURS = config('TRIP_COMPACTION_AGE_HOURS', default=24, cast=int)
+# Cache lifetime (seconds) of manager route reports for past days
+DRIVER_ROUTE_CACHE_TIMEOUT = config('DRIVER_ROUTE_CACHE_TIMEOUT', default=86400, cast=int)
+# Drivers without a new sample for this many seconds drop off the live map
+LIVE_POSITION_TTL = config('LIVE_POSITION_TTL', default=900, cast=int)
+
+CELERY_BEAT_SCHEDULE['compact-trip-tracks'] = {
+    'task': 'zistino_apps.deliveries.tasks.compact_trip_tracks_task',
+    'schedule': 3600.0,  # Run every hour
+}
+CELERY_BEAT_SCHEDULE['flush-trip-stats'] = {
+    'task': 'zistino_apps.deliveries.tasks.flush_trip_stats_task',
+    'schedule': 60.0,  # Run every minute
+}
+
+# Product exports (see zistino_apps.compatibility.products.exports): exports of more
+# rows than PRODUCT_EXPORT_SYNC_LIMIT are built by Celery into media storage, and
+# their files are deleted after PRODUCT_EXPORT_TTL_HOURS
+PRODUCT_EXPORT_SYNC_LIMIT = config('PRODUCT_EXPORT_SYNC_LIMIT', default=5000, cast=int)
+PRODUCT_EXPORT_TTL_HOURS = config('PRODUCT_EXPORT_TTL_HOURS', default=24, cast=int)
+
+CELERY_BEAT_SCHEDULE['delete-expired-product-exports'] = {
+    'task': 'zistino_apps.compatibility.tasks.delete_expired_product_exports_task',
+    'schedule': 3600.0,  # Run every hour
+}
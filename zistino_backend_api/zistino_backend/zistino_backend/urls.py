@@ -86,6 +86,8 @@ urlpatterns = [
             path('weight-range-minimums', deliveries_views.ManagerWeightRangeMinimumsView.as_view(), name='manager-weight-range-minimums'),
             path('driver-payout-tiers', deliveries_views.ManagerDriverPayoutTiersView.as_view(), name='manager-driver-payout-tiers'),
             path('weight-shortfalls', deliveries_views.ManagerWeightShortfallsView.as_view(), name='manager-weight-shortfalls'),
+            path('drivers/live', deliveries_views.ManagerDriverLivePositionsView.as_view(), name='manager-drivers-live'),
+            path('drivers/live/stream', deliveries_views.ManagerDriverLivePositionsStreamView.as_view(), name='manager-drivers-live-stream'),
             path('drivers/<uuid:driver_id>/routes', deliveries_views.ManagerDriverRouteView.as_view(), name='manager-driver-routes'),
             path('drivers/<uuid:driver_id>/available-dates', deliveries_views.ManagerDriverAvailableDatesView.as_view(), name='manager-driver-available-dates'),
             path('drivers/satisfaction', deliveries_views.ManagerDriverSatisfactionView.as_view(), name='manager-driver-satisfaction'),